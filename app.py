@@ -1,12 +1,16 @@
-import requests
+import argparse
 import time
 import json
-import subprocess
 import sys
-from urllib.parse import quote
 import warnings
 from datetime import datetime
 
+import cache
+import metrics
+import query_analysis
+from ratelimit import THROTTLE_STATUS, backoff_delay, parse_retry_after
+from captures import CaptureTable, save_captures
+
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
 DOMAINS = [
@@ -14,89 +18,269 @@ DOMAINS = [
     "damabolsas.com.br", "damabolsas.com", "damaacessorios.com.br", "damaacessorio.com.br"
 ]
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (compatible; HistoricalScanner/1.0; +https://github.com/JulioCamposMachado)"
-}
+CRT_TERMS = ["ferrana", "dama", "damabolsas", "damaacessorios"]
+
+# fontes da varredura; cada uma importa o próprio cliente (cdx, crtsh,
+# whois_engine, requests) só quando é usada, então --fontes whois não carrega requests
+SOURCES = ("wayback", "crtsh", "whois")
+
+# marcas e palavras combinadas por --variantes (variants.py)
+BRANDS = ["ferrana", "dama"]
+BRAND_WORDS = ["acessorios", "bolsas"]
+
+REPORT_FILE = "ferrana_report.json"
+CAPTURES_FILE = "ferrana_report.capt"
 
 def log(msg):
     print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
     sys.stdout.flush()
 
-def retry_request(url, retries=3, delay=3):
-    """Executa requisição com tentativas e backoff exponencial."""
+def retry_request(url, retries=3, delay=3, stream=False):
+    """Executa requisição com tentativas e backoff exponencial (com jitter).
+
+    A conexão vem do pool por host (http_client.py) e o ritmo por host é
+    controlado pelo limitador adaptativo (ratelimit.py), que respeita
+    Retry-After e reduz a taxa em respostas 429/503.
+    """
+    import http_client
     for i in range(retries):
+        wait = None
+        if i:
+            metrics.retry(metrics.source_of(url))
         try:
-            r = requests.get(url, headers=HEADERS, timeout=60)
+            r = http_client.get(url, timeout=60, stream=stream)
             if r.status_code == 200:
                 return r
+            # com stream=True o corpo não foi lido: devolve a conexão ao pool
+            r.close()
+            if r.status_code in THROTTLE_STATUS:
+                wait = parse_retry_after(r.headers.get("Retry-After"))
             log(f"⚠️ Status {r.status_code} em {url}")
-        except requests.exceptions.RequestException as e:
+        except OSError as e:  # requests.RequestException é subclasse de IOError
             log(f"⚠️ Erro em {url}: {e}")
-        time.sleep(delay * (i + 1))
+        if i < retries - 1:
+            time.sleep(wait if wait is not None else backoff_delay(i, delay))
     return None
 
-def wayback_checks(domain):
-    """Busca capturas no Internet Archive (Wayback Machine)."""
-    url = f"http://web.archive.org/cdx/search/cdx?url={domain}/*&output=json"
-    r = retry_request(url)
-    if not r:
-        return []
+def wayback_checks(domain, collapse=None, from_ts=None, to_ts=None, fl=None, runs=False):
+    """Busca capturas no Internet Archive (Wayback Machine) e devolve a lista de linhas.
+
+    runs=True agrupa as capturas repetidas (mesma urlkey e digest) em uma
+    linha por versão do conteúdo, com último timestamp e contagem (cdx.collapse_runs).
+    Para domínios grandes prefira iter_wayback(), que não monta a lista.
+    """
+    import sources
     try:
-        data = r.json()
-        if isinstance(data, list) and len(data) > 1:
-            return data[1:]
-    except Exception as e:
-        log(f"Erro ao processar Wayback JSON para {domain}: {e}")
-    return []
+        return list(iter_wayback(domain, collapse, from_ts, to_ts, fl, runs))
+    except sources.SourceError as e:
+        log(f"⚠️ {e}")
+        return []
+
+def iter_wayback(domain, collapse=None, from_ts=None, to_ts=None, fl=None, runs=False):
+    """Gera as capturas do domínio em streaming, página por página (fonte "cdx", sem cache).
+
+    Levanta sources.SourceError se o CDX falhar no meio.
+    """
+    import sources
+    records = sources.get("cdx").search(
+        domain, get=lambda url: retry_request(url, stream=True),
+        collapse=collapse, from_ts=from_ts, to_ts=to_ts, fl=fl, runs=runs)
+    return (r.data for r in records)
 
 def crt_sh_search(term, retries=3):
-    """Busca certificados SSL relacionados ao domínio ou nome comercial."""
-    url = f"https://crt.sh/?q=%25{quote(term)}%25&output=json"
-    r = retry_request(url, retries=retries)
-    if not r:
-        return []
+    """Busca certificados SSL relacionados ao domínio ou nome comercial (fonte "crtsh")."""
+    import sources
     try:
-        data = r.json()
-        if isinstance(data, list):
-            return data
-    except Exception as e:
-        log(f"Erro ao processar crt.sh JSON para {term}: {e}")
-    return []
+        records = sources.get("crtsh").results(
+            term, get=lambda url: retry_request(url, retries=retries, stream=True))
+    except sources.SourceError as e:
+        log(f"⚠️ {e}")
+        return []
+    if records.missing:
+        log(f"⚠️ crt.sh incompleto para {term}: {len(records.missing)} subconsultas faltando "
+            f"({', '.join(records.missing[:5])}); resultado parcial não foi para o cache")
+    return [r.data for r in records]
 
 def whois_lookup(domain):
-    """Executa consulta WHOIS (compatível com Windows e Linux)."""
+    """Consulta WHOIS direto no servidor do registro (porta 43, fonte "whois")."""
+    import sources
     try:
-        out = subprocess.check_output(["whois", domain], stderr=subprocess.DEVNULL, timeout=60)
-        return out.decode(errors="ignore")
-    except FileNotFoundError:
-        return "❌ WHOIS não disponível neste sistema."
-    except subprocess.TimeoutExpired:
-        return "❌ Timeout na consulta WHOIS."
-    except Exception as e:
-        return f"❌ Erro no WHOIS: {e}"
+        return sources.get("whois").results(domain)[0].data["raw"]
+    except sources.SourceError as e:
+        return f"❌ Erro no WHOIS: {e.__cause__ or e}"
+
+def _json_default(obj):
+    if isinstance(obj, CaptureTable):
+        return list(obj.rows())
+    raise TypeError(f"Objeto não serializável: {type(obj).__name__}")
+
+def save_report(report, path=REPORT_FILE, captures_file=CAPTURES_FILE):
+    """Grava o relatório JSON e, depois dele, as capturas em formato binário.
+
+    O .capt leva o carimbo (tamanho, mtime_ns) do JSON recém-fechado; é assim
+    que report_viewer.py e report_store.py sabem que podem usá-lo.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=_json_default)
+    log(f"✅ Relatório salvo em {path}")
+    save_captures(report["wayback"], captures_file, report=path)
+    log(f"✅ Capturas salvas em {captures_file}")
+
+
+def load_previous_report(path=REPORT_FILE):
+    """Carrega o relatório anterior (ou None se não existir / estiver inválido)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def merge_wayback(old_rows, domain, runs=False):
+    """Pede ao CDX só as capturas a partir do último timestamp já salvo.
+
+    As linhas vão do stream do CDX direto para a tabela em colunas; se o CDX
+    falhar no meio, a tabela volta a ser só a do relatório anterior.
+    """
+    import sources
+    table = CaptureTable.from_rows(old_rows)
+    latest = table.max_timestamp()
+    if latest is None:
+        new_rows = iter_wayback(domain, runs=runs)
+        tail = {}
+    else:
+        # from= é inclusivo: a captura do próprio timestamp volta; se ela abre
+        # um grupo (runs) o grupo antigo é estendido em vez de duplicado
+        new_rows = iter_wayback(domain, from_ts=latest, runs=runs)
+        tail = {c.original: i for i, c in enumerate(table) if c.last_timestamp == latest}
+    added = 0
+    try:
+        for row in new_rows:
+            i = tail.pop(row[2], None) if row[1] == str(latest) else None
+            if i is not None:
+                if len(row) >= 9 and table[i].digest == row[5]:
+                    table.extend_run(i, row[7], int(row[8]) - 1)
+                continue
+            table.append(row)
+            added += 1
+    except sources.SourceError as e:
+        log(f"⚠️ {e}")
+        return CaptureTable.from_rows(old_rows), 0
+    return table, added
+
+def merge_crtsh(old_certs, term):
+    """Acrescenta apenas os certificados com id acima do último já visto."""
+    last_id = max((c.get("id") or 0 for c in old_certs), default=0)
+    new_certs = [c for c in crt_sh_search(term) if (c.get("id") or 0) > last_id]
+    return old_certs + new_certs, len(new_certs)
+
+def whois_expired(previous, domain, now):
+    """WHOIS só é refeito quando o registro salvo passou do TTL do cache."""
+    checked = previous.get("meta", {}).get("whois_checked", {}).get(domain)
+    text = previous.get("whois", {}).get(domain)
+    if not checked or not text or text.startswith("❌"):
+        return True
+    return now - checked > cache.TTLS["whois_record"][0]
 
 if __name__ == "__main__":
-    report = {"wayback": {}, "crtsh": {}, "whois": {}}
+    parser = argparse.ArgumentParser(description="Varredura Wayback / crt.sh / WHOIS")
+    parser.add_argument("--incremental", action="store_true",
+                        help="reaproveita o relatório anterior e busca só o que mudou")
+    parser.add_argument("--collapse", action="store_true",
+                        help="uma linha por versão do conteúdo (digest), com último timestamp e contagem")
+    parser.add_argument("--variantes", action="store_true",
+                        help="gera variações das marcas (hífen, plural, TLD, erros de digitação) e "
+                             "varre só as que existem no DNS ou no Wayback")
+    parser.add_argument("--fontes", default=",".join(SOURCES),
+                        help="fontes a consultar, separadas por vírgula (padrão: wayback,crtsh,whois)")
+    parser.add_argument("consultas", nargs="*",
+                        help="domínios, e-mails ou termos extras (classificados por query_analysis.py)")
+    args = parser.parse_args()
+    fontes = [f.strip() for f in args.fontes.split(",") if f.strip()]
+    if set(fontes) - set(SOURCES):
+        parser.error(f"fontes desconhecidas: {', '.join(sorted(set(fontes) - set(SOURCES)))}")
+
+    # cada consulta vai só às fontes que sabem respondê-la: Wayback (por domínio)
+    # e WHOIS recebem o domínio registrado, crt.sh o domínio ou o termo
+    wayback_domains, crt_terms, whois_domains = list(DOMAINS), list(CRT_TERMS), list(DOMAINS)
+    brands = list(BRANDS)
+    for raw in args.consultas:
+        q = query_analysis.analyze(raw)
+        if q.kind == "term" and q.text not in brands:
+            brands.append(q.text)
+        targets = [
+            (wayback_domains, q.value_for("cdx")),
+            (crt_terms, q.value_for("crtsh")),
+            (whois_domains, q.value_for("whois")),
+        ]
+        if not any(value for _, value in targets):
+            log(f"⚠️ {raw!r} ({q.kind}) não se aplica a Wayback/crt.sh/WHOIS, ignorado.")
+            continue
+        for lst, value in targets:
+            if value and value not in lst:
+                lst.append(value)
+
+    variant_hits = {}
+    if args.variantes:
+        import variants
+        # pré-filtro barato (DNS, depois CDX limit=1) antes da varredura completa
+        for brand in brands:
+            candidates = [d for d in variants.generate(brand, BRAND_WORDS) if d not in wayback_domains]
+            log(f"🧬 Variantes de {brand}: {len(candidates)} candidatos, verificando existência...")
+            found, unknown = variants.prefilter(candidates)
+            log(f"   {len(found)} com rastro (DNS {sum(1 for r in found.values() if r == 'dns')}, "
+                f"Wayback {sum(1 for r in found.values() if r == 'wayback')}), {len(unknown)} sem resposta")
+            variant_hits.update(found)
+            for d in found:
+                wayback_domains.append(d)
+                if d not in whois_domains:
+                    whois_domains.append(d)
+
+    previous = load_previous_report() if args.incremental else None
+    if args.incremental and previous is None:
+        log("⚠️ Relatório anterior não encontrado, fazendo varredura completa.")
+    base = previous or {}
+    report = {"wayback": {}, "crtsh": {}, "whois": {}, "meta": {"whois_checked": {}}}
+    if variant_hits:
+        report["meta"]["variants"] = variant_hits
+    # fontes fora desta execução mantêm o que já estava no relatório anterior
+    for source in SOURCES:
+        if source not in fontes:
+            report[source] = base.get(source, {})
+    if "wayback" not in fontes:
+        report["wayback"] = {d: CaptureTable.from_rows(rows) for d, rows in report["wayback"].items()}
+    if "whois" not in fontes:
+        report["meta"]["whois_checked"] = base.get("meta", {}).get("whois_checked", {})
 
     log("🚀 Iniciando varredura de domínios Ferrana / Dama Acessórios...")
 
-    for d in DOMAINS:
+    for d in wayback_domains if "wayback" in fontes else []:
         log(f"🌐 Wayback → {d}")
-        report["wayback"][d] = wayback_checks(d)
-        time.sleep(1)
+        report["wayback"][d], added = merge_wayback(base.get("wayback", {}).get(d, []), d, runs=args.collapse)
+        if previous:
+            log(f"   +{added} capturas novas")
 
-    for term in ["ferrana", "dama", "damabolsas", "damaacessorios"]:
+    for term in crt_terms if "crtsh" in fontes else []:
         log(f"🔍 crt.sh → {term}")
-        report["crtsh"][term] = crt_sh_search(term)
-        time.sleep(1)
+        report["crtsh"][term], added = merge_crtsh(base.get("crtsh", {}).get(term, []), term)
+        if previous:
+            log(f"   +{added} certificados novos")
 
-    for d in DOMAINS:
+    for d in whois_domains if "whois" in fontes else []:
+        now = time.time()
+        if previous and not whois_expired(previous, d, now):
+            report["whois"][d] = previous["whois"][d]
+            report["meta"]["whois_checked"][d] = previous["meta"]["whois_checked"][d]
+            continue
         log(f"📄 WHOIS → {d}")
         report["whois"][d] = whois_lookup(d)
-        time.sleep(1)
+        report["meta"]["whois_checked"][d] = now
+
+    save_report(report)
 
-    output_file = "ferrana_report.json"
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(report, f, ensure_ascii=False, indent=2)
+    http_client = sys.modules.get("http_client")
+    for host, st in (http_client.stats() if http_client else {}).items():
+        log(f"🔌 {host}: {st['requests']} requisições, {st['connections']} conexões (reuso {st['reuse']:.0%})")
 
-    log(f"✅ Relatório salvo em {output_file}")
+    log("📊 Resumo por fonte:")
+    for line in metrics.summary_lines():
+        print("    " + line)
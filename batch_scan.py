@@ -0,0 +1,189 @@
+# batch_scan.py
+# Varredura em lote (Wayback / WHOIS / crt.sh) para listas grandes de domínios e termos.
+#
+# Uso:
+#   python batch_scan.py --domains dominios.txt --terms termos.txt --out batch_out
+#   cat dominios.txt | python batch_scan.py --domains - --workers 8
+#
+# - os itens são distribuídos num pool de processos (--workers, padrão = nº de CPUs)
+# - os limites de taxa por host são divididos entre os processos
+# - resultados vão para arquivos JSONL particionados (shard-000.jsonl, ...)
+# - checkpoint.txt guarda o que já terminou: rodar de novo continua de onde parou
+#   (itens cuja fonte falhou ficam fora dele e são refeitos)
+# - as métricas de cada processo (metrics.py) são somadas e resumidas no fim
+
+import argparse
+import json
+import os
+import sys
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+import metrics
+
+CHECKPOINT_FILE = "checkpoint.txt"
+DOMAIN_SOURCES = ("wayback", "whois")
+TERM_SOURCES = ("crtsh",)
+
+
+def log(msg):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}", file=sys.stderr)
+    sys.stderr.flush()
+
+
+def read_items(path):
+    """Lê um item por linha (ignora vazias e comentários); "-" = stdin."""
+    if not path:
+        return []
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        items = []
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                items.append(line.lower())
+        return list(dict.fromkeys(items))
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _init_worker(workers):
+    # cada processo tem o próprio limitador: divide a taxa para o total respeitar o limite
+    from ratelimit import limiter
+    limiter.scale(1 / workers)
+
+
+def scan_item(kind, item, sources):
+    """Roda no processo filho: consulta as fontes de um domínio ou termo.
+
+    Devolve (registro, métricas acumuladas no processo desde a última tarefa).
+    Usa os backends (sources.py) direto, sem o tratamento de erro do app.py:
+    uma falha da fonte (SourceError) chega ao processo principal e o item não
+    entra no checkpoint.
+    """
+    import app
+    import sources as source_plugins
+
+    def get(url):
+        return app.retry_request(url, stream=True)
+
+    record = {"kind": kind, "item": item}
+    if kind == "domain":
+        if "wayback" in sources:
+            # varredura inteira do domínio: direto do stream, sem passar pelo cache
+            record["wayback"] = [r.data for r in source_plugins.get("cdx").search(item, get=get)]
+        if "whois" in sources:
+            record["whois"] = source_plugins.get("whois").results(item)[0].data["raw"]
+    elif "crtsh" in sources:
+        certs = source_plugins.get("crtsh").results(item, get=get)
+        if certs.missing:
+            # resultado parcial: o item é refeito na próxima execução
+            raise source_plugins.Incomplete(f"crt.sh incompleto para {item}", certs.missing)
+        record["crtsh"] = [r.data for r in certs]
+    return record, metrics.registry.snapshot(reset=True)
+
+
+class ShardWriter:
+    """Escreve cada registro no shard escolhido pelo hash do item."""
+
+    def __init__(self, out_dir, shards):
+        self.files = [open(out_dir / f"shard-{i:03d}.jsonl", "a", encoding="utf-8") for i in range(shards)]
+
+    def write(self, record):
+        key = f"{record['kind']}:{record['item']}".encode("utf-8")
+        f = self.files[zlib.crc32(key) % len(self.files)]
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+
+    def close(self):
+        for f in self.files:
+            f.close()
+
+
+def load_checkpoint(path):
+    if not path.exists():
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return {tuple(line.rstrip("\n").split("\t", 1)) for line in f if "\t" in line}
+
+
+def run(jobs, out_dir, workers, shards, sources):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    checkpoint_path = out_dir / CHECKPOINT_FILE
+    done = load_checkpoint(checkpoint_path)
+    todo = [(kind, item) for kind, item in jobs if (kind, item) not in done]
+    log(f"🚀 {len(todo)} itens para varrer ({len(jobs) - len(todo)} já no checkpoint), {workers} processos")
+
+    writer = ShardWriter(out_dir, shards)
+    checkpoint = open(checkpoint_path, "a", encoding="utf-8")
+    finished = failed = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(workers,)) as pool:
+            queue = iter(todo)
+            running = {}
+            # janela limitada de tarefas em voo, para não carregar a lista toda no pool
+            while True:
+                while len(running) < workers * 4:
+                    nxt = next(queue, None)
+                    if nxt is None:
+                        break
+                    running[pool.submit(scan_item, nxt[0], nxt[1], sources)] = nxt
+                if not running:
+                    break
+                completed, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in completed:
+                    kind, item = running.pop(fut)
+                    try:
+                        record, snap = fut.result()
+                    except Exception as e:
+                        failed += 1
+                        log(f"⚠️ {kind} {item}: {e}")
+                        continue
+                    metrics.registry.merge(snap)
+                    writer.write(record)
+                    checkpoint.write(f"{kind}\t{item}\n")
+                    checkpoint.flush()
+                    finished += 1
+                    if finished % 100 == 0:
+                        log(f"… {finished}/{len(todo)} concluídos")
+    finally:
+        writer.close()
+        checkpoint.close()
+    log(f"✅ {finished} concluídos, {failed} com erro. Resultados em {out_dir}")
+    log("📊 Resumo por fonte:")
+    for line in metrics.summary_lines():
+        print("    " + line, file=sys.stderr)
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Varredura em lote de domínios e termos")
+    parser.add_argument("--domains", help="arquivo com um domínio por linha (- para stdin)")
+    parser.add_argument("--terms", help="arquivo com um termo crt.sh por linha (- para stdin)")
+    parser.add_argument("--out", default="batch_out", help="diretório de saída (shards + checkpoint)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shards", type=int, default=16)
+    parser.add_argument("--sources", default="wayback,whois,crtsh",
+                        help="fontes separadas por vírgula (wayback, whois, crtsh)")
+    args = parser.parse_args(argv)
+
+    if args.domains == "-" and args.terms == "-":
+        parser.error("apenas uma das listas pode vir do stdin")
+    if not args.domains and not args.terms:
+        parser.error("informe --domains e/ou --terms")
+
+    sources = tuple(s.strip() for s in args.sources.split(",") if s.strip())
+    jobs = []
+    if any(s in sources for s in DOMAIN_SOURCES):
+        jobs += [("domain", d) for d in read_items(args.domains)]
+    if any(s in sources for s in TERM_SOURCES):
+        jobs += [("term", t) for t in read_items(args.terms)]
+    failed = run(jobs, Path(args.out), max(1, args.workers), max(1, args.shards), sources)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
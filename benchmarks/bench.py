@@ -0,0 +1,395 @@
+# bench.py
+# Benchmarks de ponta a ponta contra o servidor stub local (stub_server.py).
+#
+# Cada estágio roda num processo Python novo (para medir o pico de memória
+# só daquele estágio) com as fontes públicas redirecionadas para o stub via
+# SEARCH_HOST_OVERRIDES e cache vazio. As entradas são multiplicadas
+# sinteticamente a partir das gravações em fixtures/:
+#
+#   wayback      app.wayback_checks() para N domínios (CDX em streaming)
+#   crtsh        app.crt_sh_search() com N certificados + índice CertIndex
+#   whois        whois_engine.lookup_many() para N domínios (porta 43 do stub)
+#   report       report_viewer.py sobre um relatório sintético de N domínios
+#   store        primeira página do ReportStore sobre o mesmo relatório
+#   api_search   POST /api/search do finder_web_ui.py (precisa de flask)
+#   variants     N variações de marca (variants.py): pré-filtro CDX limit=1 e
+#                varredura Wayback completa só das que têm capturas no stub
+#                (VARIANT_HIT_RATE dos hosts); compare com o estágio wayback
+#   startup      partida a frio: mediana de N processos novos importando cada
+#                ponto de entrada (STARTUP_MODULES), descontado o python vazio
+#
+# Para cada estágio/tamanho são medidos tempo total, pico de RSS e
+# requisições/s (contadas no stub). O resultado vai para um JSON que pode
+# ser comparado entre commits:
+#
+#   python benchmarks/bench.py --preset quick --out benchmarks/results-antes.json
+#   python benchmarks/bench.py --preset quick --compare benchmarks/results-antes.json
+#   python benchmarks/bench.py --stages wayback,crtsh --domains 10,1000 --latency 0.05 --error-rate 0.02
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage, o pico de memória fica em branco
+    resource = None
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+sys.path.insert(0, str(HERE))
+
+from stub_server import StubConfig, StubServers, certs_for, whois_for, _load_fixtures  # noqa: E402
+
+STAGES = ("wayback", "crtsh", "whois", "report", "store", "api_search", "variants", "startup")
+
+# estágio -> qual escala usa ("domains" ou "certs")
+STAGE_SCALE = {
+    "wayback": "domains",
+    "crtsh": "certs",
+    "whois": "domains",
+    "report": "domains",
+    "store": "domains",
+    "api_search": "domains",
+    "variants": "domains",
+    "startup": "starts",
+}
+
+PRESETS = {
+    "quick": {"domains": [10, 100], "certs": [300, 3000], "starts": [5]},
+    "default": {"domains": [10, 100, 1000], "certs": [300, 3000, 30000], "starts": [15]},
+    "full": {"domains": [10, 100, 1000, 10000, 100000], "certs": [300, 3000, 30000, 300000, 1000000],
+             "starts": [30]},
+}
+
+# api_search faz 4 fontes por consulta; acima disso o estágio é pulado
+API_SEARCH_MAX = 1000
+REPORT_ROWS_PER_DOMAIN = 10
+VARIANT_HIT_RATE = 0.05
+STARTUP_MODULES = ("finder_web_ui", "finder", "app", "batch_scan", "report_viewer")
+WORKERS = 8
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def synthetic_domains(n):
+    return [f"dominio{i}.com.br" for i in range(n)]
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+# ---------------------------------------------------------------------------
+# preparação (no processo principal, fora da medição)
+
+def write_report(path, n_domains, n_certs):
+    """Relatório no formato do app.py, escrito em streaming (não cabe na memória no preset full)."""
+    fixtures = _load_fixtures()
+    template = fixtures["cdx"]
+    domains = synthetic_domains(n_domains)
+    terms = ["ferrana", "dama", "damabolsas", "damaacessorios"]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"wayback": {')
+        for i, d in enumerate(domains):
+            surt = ",".join(reversed(d.split(".")))
+            rows = []
+            for j in range(REPORT_ROWS_PER_DOMAIN):
+                row = list(template[j % len(template)])
+                row[0] = surt + ")/"
+                row[2] = row[2].replace("damabolsas.com.br", d)
+                rows.append(row)
+            f.write(("," if i else "") + json.dumps(d) + ": " + json.dumps(rows))
+        f.write('}, "crtsh": {')
+        per_term = max(1, n_certs // len(terms))
+        for i, term in enumerate(terms):
+            f.write(("," if i else "") + json.dumps(term) + ": [")
+            for j, cert in enumerate(certs_for(fixtures, term, per_term)):
+                if j % 3 == 0:
+                    # parte dos certificados aponta para os domínios do relatório
+                    d = domains[j % len(domains)]
+                    cert["name_value"] = f"{d}\nwww.{d}"
+                f.write(("," if j else "") + json.dumps(cert, ensure_ascii=False))
+            f.write("]")
+        f.write('}, "whois": {')
+        for i, d in enumerate(domains):
+            text = whois_for(fixtures, d) if i % 2 == 0 else "% No match for domain"
+            f.write(("," if i else "") + json.dumps(d) + ": " + json.dumps(text, ensure_ascii=False))
+        f.write('}, "meta": {"whois_checked": {}}}')
+
+
+# ---------------------------------------------------------------------------
+# estágios (executados no processo filho)
+
+def _setup_child(whois_port):
+    sys.path.insert(0, str(ROOT))
+    from ratelimit import limiter
+    import whois_engine
+    # o ritmo vem da latência do stub, não dos limites de produção por host
+    limiter.scale(1000)
+    whois_engine.WHOIS_PORT = whois_port
+    for tld in list(whois_engine.TLD_SERVERS):
+        whois_engine.TLD_SERVERS[tld] = "127.0.0.1"
+
+
+def stage_wayback(size, workdir):
+    import app
+    domains = synthetic_domains(size)
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        rows = sum(len(r or []) for r in pool.map(app.wayback_checks, domains))
+    return {"items": size, "rows": rows}
+
+
+def stage_crtsh(size, workdir):
+    import app
+    from cert_index import CertIndex
+    certs = app.crt_sh_search("dama")
+    index = CertIndex()
+    for cert in certs:
+        index.add(cert)
+    hits = sum(1 for i in range(0, size, max(1, size // 100)) if index.has(f"dama{i}.exemplo{i % 97}.com.br"))
+    return {"items": len(certs), "index_hits": hits}
+
+
+def stage_whois(size, workdir):
+    import whois_engine
+    results = whois_engine.lookup_many(synthetic_domains(size), workers=16)
+    found = sum(1 for r in results.values() if isinstance(r, dict) and r.get("found"))
+    return {"items": len(results), "found": found}
+
+
+def stage_report(size, workdir):
+    import report_viewer
+    os.chdir(workdir)
+    report_viewer.main()
+    return {"items": size, "html_bytes": (Path(workdir) / "relatorio_ferrana.html").stat().st_size}
+
+
+def stage_store(size, workdir):
+    from report_store import ReportStore
+    store = ReportStore(Path(workdir) / "ferrana_report.json", Path(workdir) / "ferrana_report.capt")
+    first = store.page(limit=50)
+    filtered = store.page({"domain": "dominio0.com.br", "status": "200"}, limit=50)
+    return {"items": len(store.order), "first_page": len(first["items"]), "filtered_page": len(filtered["items"])}
+
+
+def stage_api_search(size, workdir):
+    import finder_web_ui
+    client = finder_web_ui.app.test_client()
+    ok = 0
+    terms = [f"dama{i}" for i in range(size)]
+
+    def one(term):
+        r = client.post("/api/search", json={"queries": [term]})
+        return r.status_code == 200
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        ok = sum(pool.map(one, terms))
+    return {"items": size, "ok": ok}
+
+
+def stage_variants(size, workdir):
+    import app
+    import variants
+    candidates = []
+    i = 0
+    while len(candidates) < size:
+        candidates.extend(variants.generate(f"marca{i}", ["acessorios", "bolsas"]))
+        i += 1
+    candidates = candidates[:size]
+    # só CDX: o DNS iria para o resolvedor de verdade, fora do stub
+    found, unknown = variants.prefilter(candidates, checks=("wayback",))
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        rows = sum(len(r or []) for r in pool.map(app.wayback_checks, found))
+    return {"items": size, "plausible": len(found), "unknown": len(unknown), "rows": rows}
+
+
+def stage_startup(size, workdir):
+    def median_ms(code):
+        times = []
+        for _ in range(size):
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            times.append(time.perf_counter() - t0)
+        return sorted(times)[len(times) // 2] * 1000
+
+    base = median_ms("pass")
+    extra = {"items": size, "python_ms": round(base, 1)}
+    for module in STARTUP_MODULES:
+        try:
+            extra[f"{module}_ms"] = round(median_ms(f"import {module}") - base, 1)
+        except subprocess.CalledProcessError:  # p.ex. flask não instalado
+            extra[f"{module}_ms"] = None
+    return extra
+
+
+def run_child(stage, size, workdir, whois_port, result_path):
+    _setup_child(whois_port)
+    start_rss = peak_rss_kb()
+    fn = globals()[f"stage_{stage}"]
+    t0 = time.perf_counter()
+    extra = fn(size, workdir)
+    wall = time.perf_counter() - t0
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump({"wall_s": wall, "start_rss_kb": start_rss, "peak_rss_kb": peak_rss_kb(), "extra": extra}, f)
+
+
+# ---------------------------------------------------------------------------
+# orquestração (processo principal)
+
+def run_stage(servers, stage, size, args, workdir):
+    """Roda um estágio num processo filho e devolve a linha de resultado."""
+    result_path = Path(workdir) / f"result-{stage}-{size}.json"
+    base = servers.base_url
+    env = dict(os.environ)
+    env["SEARCH_HOST_OVERRIDES"] = f"web.archive.org={base},crt.sh={base},oocities.org={base},index.commoncrawl.org={base}"
+    env["SEARCH_CACHE_PATH"] = str(Path(workdir) / f"cache-{stage}-{size}.sqlite3")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+
+    servers.config.certs = size if stage == "crtsh" else None
+    servers.config.cdx_hit_rate = VARIANT_HIT_RATE if stage == "variants" else 1.0
+    servers.counters.reset()
+    cmd = [sys.executable, str(Path(__file__).resolve()), "--run-stage", stage, "--size", str(size),
+           "--workdir", str(workdir), "--whois-port", str(servers.whois_port), "--result", str(result_path)]
+    out = None if args.verbose else subprocess.DEVNULL
+    proc = subprocess.run(cmd, env=env, stdout=out, stderr=None if args.verbose else subprocess.PIPE, text=True)
+    counters = servers.counters.snapshot()
+    row = {"stage": stage, "size": size, "ok": proc.returncode == 0}
+    if proc.returncode != 0 or not result_path.exists():
+        row["ok"] = False
+        row["error"] = (proc.stderr or "").strip().splitlines()[-1:] if proc.stderr else "falhou"
+        return row
+
+    measured = json.loads(result_path.read_text("utf-8"))
+    requests_made = sum(c["requests"] for c in counters.values())
+    wall = measured["wall_s"]
+    row.update({
+        "wall_s": round(wall, 4),
+        "start_rss_kb": measured["start_rss_kb"],
+        "peak_rss_kb": measured["peak_rss_kb"],
+        "requests": requests_made,
+        "errors_injected": sum(c["errors"] for c in counters.values()),
+        "bytes": sum(c["bytes"] for c in counters.values()),
+        "req_per_s": round(requests_made / wall, 2) if wall else None,
+        "items_per_s": round(measured["extra"].get("items", 0) / wall, 2) if wall else None,
+        "routes": counters,
+        "extra": measured["extra"],
+    })
+    return row
+
+
+def compare(current, previous_path):
+    """Imprime a variação de tempo e memória em relação a um resultado anterior."""
+    previous = json.loads(Path(previous_path).read_text("utf-8"))
+    old = {(r["stage"], r["size"]): r for r in previous.get("results", []) if r.get("ok")}
+    print(f"\nComparação com {previous_path} (commit {previous.get('commit')}):")
+    print(f"{'estágio':<12}{'tamanho':>10}{'tempo':>12}{'Δ tempo':>10}{'RSS MB':>10}{'Δ RSS':>10}")
+    for r in current["results"]:
+        before = old.get((r["stage"], r["size"]))
+        if not r.get("ok") or not before:
+            continue
+        dt = (r["wall_s"] / before["wall_s"] - 1) * 100 if before["wall_s"] else 0.0
+        rss = r["peak_rss_kb"] or 0
+        drss = (rss / before["peak_rss_kb"] - 1) * 100 if before.get("peak_rss_kb") else 0.0
+        print(f"{r['stage']:<12}{r['size']:>10}{r['wall_s']:>11.2f}s{dt:>+9.1f}%{rss / 1024:>10.1f}{drss:>+9.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks contra o stub local das fontes públicas")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--stages", default=",".join(STAGES), help="lista separada por vírgulas")
+    parser.add_argument("--domains", help="tamanhos de entrada em domínios, p.ex. 10,100,1000")
+    parser.add_argument("--certs", help="tamanhos em certificados, p.ex. 300,30000")
+    parser.add_argument("--latency", type=float, default=0.01, help="latência do stub por resposta (s)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração de respostas 503 / WHOIS vazias")
+    parser.add_argument("--out", default=str(HERE / "results.json"))
+    parser.add_argument("--compare", help="JSON de uma execução anterior")
+    parser.add_argument("--verbose", action="store_true", help="mostra a saída dos processos filhos")
+    # uso interno: execução de um estágio no processo filho
+    parser.add_argument("--run-stage", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--whois-port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_stage:
+        run_child(args.run_stage, args.size, args.workdir, args.whois_port, args.result)
+        return
+
+    scales = dict(PRESETS[args.preset])
+    if args.domains:
+        scales["domains"] = [int(x) for x in args.domains.split(",")]
+    if args.certs:
+        scales["certs"] = [int(x) for x in args.certs.split(",")]
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"estágios desconhecidos: {', '.join(sorted(unknown))}")
+
+    config = StubConfig(args.latency, args.jitter, args.error_rate)
+    servers = StubServers(config).start()
+    results = {
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"preset": args.preset, "scales": scales, "latency": args.latency,
+                   "jitter": args.jitter, "error_rate": args.error_rate},
+        "results": [],
+    }
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+            for size in scales["domains"] if {"report", "store"} & set(stages) else []:
+                workdir = Path(tmp) / f"report-{size}"
+                workdir.mkdir()
+                write_report(workdir / "ferrana_report.json", size, max(300, 3 * size))
+
+            for stage in stages:
+                for size in scales[STAGE_SCALE[stage]]:
+                    if stage == "api_search" and size > API_SEARCH_MAX:
+                        continue
+                    workdir = Path(tmp) / f"report-{size}"
+                    workdir.mkdir(exist_ok=True)
+                    row = run_stage(servers, stage, size, args, workdir)
+                    results["results"].append(row)
+                    if row["ok"]:
+                        print(f"{stage:<12}{size:>10}  {row['wall_s']:>9.2f}s  "
+                              f"{(row['peak_rss_kb'] or 0) / 1024:>8.1f} MB  {row['req_per_s'] or 0:>9.1f} req/s")
+                        if stage == "startup":
+                            for module in STARTUP_MODULES:
+                                ms = row["extra"].get(f"{module}_ms")
+                                print(f"    import {module:<16}{'-' if ms is None else f'{ms:.1f} ms':>10}")
+                    else:
+                        print(f"{stage:<12}{size:>10}  ❌ {row.get('error')}")
+    finally:
+        servers.stop()
+
+    Path(args.out).write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\n✅ Resultados salvos em {args.out}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+# stub_server.py
+# Servidor local que imita as fontes públicas usadas pelo projeto, para os
+# benchmarks (bench.py) rodarem sem rede e com carga reproduzível.
+#
+# - HTTP: /cdx/search/cdx (Wayback CDX, texto com resumeKey ou output=json),
+#   /?q=...&output=json (crt.sh), /search?q=&page= (oocities, com paginação) e
+#   /collinfo.json + /<crawl>-index?url= (índice do Common Crawl, JSON por linha)
+# - WHOIS: servidor TCP (porta 43 simulada) que responde com o registro gravado
+# - as respostas são geradas a partir das gravações em fixtures/, multiplicadas
+#   sinteticamente até o tamanho pedido (capturas por URL, certificados por termo)
+# - cdx_hit_rate: fração dos hosts que têm capturas (sorteio fixo por host), para
+#   simular variações de domínio que nunca existiram
+# - latência e injeção de erros configuráveis (503 com Retry-After, ou conexão
+#   WHOIS fechada sem resposta)
+# - contadores por rota (requisições, erros, bytes) para o cálculo de req/s
+#
+# Uso isolado:
+#   python benchmarks/stub_server.py --port 8765 --whois-port 8743 --latency 0.02
+
+import argparse
+import itertools
+import json
+import random
+import socketserver
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+CHUNK_ROWS = 1000
+
+
+def _load_fixtures():
+    cdx_rows = [line.split(" ") for line in (FIXTURES / "cdx_damabolsas.txt").read_text("utf-8").splitlines() if line]
+    certs = json.loads((FIXTURES / "crtsh_dama.json").read_text("utf-8"))
+    return {
+        "cdx": cdx_rows,
+        "crtsh": certs,
+        "oocities": (FIXTURES / "oocities_search.html").read_text("utf-8"),
+        "whois": (FIXTURES / "whois_registro_br.txt").read_text("utf-8"),
+    }
+
+
+def _surt_host(host):
+    return ",".join(reversed(host.split(".")))
+
+
+class StubConfig:
+    """Parâmetros de carga do stub (podem mudar entre estágios do benchmark)."""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, cdx_rows=None, certs=None,
+                 oocities_pages=5, cdx_hit_rate=1.0, seed=1):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.cdx_rows = cdx_rows      # capturas por URL (None = só as gravadas)
+        self.certs = certs            # certificados por termo (None = só os gravados)
+        self.oocities_pages = oocities_pages
+        self.cdx_hit_rate = cdx_hit_rate
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self):
+        with self._lock:
+            extra = self.random.uniform(0, self.jitter) if self.jitter else 0.0
+        if self.latency or extra:
+            time.sleep(self.latency + extra)
+
+    def fail(self):
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self.random.random() < self.error_rate
+
+
+class Counters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.data = {}
+
+    def add(self, route, sent=0, error=False):
+        with self._lock:
+            c = self.data.setdefault(route, {"requests": 0, "errors": 0, "bytes": 0})
+            c["requests"] += 1
+            c["bytes"] += sent
+            if error:
+                c["errors"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {route: dict(c) for route, c in self.data.items()}
+
+
+# ---------------------------------------------------------------------------
+# geração sintética das respostas
+
+def cdx_rows_for(fixtures, url, count):
+    """Capturas para a URL pedida: as gravadas, repetidas até count, com host trocado."""
+    host = url.split("/", 1)[0].lstrip("*.").lower() or "exemplo.com.br"
+    template = fixtures["cdx"]
+    count = len(template) if count is None else count
+    surt = _surt_host(host)
+    base_ts = int(template[0][1])
+    for i in range(count):
+        urlkey, ts, original, mime, status, digest, length = template[i % len(template)]
+        cycle = i // len(template)
+        path = urlkey.split(")", 1)[1] if ")" in urlkey else "/"
+        yield [
+            f"{surt}){path}",
+            str(max(int(ts), base_ts) + cycle * 1000000),
+            original.replace("damabolsas.com.br", host),
+            mime, status, digest, length,
+        ]
+
+
+CC_COLLECTIONS = ["CC-MAIN-2024-10", "CC-MAIN-2023-50", "CC-MAIN-2023-40"]
+
+
+def cc_captures_for(fixtures, coll, url, count):
+    """Capturas do Common Crawl: as mesmas linhas do CDX no formato JSON do índice."""
+    for i, row in enumerate(cdx_rows_for(fixtures, url, count)):
+        yield {"urlkey": row[0], "timestamp": row[1], "url": row[2], "mime": row[3], "status": row[4],
+               "digest": row[5], "length": row[6], "offset": str(i * 4096),
+               "filename": f"crawl-data/{coll}/segments/{i % 10}/warc/{coll}-{i:05d}.warc.gz"}
+
+
+def has_captures(url, rate):
+    """Sorteio fixo por host: a mesma URL sempre tem (ou não tem) capturas."""
+    if rate >= 1.0:
+        return True
+    host = url.split("/", 1)[0].lstrip("*.").lower()
+    return zlib.crc32(host.encode("utf-8")) % 10000 < rate * 10000
+
+
+def certs_for(fixtures, term, count):
+    """Certificados para o termo: os gravados, com id e nomes únicos até count."""
+    template = fixtures["crtsh"]
+    count = len(template) if count is None else count
+    for i in range(count):
+        cert = dict(template[i % len(template)])
+        name = f"{term}{i}.exemplo{i % 97}.com.br"
+        cert["id"] = 10_000_000_000 + i
+        cert["common_name"] = name
+        cert["name_value"] = f"{name}\nwww.{name}"
+        cert["serial_number"] = f"{i:036x}"
+        yield cert
+
+
+def oocities_page(fixtures, term, page, pages):
+    """Página de resultados: links da gravação (únicos por página) e paginador de até 3 páginas à frente."""
+    html = fixtures["oocities"]
+    if page > 1:
+        html = html.replace('href="/', f'href="/p{page}/').replace("oocities.org/", f"oocities.org/p{page}/")
+    links = " ".join(f'<a href="/search?q={term}&amp;page={n}">{n}</a>'
+                     for n in range(max(1, page - 3), min(pages, page + 3) + 1) if n != page)
+    start, end = html.index('<div class="pager">'), html.index("</div>", html.index('<div class="pager">'))
+    html = html[:start] + f'<div class="pager">{links}' + html[end:]
+    return html.replace("dama", term)
+
+
+def whois_for(fixtures, domain):
+    return fixtures["whois"].replace("damabolsas.com.br", domain)
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "SearchStub/1.0"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        srv = self.server
+        if parts.path.startswith("/cdx/search/cdx"):
+            route = "cdx"
+        elif parts.path == "/search":
+            route = "oocities"
+        elif parts.path == "/collinfo.json" or parts.path.endswith("-index"):
+            route = "commoncrawl"
+        elif params.get("output") == "json":
+            route = "crtsh"
+        else:
+            self._send(404, b"not found", "text/plain")
+            srv.counters.add("other", error=True)
+            return
+
+        srv.config.delay()
+        if srv.config.fail():
+            self._send(503, b"stub: erro injetado", "text/plain", {"Retry-After": "0"})
+            srv.counters.add(route, error=True)
+            return
+
+        if route == "cdx":
+            sent = self._cdx(params)
+        elif route == "crtsh":
+            sent = self._crtsh(params)
+        elif route == "commoncrawl":
+            sent = self._commoncrawl(parts.path, params)
+        else:
+            sent = self._send(200, oocities_page(srv.fixtures, params.get("q", ""), int(params.get("page") or 1),
+                                                 srv.config.oocities_pages).encode("utf-8"), "text/html")
+        srv.counters.add(route, sent)
+
+    def _send(self, status, body, ctype, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+        return len(body)
+
+    def _send_chunks(self, chunks, ctype):
+        # Transfer-Encoding: chunked, para respostas grandes não ficarem inteiras na memória
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        sent = 0
+        for chunk in chunks:
+            if not chunk:
+                continue
+            data = chunk.encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            sent += len(data)
+        self.wfile.write(b"0\r\n\r\n")
+        return sent
+
+    def _cdx(self, params):
+        url = params.get("url", "")
+        limit = int(params.get("limit") or 0) or None
+        offset = int(params.get("resumeKey") or 0)
+        if has_captures(url, self.server.config.cdx_hit_rate):
+            rows = cdx_rows_for(self.server.fixtures, url, self.server.config.cdx_rows)
+            total = self.server.config.cdx_rows or len(self.server.fixtures["cdx"])
+        else:
+            rows, total = iter(()), 0
+        page = list(itertools.islice(rows, offset, offset + limit if limit else None))
+        next_key = offset + len(page) if limit and offset + len(page) < total else None
+
+        if params.get("output") == "json":
+            body = json.dumps([["urlkey", "timestamp", "original", "mimetype", "statuscode", "digest", "length"]] + page)
+            return self._send(200, body.encode("utf-8"), "application/json")
+
+        def chunks():
+            for start in range(0, len(page), CHUNK_ROWS):
+                yield "".join(" ".join(r) + "\n" for r in page[start:start + CHUNK_ROWS])
+            if next_key is not None and params.get("showResumeKey") == "true":
+                yield f"\n{next_key}\n"
+        return self._send_chunks(chunks(), "text/plain")
+
+    def _commoncrawl(self, path, params):
+        if path == "/collinfo.json":
+            base = f"http://{self.headers.get('Host')}"
+            body = json.dumps([{"id": c, "name": c, "cdx-api": f"{base}/{c}-index"} for c in CC_COLLECTIONS])
+            return self._send(200, body.encode("utf-8"), "application/json")
+        coll = path.strip("/")[:-len("-index")]
+        url = params.get("url", "")
+        if coll not in CC_COLLECTIONS or not has_captures(url, self.server.config.cdx_hit_rate):
+            return self._send(404, b'{"message": "No Captures found"}', "application/json")
+        limit = int(params.get("limit") or 0) or None
+        caps = itertools.islice(cc_captures_for(self.server.fixtures, coll, url, self.server.config.cdx_rows), limit)
+
+        def chunks():
+            batch = []
+            for cap in caps:
+                batch.append(json.dumps(cap) + "\n")
+                if len(batch) >= CHUNK_ROWS:
+                    yield "".join(batch)
+                    batch = []
+            yield "".join(batch)
+        return self._send_chunks(chunks(), "text/x-ndjson")
+
+    def _crtsh(self, params):
+        term = params.get("q", "").strip("%") or "termo"
+
+        def chunks():
+            yield "["
+            batch = []
+            first = True
+            for cert in certs_for(self.server.fixtures, term, self.server.config.certs):
+                batch.append(json.dumps(cert, ensure_ascii=False))
+                if len(batch) >= CHUNK_ROWS:
+                    yield ("" if first else ",") + ",".join(batch)
+                    first, batch = False, []
+            if batch:
+                yield ("" if first else ",") + ",".join(batch)
+            yield "]"
+        return self._send_chunks(chunks(), "application/json")
+
+
+# ---------------------------------------------------------------------------
+# WHOIS (TCP)
+
+class WhoisHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        srv = self.server
+        domain = self.rfile.readline().decode("utf-8", "replace").strip().lstrip("=")
+        srv.config.delay()
+        if srv.config.fail():
+            srv.counters.add("whois", error=True)
+            return
+        body = whois_for(srv.fixtures, domain).encode("utf-8")
+        self.wfile.write(body)
+        srv.counters.add("whois", len(body))
+
+
+class _WhoisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # clientes que fecham conexões keep-alive ao terminar não são erro do stub
+        import sys
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+class StubServers:
+    """HTTP + WHOIS em threads, compartilhando configuração e contadores."""
+
+    def __init__(self, config=None, host="127.0.0.1", port=0, whois_port=0):
+        self.config = config or StubConfig()
+        self.counters = Counters()
+        self.fixtures = _load_fixtures()
+        self.http = _HTTPServer((host, port), StubHandler)
+        self.whois = _WhoisServer((host, whois_port), WhoisHandler)
+        for srv in (self.http, self.whois):
+            srv.config, srv.counters, srv.fixtures = self.config, self.counters, self.fixtures
+        self.host = host
+        self._threads = []
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.http.server_address[1]}"
+
+    @property
+    def whois_port(self):
+        return self.whois.server_address[1]
+
+    def start(self):
+        for srv in (self.http, self.whois):
+            t = threading.Thread(target=srv.serve_forever, daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self):
+        for srv in (self.http, self.whois):
+            srv.shutdown()
+            srv.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub local de Wayback CDX / crt.sh / oocities / WHOIS")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--whois-port", type=int, default=8743)
+    parser.add_argument("--latency", type=float, default=0.0, help="segundos por resposta")
+    parser.add_argument("--jitter", type=float, default=0.0, help="latência extra aleatória (0..jitter)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração de respostas com erro")
+    parser.add_argument("--cdx-rows", type=int, default=None, help="capturas por URL")
+    parser.add_argument("--certs", type=int, default=None, help="certificados por termo")
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency, args.jitter, args.error_rate, args.cdx_rows, args.certs)
+    servers = StubServers(config, port=args.port, whois_port=args.whois_port).start()
+    print(f"HTTP em {servers.base_url}, WHOIS em {servers.host}:{servers.whois_port}")
+    print(f'SEARCH_HOST_OVERRIDES="web.archive.org={servers.base_url},crt.sh={servers.base_url},oocities.org={servers.base_url},index.commoncrawl.org={servers.base_url}"')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servers.stop()
@@ -0,0 +1,349 @@
+# cache.py
+# Cache persistente (SQLite, arquivo único) para as respostas das fontes públicas:
+# Wayback CDX, crt.sh e WHOIS. Compartilhado por finder.py, finder_web_ui.py e app.py.
+#
+# Uso:
+#   import cache
+#   dados = cache.cached("crtsh", termo, lambda: buscar_no_crtsh(termo))
+#
+# - chave = fonte + consulta normalizada (minúsculas, espaços colapsados)
+# - TTL por fonte (WHOIS em dias, CDX / crt.sh em horas)
+# - stale-while-revalidate: depois do TTL o valor antigo ainda é devolvido
+#   na hora e uma thread em segundo plano busca o valor novo
+# - tamanho limitado em entradas (MAX_ENTRIES) e em bytes (MAX_BYTES, soma dos
+#   valores): as menos acessadas (LRU) são removidas; valores acima de
+#   MAX_VALUE_BYTES (varreduras inteiras do CDX) não são gravados
+# - leituras não abrem transação: o horário de acesso (LRU) é acumulado na
+#   memória e gravado em lote junto com a próxima escrita ou a cada TOUCH_BATCH leituras
+# - fetch que devolve None (ou levanta exceção) nunca é gravado no cache; um
+#   resultado incompleto volta embrulhado em Partial para o chamador, sem ser gravado
+# - single-flight: buscas simultâneas da mesma chave (fonte + consulta) fazem uma
+#   só chamada à fonte e todas recebem o mesmo resultado; com SEARCH_CACHE_LOCK_DIR
+#   definido, processos diferentes (vários workers web) também se coordenam por
+#   arquivos de trava nesse diretório
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import metrics
+
+CACHE_PATH = os.environ.get("SEARCH_CACHE_PATH", "search_cache.sqlite3")
+MAX_ENTRIES = int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", "20000"))
+MAX_BYTES = int(os.environ.get("SEARCH_CACHE_MAX_BYTES", str(512 << 20)))
+MAX_VALUE_BYTES = int(os.environ.get("SEARCH_CACHE_MAX_VALUE_BYTES", str(4 << 20)))
+TOUCH_BATCH = 200
+TOUCH_INTERVAL = 30
+LOCK_DIR = os.environ.get("SEARCH_CACHE_LOCK_DIR")
+LOCK_STRIPES = 256
+LOCK_TIMEOUT = 120
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# fonte -> (ttl, janela extra em que o valor vencido ainda é servido)
+TTLS = {
+    "whois_record": (7 * DAY, 7 * DAY),
+    "wayback": (12 * HOUR, 2 * DAY),
+    "wayback_term": (12 * HOUR, 2 * DAY),
+    "crtsh": (6 * HOUR, DAY),
+    "exists": (DAY, 6 * DAY),
+    "commoncrawl": (DAY, 7 * DAY),
+}
+DEFAULT_TTL = (HOUR, HOUR)
+
+
+def normalize_query(query):
+    return " ".join(str(query).strip().lower().split())
+
+
+def make_key(source, query):
+    return f"{source}:{normalize_query(query)}"
+
+
+class Partial:
+    """Resultado incompleto de fetch: chega ao chamador como está, mas não vai para o cache."""
+
+    __slots__ = ("value", "missing")
+
+    def __init__(self, value, missing=()):
+        self.value = value
+        self.missing = list(missing)   # o que faltou (p.ex. subconsultas do crt.sh)
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Chamadas simultâneas com a mesma chave compartilham uma única execução."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """Executa fn() uma vez por chave em andamento; retorna (valor, compartilhado)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.value, False
+
+
+@contextmanager
+def _file_lock(path, timeout=LOCK_TIMEOUT):
+    """Trava exclusiva entre processos; no timeout segue sem a trava (melhor repetir a busca que travar)."""
+    f = open(path, "a+b")
+    locked = False
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                locked = True
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(0.05)
+        yield locked
+    finally:
+        if locked:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        f.close()
+
+
+class ResponseCache:
+    """Cache chave/valor com TTL por fonte, LRU e stale-while-revalidate."""
+
+    def __init__(self, path=CACHE_PATH, max_entries=MAX_ENTRIES, ttls=None, lock_dir=LOCK_DIR,
+                 max_value_bytes=MAX_VALUE_BYTES, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_value_bytes = max_value_bytes
+        self.max_bytes = max_bytes
+        self.ttls = dict(TTLS, **(ttls or {}))
+        self.lock_dir = lock_dir
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._writes = 0
+        self._written_bytes = 0
+        self._touched = {}
+        self._touched_at = time.monotonic()
+        self._flight = SingleFlight()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, source TEXT, value TEXT,"
+                " created REAL, expires REAL, stale_until REAL, accessed REAL, size INTEGER)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(cache)")}
+            if "size" not in columns:
+                # cache criado antes do limite em bytes
+                self._conn.execute("ALTER TABLE cache ADD COLUMN size INTEGER")
+                self._conn.execute("UPDATE cache SET size = length(CAST(value AS BLOB))")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache(accessed)")
+            self._conn.commit()
+
+    def get(self, source, query):
+        """Retorna (valor, estado) com estado 'fresh', 'stale' ou None (ausente/expirado)."""
+        key = make_key(source, query)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires, stale_until FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, None
+            value, expires, stale_until = row
+            if now > stale_until:
+                return None, None
+            self._touched[key] = now
+            if len(self._touched) >= TOUCH_BATCH or time.monotonic() - self._touched_at > TOUCH_INTERVAL:
+                self._flush_touched()
+                self._conn.commit()
+        return json.loads(value), ("fresh" if now <= expires else "stale")
+
+    def _flush_touched(self):
+        # chamado com self._lock adquirido; o commit fica com quem chamou
+        if self._touched:
+            self._conn.executemany("UPDATE cache SET accessed = ? WHERE key = ?",
+                                   [(t, k) for k, t in self._touched.items()])
+            self._touched.clear()
+        self._touched_at = time.monotonic()
+
+    def flush(self):
+        """Grava os horários de acesso pendentes."""
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+
+    def set(self, source, query, value):
+        if value is None or isinstance(value, Partial):
+            return
+        ttl, stale = self.ttls.get(source, DEFAULT_TTL)
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False, default=str)
+        if len(payload) > self.max_value_bytes:
+            return  # grande demais: quem pediu recebe o valor, o cache não guarda
+        size = len(payload.encode("utf-8"))
+        with self._lock:
+            self._flush_touched()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, source, value, created, expires, stale_until, accessed, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (make_key(source, query), source, payload, now, now + ttl, now + ttl + stale, now, size),
+            )
+            self._writes += 1
+            self._written_bytes += size
+            if self._writes % 100 == 0 or self._written_bytes > self.max_bytes // 10:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # chamado com self._lock adquirido
+        self._written_bytes = 0
+        self._conn.execute("DELETE FROM cache WHERE stale_until < ?", (time.time(),))
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # remove as menos acessadas até caber nos dois limites
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM cache ORDER BY accessed ASC"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size or 0
+        self._conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+
+    def cached(self, source, query, fetch):
+        """Devolve o valor do cache ou chama fetch() e grava o resultado."""
+        value, state = self.get(source, query)
+        if state == "fresh":
+            metrics.cache_lookup(source, state)
+            return value
+        if state == "stale":
+            metrics.cache_lookup(source, state)
+            self._revalidate(source, query, fetch)
+            return value
+        (value, elsewhere), shared = self._flight.do(
+            make_key(source, query), lambda: self._fetch_and_set(source, query, fetch))
+        metrics.cache_lookup(source, "coalesced" if shared or elsewhere else "miss")
+        return value
+
+    def _fetch_and_set(self, source, query, fetch):
+        """Busca e grava; retorna (valor, veio de outro processo)."""
+        if not self.lock_dir:
+            value = fetch()
+            self.set(source, query, value)
+            return value, False
+        key = make_key(source, query)
+        stripe = zlib.crc32(key.encode("utf-8")) % LOCK_STRIPES
+        with _file_lock(os.path.join(self.lock_dir, f"{stripe:03d}.lock")):
+            # outro processo pode ter gravado enquanto esperávamos a trava
+            value, state = self.get(source, query)
+            if state == "fresh":
+                return value, True
+            value = fetch()
+            self.set(source, query, value)
+            return value, False
+
+    def _revalidate(self, source, query, fetch):
+        key = make_key(source, query)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.set(source, query, fetch())
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def clear(self, source=None):
+        with self._lock:
+            self._touched.clear()
+            if source:
+                self._conn.execute("DELETE FROM cache WHERE source = ?", (source,))
+            else:
+                self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_cache():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ResponseCache()
+            atexit.register(_default.flush)  # horários de acesso ainda na memória
+        return _default
+
+
+def cached(source, query, fetch):
+    return get_cache().cached(source, query, fetch)
+
+
+_inflight = SingleFlight()
+
+
+def coalesce(source, query, fetch):
+    """Só o single-flight, sem gravar no cache (para fontes que não são cacheadas)."""
+    value, shared = _inflight.do(make_key(source, query), fetch)
+    if shared:
+        metrics.cache_lookup(source, "coalesced")
+    return value
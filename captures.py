@@ -0,0 +1,350 @@
+# captures.py
+# Representação compacta (em colunas) das capturas do Wayback.
+#
+# Cada captura do CDX chega como uma lista de 7 strings
+# (urlkey, timestamp, original, mimetype, statuscode, digest, length).
+# Aqui elas viram colunas:
+#   - timestamp / length  -> array de inteiros (int64)
+#   - último timestamp / contagem -> idem, para linhas agrupadas por digest
+#     (cdx.collapse_runs); numa captura simples são o próprio timestamp e 1
+#   - mimetype / status   -> índice (uint16) num dicionário de valores
+#   - digest              -> 20 bytes (SHA-1 em base32 decodificado)
+#   - urlkey / original   -> listas de str (internadas)
+#
+# O formato binário (.capt) grava as colunas numéricas sem compressão e
+# alinhadas, para que load_captures() possa usar mmap e ler tudo sem copiar:
+#   MAGIC | uint32 tamanho do cabeçalho | cabeçalho JSON | colunas
+#
+# O cabeçalho guarda tamanho e mtime_ns do relatório JSON gravado junto
+# ("report"); is_current() compara esse carimbo em vez da ordem de escrita,
+# então um .capt de outra varredura nunca é lido no lugar do JSON.
+#
+# Uso:
+#   tabela = CaptureTable.from_rows(iter_wayback("exemplo.com.br"))   # app.py, em streaming
+#   save_captures({"exemplo.com.br": tabela}, "ferrana_report.capt", report="ferrana_report.json")
+#   if is_current("ferrana_report.capt", "ferrana_report.json"):
+#       tabelas = load_captures("ferrana_report.capt")
+
+import base64
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+MAGIC = b"CAPT\x00\x00\x00\x01"
+DIGEST_SIZE = 20
+EMPTY_DIGEST = bytes(DIGEST_SIZE)
+
+
+def _encode_digest(digest):
+    if len(digest) == 32:
+        try:
+            return base64.b32decode(digest)
+        except ValueError:
+            pass
+    return None
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return -1
+
+
+class Capture:
+    """Uma captura (linha) de uma CaptureTable."""
+
+    __slots__ = ("urlkey", "timestamp", "original", "mimetype", "statuscode", "digest", "length",
+                 "last_timestamp", "count")
+
+    def __init__(self, urlkey, timestamp, original, mimetype, statuscode, digest, length,
+                 last_timestamp=None, count=1):
+        self.urlkey = urlkey
+        self.timestamp = timestamp
+        self.original = original
+        self.mimetype = mimetype
+        self.statuscode = statuscode
+        self.digest = digest
+        self.length = length
+        self.last_timestamp = timestamp if last_timestamp is None else last_timestamp
+        self.count = count
+
+    def to_row(self):
+        """Volta ao formato do CDX (7 strings; + último timestamp e contagem se agrupada)."""
+        row = [
+            self.urlkey,
+            str(self.timestamp),
+            self.original,
+            self.mimetype,
+            self.statuscode,
+            self.digest,
+            str(self.length) if self.length >= 0 else "-",
+        ]
+        if self.count != 1 or self.last_timestamp != self.timestamp:
+            row += [str(self.last_timestamp), self.count]
+        return row
+
+    def __repr__(self):
+        return f"Capture({self.timestamp}, {self.original!r}, {self.statuscode})"
+
+
+class _StringColumn:
+    """Coluna de strings lida do arquivo: offsets (int64) + blob UTF-8."""
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return bytes(self._blob[self._offsets[i]:self._offsets[i + 1]]).decode("utf-8")
+
+
+class CaptureTable:
+    """Tabela de capturas em colunas; aceita append() e leitura por índice."""
+
+    def __init__(self):
+        self.urlkeys = []
+        self.timestamps = array("q")
+        self.originals = []
+        self.mime_idx = array("H")
+        self.status_idx = array("H")
+        self.digests = bytearray()
+        self.lengths = array("q")
+        self.last_timestamps = array("q")
+        self.counts = array("q")
+        self.mimetypes = []
+        self.statuses = []
+        self.odd_digests = {}
+        self._mime_pos = {}
+        self._status_pos = {}
+
+    @classmethod
+    def from_rows(cls, rows):
+        table = cls()
+        for row in rows:
+            table.append(row)
+        return table
+
+    def _code(self, value, values, positions):
+        pos = positions.get(value)
+        if pos is None:
+            pos = positions[value] = len(values)
+            values.append(value)
+        return pos
+
+    def append(self, row):
+        urlkey, timestamp, original, mimetype, statuscode, digest, length = row[:7]
+        self.urlkeys.append(sys.intern(urlkey))
+        self.timestamps.append(_to_int(timestamp))
+        self.originals.append(original)
+        self.mime_idx.append(self._code(mimetype, self.mimetypes, self._mime_pos))
+        self.status_idx.append(self._code(statuscode, self.statuses, self._status_pos))
+        raw = _encode_digest(digest)
+        if raw is None:
+            self.odd_digests[len(self.timestamps) - 1] = digest
+            raw = EMPTY_DIGEST
+        self.digests += raw
+        self.lengths.append(_to_int(length))
+        if len(row) >= 9:
+            self.last_timestamps.append(_to_int(row[7]))
+            self.counts.append(_to_int(row[8]))
+        else:
+            self.last_timestamps.append(self.timestamps[-1])
+            self.counts.append(1)
+
+    def extend_run(self, i, last_timestamp, extra):
+        """Estende a linha i (mesmo conteúdo capturado de novo até last_timestamp)."""
+        self.last_timestamps[i] = max(self.last_timestamps[i], _to_int(last_timestamp))
+        self.counts[i] += extra
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def digest(self, i):
+        if i in self.odd_digests:
+            return self.odd_digests[i]
+        return base64.b32encode(bytes(self.digests[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE])).decode("ascii")
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return Capture(
+            self.urlkeys[i],
+            self.timestamps[i],
+            self.originals[i],
+            self.mimetypes[self.mime_idx[i]],
+            self.statuses[self.status_idx[i]],
+            self.digest(i),
+            self.lengths[i],
+            self.last_timestamps[i],
+            self.counts[i],
+        )
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def rows(self):
+        """Gera as capturas no formato original do CDX (para o relatório JSON)."""
+        for capture in self:
+            yield capture.to_row()
+
+    def max_timestamp(self):
+        return max(self.last_timestamps) if len(self) else None
+
+    def total_captures(self):
+        """Número de capturas originais (soma das contagens das linhas agrupadas)."""
+        return sum(self.counts)
+
+
+def _pad(n):
+    return (-n) % 8
+
+
+def _string_parts(values):
+    offsets = array("q", [0])
+    chunks = []
+    pos = 0
+    for value in values:
+        encoded = value.encode("utf-8")
+        chunks.append(encoded)
+        pos += len(encoded)
+        offsets.append(pos)
+    return offsets.tobytes(), b"".join(chunks)
+
+
+def report_stamp(path):
+    """[tamanho, mtime_ns] do relatório JSON (None se não existir)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def save_captures(tables, path, report=None):
+    """Grava {domínio: CaptureTable} no formato binário em colunas.
+
+    report = relatório JSON já gravado com as mesmas capturas; o carimbo dele
+    vai no cabeçalho para is_current().
+    """
+    header = {"report": report_stamp(report) if report else None, "domains": []}
+    body = []
+    pos = 0
+
+    def add(buf):
+        nonlocal pos
+        body.append(buf)
+        start = pos
+        pos += len(buf)
+        pad = _pad(len(buf))
+        body.append(b"\x00" * pad)
+        pos += pad
+        return [start, len(buf)]
+
+    for domain, table in tables.items():
+        urlkey_offsets, urlkey_blob = _string_parts(table.urlkeys)
+        original_offsets, original_blob = _string_parts(table.originals)
+        header["domains"].append({
+            "domain": domain,
+            "rows": len(table),
+            "mimetypes": table.mimetypes,
+            "statuses": table.statuses,
+            "odd_digests": {str(k): v for k, v in table.odd_digests.items()},
+            "columns": {
+                "timestamps": add(table.timestamps.tobytes()),
+                "lengths": add(table.lengths.tobytes()),
+                "last_timestamps": add(table.last_timestamps.tobytes()),
+                "counts": add(table.counts.tobytes()),
+                "mime_idx": add(table.mime_idx.tobytes()),
+                "status_idx": add(table.status_idx.tobytes()),
+                "digests": add(bytes(table.digests)),
+                "urlkey_offsets": add(urlkey_offsets),
+                "urlkey_blob": add(urlkey_blob),
+                "original_offsets": add(original_offsets),
+                "original_blob": add(original_blob),
+            },
+        })
+
+    head = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    head += b" " * _pad(len(MAGIC) + 4 + len(head))
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(head)))
+        f.write(head)
+        for buf in body:
+            f.write(buf)
+
+
+def read_header(path):
+    """Só o cabeçalho JSON do arquivo (sem mapear as colunas)."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} não é um arquivo de capturas válido")
+        (head_len,) = struct.unpack("<I", f.read(4))
+        return json.loads(f.read(head_len))
+
+
+def is_current(path, report):
+    """True se o .capt foi gravado para o relatório JSON como ele está agora.
+
+    Sem o JSON o .capt é a única cópia das capturas e vale por si.
+    """
+    try:
+        header = read_header(path)
+    except (OSError, ValueError, struct.error):
+        return False
+    stamp = report_stamp(report)
+    return stamp is None or header.get("report") == stamp
+
+
+def load_captures(path, use_mmap=True):
+    """Lê o arquivo binário e devolve {domínio: CaptureTable}.
+
+    Com use_mmap=True as colunas são memoryviews sobre o arquivo mapeado
+    (nada é copiado até a linha ser acessada).
+    """
+    with open(path, "rb") as f:
+        if use_mmap:
+            buf = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        else:
+            buf = memoryview(f.read())
+    if bytes(buf[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} não é um arquivo de capturas válido")
+    (head_len,) = struct.unpack("<I", buf[len(MAGIC):len(MAGIC) + 4])
+    data_start = len(MAGIC) + 4 + head_len
+    header = json.loads(bytes(buf[len(MAGIC) + 4:data_start]))
+
+    def column(spec, fmt=None):
+        start, size = spec
+        view = buf[data_start + start:data_start + start + size]
+        return view.cast(fmt) if fmt else view
+
+    tables = {}
+    for info in header["domains"]:
+        cols = info["columns"]
+        table = CaptureTable()
+        table.timestamps = column(cols["timestamps"], "q")
+        table.lengths = column(cols["lengths"], "q")
+        table.last_timestamps = column(cols["last_timestamps"], "q")
+        table.counts = column(cols["counts"], "q")
+        table.mime_idx = column(cols["mime_idx"], "H")
+        table.status_idx = column(cols["status_idx"], "H")
+        table.digests = column(cols["digests"])
+        table.urlkeys = _StringColumn(column(cols["urlkey_offsets"], "q"), column(cols["urlkey_blob"]))
+        table.originals = _StringColumn(column(cols["original_offsets"], "q"), column(cols["original_blob"]))
+        table.mimetypes = info["mimetypes"]
+        table.statuses = info["statuses"]
+        table.odd_digests = {int(k): v for k, v in info["odd_digests"].items()}
+        tables[info["domain"]] = table
+    return tables
@@ -0,0 +1,114 @@
+# cdx.py
+# Cliente em streaming para o CDX Server do Internet Archive (Wayback Machine).
+#
+# Em vez de baixar toda a lista de capturas e chamar r.json(), as capturas
+# são lidas página por página (limit + showResumeKey/resumeKey) no formato
+# texto do CDX e cada linha vira uma lista assim que chega. A memória usada
+# fica limitada ao tamanho de uma página, não ao total de capturas do domínio.
+#
+# Uso:
+#   for row in cdx.iter_captures("exemplo.com.br/*", collapse="digest"):
+#       print(row)   # [urlkey, timestamp, original, mimetype, statuscode, digest, length]
+#
+# collapse="digest" descarta no servidor as capturas repetidas seguidas;
+# collapse_runs() faz o mesmo no cliente guardando primeiro/último timestamp
+# e a quantidade de capturas de cada versão do conteúdo.
+
+from urllib.parse import urlencode, unquote_plus
+
+import metrics
+
+CDX_URL = "http://web.archive.org/cdx/search/cdx"
+FIELDS = ("urlkey", "timestamp", "original", "mimetype", "statuscode", "digest", "length")
+PAGE_SIZE = 5000
+
+
+class CDXError(Exception):
+    pass
+
+
+def _default_get(url):
+    import http_client
+    return http_client.get(url, timeout=60, stream=True)
+
+
+def build_url(url, fl=None, collapse=None, from_ts=None, to_ts=None, filters=(),
+              limit=PAGE_SIZE, resume_key=None):
+    """Monta a URL de consulta ao CDX com os filtros aplicados no servidor."""
+    params = [("url", url), ("limit", limit), ("showResumeKey", "true")]
+    if fl:
+        params.append(("fl", ",".join(fl) if not isinstance(fl, str) else fl))
+    if collapse:
+        params.append(("collapse", collapse))
+    if from_ts:
+        params.append(("from", from_ts))
+    if to_ts:
+        params.append(("to", to_ts))
+    for f in filters:
+        params.append(("filter", f))
+    if resume_key:
+        params.append(("resumeKey", resume_key))
+    return f"{CDX_URL}?{urlencode(params)}"
+
+
+def iter_captures(url, fl=None, collapse=None, from_ts=None, to_ts=None, filters=(),
+                  page_size=PAGE_SIZE, max_pages=None, get=None):
+    """Gera as capturas (listas de campos) uma a uma, paginando com resumeKey.
+
+    get(url) deve devolver um Response (requests, stream=True) ou None em caso
+    de falha; a falha levanta CDXError para que nada parcial seja tratado
+    como resultado completo.
+    """
+    get = get or _default_get
+    resume_key = None
+    pages = 0
+    while True:
+        r = get(build_url(url, fl, collapse, from_ts, to_ts, filters, page_size, resume_key))
+        if r is None or r.status_code != 200:
+            if r is not None:
+                # corpo não lido: sem close() a conexão não volta para o pool do host
+                r.close()
+            raise CDXError(f"CDX indisponível para {url}")
+        pages += 1
+        resume_key = None
+        after_blank = False
+        chunked = "Content-Length" not in r.headers
+        received = 0
+        try:
+            for line in r.iter_lines(decode_unicode=True):
+                received += len(line) + 1
+                if not line:
+                    # linha vazia separa as capturas da resumeKey
+                    after_blank = True
+                    continue
+                if after_blank:
+                    resume_key = unquote_plus(line.strip())
+                    continue
+                yield line.split(" ")
+        finally:
+            r.close()
+            if chunked:
+                metrics.add_bytes("wayback", received)
+        if not resume_key or (max_pages and pages >= max_pages):
+            return
+
+
+def collapse_runs(rows):
+    """Agrupa capturas seguidas da mesma urlkey com o mesmo digest (mesmo conteúdo).
+
+    Cada grupo com mais de uma captura vira uma linha com 9 campos: os 7 do
+    CDX (com o primeiro timestamp) + [último timestamp, quantidade]. Capturas
+    únicas continuam com 7 campos. Como o CDX ordena por urlkey e depois por
+    timestamp, basta comparar com a linha anterior.
+    """
+    current = None
+    for row in rows:
+        if current is not None and row[0] == current[0] and row[5] == current[5]:
+            current[7] = row[1]
+            current[8] += 1
+            continue
+        if current is not None:
+            yield current if current[8] > 1 else current[:7]
+        current = list(row[:7]) + [row[1], 1]
+    if current is not None:
+        yield current if current[8] > 1 else current[:7]
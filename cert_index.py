@@ -0,0 +1,59 @@
+# cert_index.py
+# Índice dos nomes de certificados do crt.sh (campo name_value).
+#
+# Em vez de procurar "dominio in name_value" em todos os certificados de todos
+# os termos, o índice é montado uma vez: cada name_value é quebrado em linhas,
+# normalizado (minúsculas, sem "*.", sem ponto final) e registrado sob cada
+# sufixo a partir do domínio registrado. Assim:
+#   indice.matches("damabolsas.com.br")
+# devolve em O(1) os certificados de damabolsas.com.br e de qualquer
+# subdomínio (www.damabolsas.com.br, *.damabolsas.com.br), sem falsos
+# positivos como "dama" dentro de outros nomes.
+
+# normalização e domínio registrado compartilhados com a análise das consultas
+from query_analysis import normalize_name, registered_domain
+
+
+class CertIndex:
+    """Mapa sufixo -> certificados, construído uma vez a partir do crt.sh."""
+
+    def __init__(self):
+        self._by_suffix = {}
+        self._names = {}
+
+    @classmethod
+    def from_report(cls, crtsh):
+        """crtsh = {termo: [certificados]} como em ferrana_report.json."""
+        index = cls()
+        for certs in crtsh.values():
+            for cert in certs:
+                index.add(cert)
+        return index
+
+    def add(self, cert):
+        seen = set()
+        for line in (cert.get("name_value") or "").split("\n"):
+            name = normalize_name(line)
+            if not name or name in seen:
+                continue
+            seen.add(name)
+            self._names.setdefault(name, []).append(cert)
+            labels = name.split(".")
+            reg_labels = registered_domain(name).count(".") + 1
+            # registra o nome sob ele mesmo e sob cada domínio pai até o registrado
+            for i in range(len(labels) - reg_labels + 1):
+                self._by_suffix.setdefault(".".join(labels[i:]), {})[id(cert)] = cert
+
+    def matches(self, domain):
+        """Certificados do domínio ou de qualquer subdomínio dele."""
+        return list(self._by_suffix.get(normalize_name(domain), {}).values())
+
+    def has(self, domain):
+        return normalize_name(domain) in self._by_suffix
+
+    def exact(self, name):
+        """Certificados cujo name_value contém exatamente este nome."""
+        return list(self._names.get(normalize_name(name), []))
+
+    def __len__(self):
+        return len(self._names)
@@ -0,0 +1,173 @@
+# crtsh.py
+# Cliente em streaming para as buscas por curinga do crt.sh (%termo%).
+#
+# A resposta JSON é lida aos poucos (json_stream.iter_array) e cada
+# certificado é entregue assim que chega, já sem repetidos: o mesmo id ou o
+# mesmo par (emissor, número de série), que é o caso do pré-certificado e do
+# certificado final publicados nos logs de CT.
+#
+# Termos amplos ("dama") às vezes não cabem numa resposta: o crt.sh devolve
+# erro, estoura o tempo ou corta o JSON no meio. Nesse caso a busca é dividida
+# pelo caractere que vem depois do termo:
+#     %dama%  ->  %dama  +  %damaa%  %damab%  ...  %dama-%  %dama.%  %dama %  ...
+# Isso cobre os nomes DNS, mas o crt.sh também casa as identidades de
+# organização e CN ("Dama Technology, Inc."), que podem ter qualquer
+# caractere depois do termo. Os mais comuns entram na divisão; o resto não
+# tem como ser consultado com LIKE e fica em missing como "%dama[outros]%",
+# então um resultado dividido é sempre parcial (não vai para o cache nem
+# para o checkpoint do batch_scan). Uma subconsulta que também falhar é
+# dividida de novo (até max_depth). O crt.sh não tem filtro por data na
+# saída JSON; exclude_expired=True (exclude=expired) é a outra forma de
+# reduzir a resposta, ao custo de perder os certificados vencidos.
+#
+# Uso:
+#   busca = crtsh.CrtShQuery("dama")
+#   for cert in busca:
+#       ...
+#   busca.missing   # subconsultas que não puderam ser lidas nem divididas e,
+#                   # a cada divisão, o resto que ela não cobre
+
+import codecs
+from urllib.parse import quote
+
+import metrics
+from json_stream import iter_array
+
+CRTSH_URL = "https://crt.sh/"
+CHUNK_SIZE = 1 << 16
+# caracteres possíveis depois do termo num nome DNS, mais os mais comuns nas
+# identidades de organização/CN ("_" fica de fora: no LIKE do crt.sh ele é
+# curinga de um caractere e repetiria a consulta inteira)
+SPLIT_CHARS = "abcdefghijklmnopqrstuvwxyz0123456789-." + " ,@&'"
+# padrão registrado em missing para o que nenhuma subconsulta cobre
+REMAINDER = "%{}[outros]%"
+MAX_DEPTH = 2
+MAX_QUERIES = 200
+
+
+class CrtShError(Exception):
+    pass
+
+
+def _default_get(url):
+    import http_client
+    return http_client.get(url, timeout=60, stream=True)
+
+
+def build_url(pattern, exclude_expired=False):
+    """URL da busca JSON para um padrão com curingas (% = qualquer sequência)."""
+    url = f"{CRTSH_URL}?q={quote(pattern, safe='')}&output=json"
+    if exclude_expired:
+        url += "&exclude=expired"
+    return url
+
+
+class _ResponseText:
+    """Objeto tipo arquivo (read) sobre o corpo da resposta, decodificado aos poucos."""
+
+    def __init__(self, response, chunk_size=CHUNK_SIZE):
+        self._chunks = response.iter_content(chunk_size=chunk_size)
+        self._decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self.received = 0
+
+    def read(self, size=-1):
+        for chunk in self._chunks:
+            self.received += len(chunk)
+            text = self._decoder.decode(chunk)
+            if text:
+                return text
+        return self._decoder.decode(b"", final=True)
+
+
+def _cert_key(cert):
+    """Chave de repetição: (emissor, nº de série) quando existe, senão o id.
+
+    O mesmo id tem sempre o mesmo número de série, então uma chave por
+    certificado basta para os dois casos.
+    """
+    serial = cert.get("serial_number")
+    if serial:
+        return f"{cert.get('issuer_ca_id')}:{serial.lower()}"
+    return cert.get("id")
+
+
+class CrtShQuery:
+    """Certificados de um termo (%termo%), sem repetidos, dividindo a busca se preciso."""
+
+    def __init__(self, term, exclude_expired=False, max_depth=MAX_DEPTH, max_queries=MAX_QUERIES, get=None):
+        self.term = term.strip().lower().strip("%")
+        self.exclude_expired = exclude_expired
+        self.max_depth = max_depth
+        self.max_queries = max_queries
+        self.get = get or _default_get
+        self.queries = 0
+        self.missing = []
+        self._seen = set()
+
+    def _is_new(self, cert):
+        key = _cert_key(cert)
+        if key is None:
+            return True
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        return True
+
+    def _fetch(self, pattern):
+        """Gera os certificados de uma consulta; CrtShError se ela não puder ser lida inteira."""
+        self.queries += 1
+        try:
+            r = self.get(build_url(pattern, self.exclude_expired))
+        except OSError as e:  # requests.RequestException é subclasse de IOError
+            raise CrtShError(f"crt.sh indisponível para {pattern}: {e}") from e
+        if r is None or r.status_code != 200:
+            if r is not None:
+                r.close()  # corpo não lido: devolve a conexão ao pool do host
+            raise CrtShError(f"crt.sh indisponível para {pattern}")
+        text = _ResponseText(r)
+        try:
+            for cert in iter_array(text):
+                if isinstance(cert, dict):
+                    yield cert
+        except (ValueError, OSError) as e:
+            # resposta grande demais: HTML de erro, JSON cortado ou conexão encerrada no meio
+            raise CrtShError(f"resposta inválida do crt.sh para {pattern}: {e}") from e
+        finally:
+            r.close()
+            if "Content-Length" not in r.headers:
+                metrics.add_bytes("crtsh", text.received)
+
+    def _run(self, stem, depth):
+        """stem é o termo já estendido; busca %stem% e divide em caso de falha."""
+        try:
+            for cert in self._fetch(f"%{stem}%"):
+                if self._is_new(cert):
+                    yield cert
+            return
+        except CrtShError:
+            if depth >= self.max_depth or self.queries + len(SPLIT_CHARS) + 1 > self.max_queries:
+                self.missing.append(f"%{stem}%")
+                return
+        # o que já chegou da consulta cortada fica em _seen; as subconsultas
+        # completam, menos os caracteres fora de SPLIT_CHARS
+        self.missing.append(REMAINDER.format(stem))
+        try:
+            for cert in self._fetch(f"%{stem}"):
+                if self._is_new(cert):
+                    yield cert
+        except CrtShError:
+            self.missing.append(f"%{stem}")
+        for c in SPLIT_CHARS:
+            yield from self._run(stem + c, depth + 1)
+
+    def __iter__(self):
+        if not self.term:
+            return iter(())
+        return self._run(self.term, 0)
+
+
+def search(term, **kwargs):
+    """Lista de certificados e lista das subconsultas que faltaram ([] = busca completa)."""
+    query = CrtShQuery(term, **kwargs)
+    certs = list(query)
+    return certs, query.missing
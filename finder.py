@@ -1,7 +1,11 @@
-from flask import Flask, render_template_string, request, jsonify
-import whois
+from flask import Blueprint, Flask, Response, render_template_string, request, jsonify
 
-app = Flask(__name__)
+import metrics
+import query_analysis
+
+# rotas num blueprint, app montado por create_app(); o motor de WHOIS só é
+# importado na primeira busca (partida a frio mais curta)
+bp = Blueprint("finder", __name__)
 
 # HTML com frontend interativo
 HTML_PAGE = """
@@ -74,11 +78,11 @@ async function search() {
 </html>
 """
 
-@app.route('/')
+@bp.route('/')
 def index():
     return render_template_string(HTML_PAGE)
 
-@app.route('/search', methods=['POST'])
+@bp.route('/search', methods=['POST'])
 def search():
     try:
         data = request.get_json()
@@ -87,17 +91,35 @@ def search():
         if not query:
             return jsonify({"error": "Consulta vazia."})
 
-        # 🔧 WHOIS seguro sem cache
+        # WHOIS só responde a domínios: nomes, termos e e-mails de webmail não vão ao servidor
+        domain = query_analysis.analyze(query).value_for("whois")
+        if not domain:
+            return jsonify({"error": "WHOIS só responde a domínios (ou e-mails de domínio próprio)."})
+
+        # 🔧 WHOIS direto na porta 43, com cache persistente (fonte "whois" de sources.py)
+        import sources
         try:
-            result = whois.whois(query)
-            if not result:
+            rec = sources.get("whois").results(domain)[0]
+            if not rec.data["found"]:
                 return jsonify({"error": "Nenhum resultado encontrado."})
-            return jsonify({"result": str(result)})
-        except Exception as e:
-            return jsonify({"error": f"Erro na consulta WHOIS: {e}"})
+            return jsonify({"result": rec.title + "\n\n" + rec.data["raw"]})
+        except sources.SourceError as e:
+            return jsonify({"error": f"Erro na consulta WHOIS: {e.__cause__ or e}"})
 
     except Exception as e:
         return jsonify({"error": str(e)})
 
+# Métricas no formato do Prometheus (latência, status, timeouts, cache)
+@bp.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), content_type=metrics.PROMETHEUS_CONTENT_TYPE)
+
+def create_app():
+    app = Flask(__name__)
+    app.register_blueprint(bp)
+    return app
+
+app = create_app()
+
 if __name__ == "__main__":
     app.run(debug=True)
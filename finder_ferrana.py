@@ -1,9 +1,9 @@
 # salvar como finder_ferrana.py
-import requests
-import time
+# Versão curta do app.py: mesmas fontes (sources.py), com cache, limites de
+# taxa por host, WHOIS direto na porta 43 e sem reaproveitar o relatório anterior.
 import json
-import subprocess
-from urllib.parse import quote
+
+import sources
 
 DOMAINS = [
   "ferrana.com.br","ferranaacessorios.com.br","ferranaacessorios.com","ferrana-acessorios.com.br",
@@ -11,47 +11,44 @@ DOMAINS = [
 ]
 
 def wayback_checks(domain):
-    url = f"http://web.archive.org/cdx/search/cdx?url={domain}/*&output=json"
-    r = requests.get(url, timeout=20)
+    # todas as capturas do domínio, em streaming (fonte "cdx", sem cache)
     try:
-        data = r.json()
-    except Exception:
+        return [r.data for r in sources.get("cdx").search(domain)]
+    except sources.SourceError as e:
+        print("Wayback failed:", e)
         return []
-    # first row is header
-    return data[1:] if len(data)>1 else []
 
 def crt_sh_search(term):
-    url = f"https://crt.sh/?q=%25{quote(term)}%25&output=json"
-    r = requests.get(url, timeout=20)
     try:
-        return r.json()
-    except:
+        records = sources.get("crtsh").results(term)
+    except sources.SourceError as e:
+        print("crt.sh failed:", e)
         return []
+    if records.missing:
+        print(f"crt.sh partial for {term}: {len(records.missing)} sub-queries missing")
+    return [r.data for r in records]
 
 def whois_lookup(dom):
-    # try calling system whois (depends on OS)
+    # porta 43 do registro (whois_engine), sem o binário whois do sistema
     try:
-        out = subprocess.check_output(["whois", dom], stderr=subprocess.DEVNULL, timeout=20)
-        return out.decode(errors="ignore")
-    except Exception as e:
-        return f"whois failed: {e}"
+        return sources.get("whois").results(dom)[0].data["raw"]
+    except sources.SourceError as e:
+        return f"whois failed: {e.__cause__ or e}"
 
 if __name__ == "__main__":
+    # o ritmo de cada host fica com o limitador (ratelimit.py), sem sleep fixo
     report = {"wayback":{}, "crtsh":{}, "whois":{}}
     for d in DOMAINS:
         print("Checking Wayback:", d)
         report["wayback"][d] = wayback_checks(d)
-        time.sleep(1)
 
     for term in ["ferrana","dama","damabolsas","damaacessorios"]:
         print("Checking crt.sh:", term)
         report["crtsh"][term] = crt_sh_search(term)
-        time.sleep(1)
 
     for d in DOMAINS:
         print("Whois for:", d)
         report["whois"][d] = whois_lookup(d)
-        time.sleep(1)
 
     with open("ferrana_report.json","w",encoding="utf-8") as f:
         json.dump(report,f,ensure_ascii=False,indent=2)
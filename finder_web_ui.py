@@ -3,19 +3,27 @@
 # Usage:
 # 1) python -m venv venv
 # 2) venv\Scripts\Activate.ps1  (PowerShell) or venv\Scripts\activate.bat (cmd)
-# 3) pip install flask requests python-whois beautifulsoup4
+# 3) pip install flask requests  (lxml optional: faster oocities link parsing)
 # 4) python finder_web_ui.py
 # Then open http://127.0.0.1:5000
 
-from flask import Flask, request, jsonify, render_template_string, send_file
-import requests
-import whois
-from bs4 import BeautifulSoup
+from flask import Blueprint, Flask, Response, current_app, request, jsonify, render_template_string, send_file, stream_with_context
 import json
-import re
-from urllib.parse import quote
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import threading
+import time
 
-app = Flask(__name__)
+import metrics
+import query_analysis
+import sources as source_plugins
+from jobs import JobLimitError, JobManager
+from report_store import ReportStore
+
+# Routes live on a blueprint and create_app() builds the Flask app. The search
+# sources are backends declared in sources.py (query kinds, concurrency, cost);
+# their plugin modules are only imported when a search first uses them, keeping
+# cold starts short.
+bp = Blueprint('finder', __name__)
 
 # Simple HTML UI (single-file) served by Flask
 INDEX_HTML = '''
@@ -49,15 +57,15 @@ INDEX_HTML = '''
     <div class="row">
       <div class="col">
         <select id="sources" multiple>
-          <option value="wayback">Wayback (Archive.org)</option>
-          <option value="crtsh">crt.sh (certificados)</option>
-          <option value="oocities">Oocities / Geocities mirrors</option>
-          <option value="whois">WHOIS (domínios)</option>
+          {% for b in backends %}<option value="{{ b.name }}">{{ b.description }}</option>
+          {% endfor %}
         </select>
       </div>
       <div class="col">
         <button id="run">Executar busca</button>
+        <button id="cancel">Cancelar</button>
         <button id="download">Baixar JSON</button>
+        <a href="/captures">Navegar no relatório salvo</a>
       </div>
     </div>
 
@@ -81,31 +89,51 @@ function addRow(q,source,summary,links){
   tb.appendChild(tr);
 }
 
+let currentJob = null; let currentStream = null;
+
+function showStats(queries,rows,found,status){
+  document.getElementById('stats').style.display='block';
+  document.getElementById('stats').innerHTML = `<strong>Consultas:</strong> ${queries} &nbsp; <strong>Linhas de resultado:</strong> ${rows} &nbsp; <strong>Hits:</strong> ${found} &nbsp; ${status}`;
+}
+
 document.getElementById('run').onclick = async ()=>{
   document.getElementById('results_body').innerHTML = '';
   document.getElementById('results_table').style.display='none';
   document.getElementById('stats').style.display='none';
+  if(currentStream){ currentStream.close(); currentStream = null; }
   const raw = document.getElementById('queries').value.split(',').map(s=>s.trim()).filter(Boolean);
   const sources = Array.from(document.getElementById('sources').selectedOptions).map(o=>o.value);
   if(sources.length==0) alert('Selecione ao menos uma fonte.');
   const payload = {queries: raw, sources: sources};
-  const res = await postJSON('/api/search',payload);
-  // populate
-  let found=0; let total=0; let rows=0;
-  for(const p of res.hits){
-    total++;
-    const q = p.query;
-    for(const s of p.sources){
-      rows++;
-      const summary = s.summary.replace(/\n/g,'<br>');
-      const links = (s.links||[]).map(l=>`<a href="${l}" target="_blank">${l}</a>`).join('<br>');
-      addRow(q,s.source,summary,links);
-      if(s.found) found++;
-    }
-  }
-  document.getElementById('stats').style.display='block';
-  document.getElementById('stats').innerHTML = `<strong>Consultas:</strong> ${raw.length} &nbsp; <strong>Linhas de resultado:</strong> ${rows} &nbsp; <strong>Hits:</strong> ${found}`;
+  const res = await postJSON('/api/jobs',payload);
+  if(!res.ok){ alert(res.error); return; }
+  currentJob = res.job_id;
+  // rows are added as each (query, source) finishes
+  let found=0; let rows=0;
+  showStats(raw.length,rows,found,'⏳ buscando...');
   document.getElementById('results_table').style.display='table';
+  const es = new EventSource(`/api/jobs/${currentJob}/events`);
+  currentStream = es;
+  es.addEventListener('result', ev=>{
+    const p = JSON.parse(ev.data);
+    const s = p.source;
+    rows++;
+    const summary = s.summary.replace(/\n/g,'<br>');
+    const links = (s.links||[]).map(l=>`<a href="${l}" target="_blank">${l}</a>`).join('<br>');
+    addRow(p.query,s.source,summary,links);
+    if(s.found) found++;
+    showStats(raw.length,rows,found,'⏳ buscando...');
+  });
+  es.addEventListener('error', ev=>{ if(ev.data) alert(JSON.parse(ev.data).error); });
+  es.addEventListener('done', ev=>{
+    const st = JSON.parse(ev.data).status;
+    showStats(raw.length,rows,found,st=='cancelled' ? '⛔ cancelada' : '✅ concluída');
+    es.close(); currentStream = null; currentJob = null;
+  });
+};
+
+document.getElementById('cancel').onclick = async ()=>{
+  if(currentJob) await fetch(`/api/jobs/${currentJob}`,{method:'DELETE'});
 };
 
 document.getElementById('download').onclick = ()=>{ window.location='/api/download' };
@@ -114,148 +142,338 @@ document.getElementById('download').onclick = ()=>{ window.location='/api/downlo
 </html>
 '''
 
-# Helper functions
+# Paged browser over the stored report (served by /api/captures)
+CAPTURES_HTML = '''
+<!doctype html>
+<html lang="pt-BR">
+<head>
+  <meta charset="utf-8">
+  <title>Finder - Capturas salvas</title>
+  <meta name="viewport" content="width=device-width,initial-scale=1">
+  <style>
+    body{font-family:Arial,Helvetica,sans-serif;background:#0b0c10;color:#eaeaea;padding:20px}
+    input,select,button{padding:8px;margin:6px 4px 6px 0}
+    table{width:100%;border-collapse:collapse;margin-top:12px}
+    th,td{border:1px solid #333;padding:6px;word-break:break-all}
+    th{background:#14171a}
+    a{color:#7bd389}
+  </style>
+</head>
+<body>
+  <h1>Capturas e certificados salvos</h1>
+  <div>
+    <select id="source"><option value="">todas as fontes</option><option value="wayback">wayback</option><option value="crtsh">crt.sh</option></select>
+    <select id="domain"><option value="">todos os domínios</option></select>
+    <select id="status"><option value="">status</option></select>
+    <select id="mimetype"><option value="">mimetype</option></select>
+    <input id="from" placeholder="de (AAAAMMDD)" size="12">
+    <input id="to" placeholder="até (AAAAMMDD)" size="12">
+    <select id="order"><option value="asc">mais antigas</option><option value="desc">mais recentes</option></select>
+    <button id="apply">Filtrar</button>
+  </div>
+  <table>
+    <thead><tr><th>Data</th><th>Fonte</th><th>Domínio</th><th>URL</th><th>Status</th><th>Tipo</th></tr></thead>
+    <tbody id="rows"></tbody>
+  </table>
+  <button id="prev">&laquo; Anterior</button>
+  <button id="next">Próxima &raquo;</button>
 
-def search_wayback_for_term(term, max_results=50):
-    """Try to find Archive.org captures for likely URL patterns containing the term.
-    We will query CDX for common hostnames and for wildcard attempts.
+<script>
+const fields = ['source','domain','status','mimetype','from','to','order'];
+let cursors = [null]; let nextCursor = null;
+
+function fillSelect(id, values){
+  const sel = document.getElementById(id);
+  for(const v of values){ const o = document.createElement('option'); o.value = v; o.textContent = v; sel.appendChild(o); }
+}
+
+async function load(){
+  const params = new URLSearchParams({limit: 50});
+  for(const f of fields){ const v = document.getElementById(f).value.trim(); if(v) params.set(f, v); }
+  const cur = cursors[cursors.length-1];
+  if(cur) params.set('cursor', cur);
+  const res = await (await fetch('/api/captures?'+params)).json();
+  const tb = document.getElementById('rows');
+  tb.innerHTML = '';
+  for(const r of (res.items||[])){
+    const tr = document.createElement('tr');
+    const link = r.capture_url || r.url;
+    tr.innerHTML = `<td>${r.timestamp}</td><td>${r.source}</td><td>${r.domain}</td><td><a href="${link}" target="_blank">${r.name || r.url}</a></td><td>${r.status||''}</td><td>${r.mimetype||''}</td>`;
+    tb.appendChild(tr);
+  }
+  nextCursor = res.next_cursor;
+  document.getElementById('next').disabled = !nextCursor;
+  document.getElementById('prev').disabled = cursors.length < 2;
+}
+
+document.getElementById('apply').onclick = ()=>{ cursors = [null]; load(); };
+document.getElementById('next').onclick = ()=>{ if(nextCursor){ cursors.push(nextCursor); load(); } };
+document.getElementById('prev').onclick = ()=>{ if(cursors.length>1){ cursors.pop(); load(); } };
+
+fetch('/api/captures/facets').then(r=>r.json()).then(f=>{
+  fillSelect('domain', f.domains||[]); fillSelect('status', f.statuses||[]); fillSelect('mimetype', f.mimetypes||[]);
+});
+load();
+</script>
+</body>
+</html>
+'''
+
+# Fan-out settings: every (query, source) job is submitted at once, each source
+# runs on its own executor sized by backend.concurrency and the whole request
+# has a hard deadline.
+SEARCH_DEADLINE = 45  # seconds
+# per-source options for UI searches: the deadline above is shorter than a
+# full crt.sh split of a broad term
+SOURCE_OPTIONS = {'crtsh': {'max_depth': 1, 'max_queries': 40}}
+# streaming backends (full-domain CDX, Common Crawl, crt.sh) stop after this
+# many records in a web request; whole-domain scans belong to app.py/batch_scan.py
+WEB_MAX_RESULTS = 1000
+
+
+class SourcePools:
+    """One small executor per source, sized by its backend's concurrency.
+
+    A backed-up source (crt.sh at 2) queues its own tasks instead of holding
+    threads the other sources need, and queued tasks can still be cancelled
+    when the deadline passes.
     """
-    results = []
-    # common host patterns used in 90s
-    hosts = [
-        f"www.uol.com.br/~{term}",
-        f"www.geocities.com/{term}",
-        f"br.geocities.com/{term}",
-        f"oocities.org/*{term}*",
-        f"usuarios.terra.com.br/{term}",
-        f"members.aol.com/{term}",
-        f"www.tripod.com/{term}",
-        f"www.ibiblio.org/{term}",
-    ]
-    seen = set()
-    for h in hosts:
-        # transform to a search URL
-        query = quote(h, safe='')
-        url = f"http://web.archive.org/cdx/search/cdx?url={h}/*&output=json&limit={max_results}"
-        try:
-            r = requests.get(url, timeout=20)
-            if r.status_code==200:
-                data = r.json()
-                if len(data)>1:
-                    for row in data[1:]:
-                        key = (row[1], row[2]) if len(row)>2 else tuple(row)
-                        if key not in seen:
-                            seen.add(key)
-                            results.append({'raw': row, 'capture_url': f"https://web.archive.org/web/{row[1]}/{row[2]}" if len(row)>2 else None})
-        except Exception as e:
-            # ignore transient errors
-            continue
-    return results
-
-
-def search_crtsh(term):
-    url = f"https://crt.sh/?q=%25{quote(term)}%25&output=json"
-    try:
-        r = requests.get(url, timeout=20)
-        if r.status_code==200 and r.text.strip():
-            try:
-                return r.json()
-            except:
-                # sometimes crt.sh returns non-json when too large
-                return []
-    except Exception:
-        return []
-    return []
 
+    def __init__(self):
+        self._pools = {}
+        self._lock = threading.Lock()
 
-def whois_lookup(domain):
-    try:
-        w = whois.whois(domain)
-        return w
-    except Exception as e:
-        return None
+    def submit(self, source, fn, *args):
+        with self._lock:
+            pool = self._pools.get(source)
+            if pool is None:
+                pool = self._pools[source] = ThreadPoolExecutor(
+                    max_workers=source_plugins.get(source).concurrency, thread_name_prefix=f'source-{source}')
+        return pool.submit(fn, *args)
 
+    def shutdown(self, wait=False):
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.shutdown(wait=wait, cancel_futures=True)
 
-def search_oocities(term):
-    """Simple scraper of oocities search pages (best-effort)."""
-    hits = []
-    try:
-        q = quote(term)
-        url = f"https://oocities.org/search?q={q}"
-        r = requests.get(url, timeout=15)
-        if r.status_code==200:
-            soup = BeautifulSoup(r.text, 'html.parser')
-            for a in soup.select('a'):
-                href = a.get('href','')
-                text = a.get_text(strip=True)
-                if term.lower() in text.lower() or term.lower() in href.lower():
-                    full = href if href.startswith('http') else 'https://oocities.org'+href
-                    hits.append({'title':text,'url':full})
-    except Exception:
-        pass
-    return hits
 
-@app.route('/')
+def _run_source(source, value):
+    options = dict(SOURCE_OPTIONS.get(source, {}))
+    if source_plugins.get(source).streaming:
+        options.setdefault('limit', WEB_MAX_RESULTS)
+    return source_plugins.entry(source, value, **options)
+
+
+def _failed_entry(source, summary):
+    return {'source': source_plugins.get(source).label, 'found': False, 'count': 0, 'summary': summary, 'links': []}
+
+
+def _job_result(source, fut):
+    """Turn a finished/unfinished source future into its result entry (or None)."""
+    if not fut.done():
+        fut.cancel()
+        return _failed_entry(source, 'tempo esgotado')
+    if fut.cancelled() or fut.exception() is not None:
+        return _failed_entry(source, f'{source} falhou')
+    return fut.result()
+
+
+def _state(name):
+    # per-app objects created by create_app(): 'pools', 'jobs', 'reports'
+    return current_app.extensions['finder'][name]
+
+
+def _submit_sources(pools, queries, sources):
+    # only the backends that can answer each query kind are called (no WHOIS
+    # for a person's name, no crt.sh/WHOIS for a gmail.com address), cheapest
+    # first; queries that map to the same value share one search per source
+    jobs = []
+    shared = {}
+    for idx, q in enumerate(queries):
+        analysis = query_analysis.analyze(q)
+        for backend in source_plugins.select(analysis, sources):
+            key = (backend.name, backend.value_for(analysis))
+            if key not in shared:
+                shared[key] = pools.submit(backend.name, _run_source, *key)
+            jobs.append((idx, backend.name, shared[key]))
+    return jobs
+
+
+@bp.route('/')
 def index():
-    return render_template_string(INDEX_HTML)
+    backends = [source_plugins.get(name) for name in source_plugins.names()]
+    return render_template_string(INDEX_HTML, backends=backends)
 
-@app.route('/api/search', methods=['POST'])
+
+@bp.route('/api/sources')
+def api_sources():
+    # declared backends: query kinds, hosts and rate limits, concurrency, cost, streaming
+    return jsonify([source_plugins.get(name).describe() for name in source_plugins.names()])
+
+@bp.route('/api/search', methods=['POST'])
 def api_search():
     payload = request.json or {}
     queries = payload.get('queries', [])
-    sources = payload.get('sources', ['wayback','crtsh','oocities','whois'])
-    hits = []
-    for q in queries:
-        q_lower = q.lower()
-        entry = {'query': q, 'sources': []}
-        # Wayback
-        if 'wayback' in sources:
-            wb = search_wayback_for_term(re.sub(r'[^a-z0-9\-]','',q_lower))
-            entry['sources'].append({'source':'wayback','found': len(wb)>0, 'count': len(wb), 'summary': f'Capturas encontradas: {len(wb)}', 'links': [r.get('capture_url') for r in wb if r.get('capture_url')]})
-        # crt.sh
-        if 'crtsh' in sources:
-            crt = search_crtsh(q_lower)
-            # reduce to unique names
-            domains = set()
-            for c in crt:
-                nv = c.get('name_value')
-                if nv:
-                    for d in nv.split('\n'):
-                        domains.add(d.strip())
-            entry['sources'].append({'source':'crt.sh','found': len(domains)>0, 'count': len(domains), 'summary': f'Domínios certificados encontrados: {len(domains)}', 'links': [f'https://crt.sh/?q={quote(d)}' for d in list(domains)[:20]]})
-        # oocities
-        if 'oocities' in sources:
-            oc = search_oocities(q_lower)
-            entry['sources'].append({'source':'oocities','found': len(oc)>0, 'count': len(oc), 'summary': f'Páginas mirror encontradas: {len(oc)}', 'links': [h.get('url') for h in oc[:30]]})
-        # whois (only if the query looks like domain)
-        if 'whois' in sources:
-            # extract domain-like tokens
-            tokens = re.findall(r'[a-z0-9\-]+\.(com|com.br|net|org|br)', q_lower)
-            whois_res = None
-            # if raw query looks like email, try domain part
-            if '@' in q_lower:
-                dom = q_lower.split('@')[-1]
-                whois_res = whois_lookup(dom)
-                entry['sources'].append({'source':'whois','found': bool(whois_res), 'count': 1 if whois_res else 0, 'summary': str(whois_res)[:500] if whois_res else 'nenhum whois', 'links': []})
-            else:
-                # try direct
-                if re.search(r'\.', q_lower):
-                    # treat as domain
-                    try:
-                        whois_res = whois_lookup(q_lower)
-                        entry['sources'].append({'source':'whois','found': bool(whois_res), 'count':1 if whois_res else 0, 'summary': str(whois_res)[:500] if whois_res else 'nenhum whois', 'links': []})
-                    except:
-                        entry['sources'].append({'source':'whois','found':False,'count':0,'summary':'whois falhou','links':[]})
-        hits.append(entry)
+    sources = payload.get('sources', source_plugins.names(default_only=True))
+    hits = [{'query': q, 'kind': query_analysis.analyze(q).kind, 'sources': []} for q in queries]
+    jobs = _submit_sources(_state('pools'), queries, sources)
+
+    wait([f for _, _, f in jobs], timeout=SEARCH_DEADLINE)
+
+    for idx, source, fut in jobs:
+        res = _job_result(source, fut)
+        if res is not None:
+            hits[idx]['sources'].append(res)
     return jsonify({'ok':True,'hits':hits})
 
-@app.route('/api/download')
+
+# Background search jobs: POST returns a job id at once, results are streamed
+# to the page over Server-Sent Events as each (query, source) finishes.
+MAX_ACTIVE_JOBS = 4
+
+
+def _search_job(job, pools, queries, sources):
+    # a shared future answers every (query, source) row that submitted it
+    pending = {}
+    for idx, source, f in _submit_sources(pools, queries, sources):
+        pending.setdefault(f, []).append((idx, source))
+    deadline = time.monotonic() + SEARCH_DEADLINE
+    try:
+        while pending and not job.cancelled:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(list(pending), timeout=min(remaining, 0.5), return_when=FIRST_COMPLETED)
+            for fut in done:
+                for idx, source in pending.pop(fut):
+                    res = _job_result(source, fut)
+                    if res is not None:
+                        job.publish('result', {'index': idx, 'query': queries[idx], 'source': res})
+        if not job.cancelled:
+            for fut, rows in pending.items():
+                for idx, source in rows:
+                    job.publish('result', {'index': idx, 'query': queries[idx], 'source': _job_result(source, fut)})
+    finally:
+        for fut in pending:
+            fut.cancel()
+
+
+@bp.route('/api/jobs', methods=['POST'])
+def api_jobs_create():
+    payload = request.json or {}
+    queries = payload.get('queries', [])
+    sources = payload.get('sources', source_plugins.names(default_only=True))
+    pools = _state('pools')
+    try:
+        job = _state('jobs').submit(lambda job: _search_job(job, pools, queries, sources))
+    except JobLimitError as e:
+        return jsonify({'ok':False,'error':str(e)}),429
+    return jsonify({'ok':True,'job_id':job.id}),202
+
+
+@bp.route('/api/jobs/<job_id>')
+def api_jobs_status(job_id):
+    job = _state('jobs').get(job_id)
+    if job is None:
+        return jsonify({'error':'job não encontrado'}),404
+    return jsonify(job.snapshot())
+
+
+@bp.route('/api/jobs/<job_id>/events')
+def api_jobs_events(job_id):
+    job = _state('jobs').get(job_id)
+    if job is None:
+        return jsonify({'error':'job não encontrado'}),404
+    # resume after the last event the browser saw; a malformed id restarts the stream
+    try:
+        start = max(int(request.headers.get('Last-Event-ID', -1)) + 1, 0)
+    except ValueError:
+        start = 0
+
+    def events():
+        for idx, name, data in job.stream(start):
+            if idx is None:
+                yield ': keepalive\n\n'
+            else:
+                yield f'id: {idx}\nevent: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+        yield f'event: done\ndata: {json.dumps(job.snapshot())}\n\n'
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@bp.route('/api/jobs/<job_id>', methods=['DELETE'])
+def api_jobs_cancel(job_id):
+    job = _state('jobs').cancel(job_id)
+    if job is None:
+        return jsonify({'error':'job não encontrado'}),404
+    return jsonify({'ok':True,'job_id':job.id})
+
+# Stored report browsing: cursor pagination + server-side filters
+CAPTURE_FILTERS = ('domain', 'source', 'status', 'mimetype', 'from', 'to')
+
+
+@bp.route('/captures')
+def captures_page():
+    return render_template_string(CAPTURES_HTML)
+
+
+@bp.route('/api/captures')
+def api_captures():
+    filters = {k: request.args.get(k, '').strip() for k in CAPTURE_FILTERS}
+    try:
+        page = _state('reports').page(filters, cursor=request.args.get('cursor'),
+                                       limit=request.args.get('limit', 50, type=int),
+                                       order=request.args.get('order', 'asc'))
+    except FileNotFoundError:
+        return jsonify({'error':'arquivo não encontrado'}),404
+    except ValueError as e:
+        # bad from/to date or a cursor from another version of the report
+        return jsonify({'error':str(e)}),400
+    return jsonify(page)
+
+
+@bp.route('/api/captures/facets')
+def api_captures_facets():
+    try:
+        return jsonify(_state('reports').facets())
+    except FileNotFoundError:
+        return jsonify({'error':'arquivo não encontrado'}),404
+
+@bp.route('/api/download')
 def api_download():
     # if ferrana_report.json exists, return it, otherwise create minimal
     try:
-        return send_file('ferrana_report.json', as_attachment=True)
+        return send_file(_state('reports').json_path.resolve(), as_attachment=True)
     except Exception:
         return jsonify({'error':'arquivo não encontrado'}),404
 
+@bp.route('/api/http-stats')
+def api_http_stats():
+    # per-host connection reuse of the shared pools (empty until a source has run)
+    import http_client
+    return jsonify(http_client.stats())
+
+@bp.route('/metrics')
+def metrics_endpoint():
+    # Prometheus text format: per-source latency, status, timeouts, retries, cache, bytes
+    return Response(metrics.render(), content_type=metrics.PROMETHEUS_CONTENT_TYPE)
+
+def create_app(report_json='ferrana_report.json', report_capt='ferrana_report.capt'):
+    # each app owns its source executors, job registry and report index, so
+    # apps built for tests or embedding never share running searches
+    app = Flask(__name__)
+    app.extensions['finder'] = {
+        'pools': SourcePools(),
+        'jobs': JobManager(max_active=MAX_ACTIVE_JOBS),
+        'reports': ReportStore(report_json, report_capt),
+    }
+    app.register_blueprint(bp)
+    return app
+
+
+app = create_app()
+
 if __name__=='__main__':
     app.run(debug=True)
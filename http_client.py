@@ -0,0 +1,156 @@
+# http_client.py
+# Cliente HTTP compartilhado: uma requests.Session (pool keep-alive) por host.
+#
+# Todos os módulos de busca (app.py, finder_ferrana.py, finder_web_ui.py, cdx.py)
+# usam http_client.get() em vez de requests.get(), então a conexão TCP+TLS com
+# web.archive.org, crt.sh e oocities.org é reaproveitada entre chamadas.
+#
+# - pool por host com tamanho configurável (POOL_SIZE)
+# - Accept-Encoding gzip/deflate (e br quando o pacote brotli está instalado)
+# - Retry do urllib3 só para falhas de conexão e 502/504; 429/503 (mesmo com
+#   Retry-After) voltam na hora para o limitador AIMD e para quem chamou
+# - passa pelo limitador adaptativo por host (ratelimit.py)
+# - latência, status, timeouts e bytes de cada requisição vão para metrics.py
+# - stats() mostra quantas conexões foram abertas e quantas requisições as reusaram
+# - SEARCH_HOST_OVERRIDES redireciona hosts para outra base (p.ex. o servidor
+#   stub de benchmarks/bench.py): "web.archive.org=http://127.0.0.1:8765,crt.sh=..."
+
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import metrics
+from ratelimit import host_of, limiter
+
+POOL_SIZE = 16
+DEFAULT_TIMEOUT = 20
+
+try:
+    import brotli  # noqa: F401  (urllib3 só decodifica br se estiver instalado)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; HistoricalScanner/1.0; +https://github.com/JulioCamposMachado)",
+    "Accept-Encoding": ACCEPT_ENCODING,
+}
+
+
+
+def _parse_overrides(value):
+    overrides = {}
+    for item in (value or "").split(","):
+        host, sep, base = item.partition("=")
+        if sep and host.strip() and base.strip():
+            overrides[host.strip().lower()] = base.strip().rstrip("/")
+    return overrides
+
+
+HOST_OVERRIDES = _parse_overrides(os.environ.get("SEARCH_HOST_OVERRIDES"))
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def _retry():
+    return Retry(
+        total=3,
+        connect=2,
+        read=0,
+        status=2,
+        status_forcelist=(502, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        backoff_factor=0.5,
+        raise_on_status=False,
+        # sem isso o urllib3 repete e dorme em 429/503 com Retry-After dentro do
+        # adapter, onde o ratelimit.py não vê o throttle
+        respect_retry_after_header=False,
+    )
+
+
+def get_session(host):
+    """Session com pool keep-alive dedicada ao host (criada no primeiro uso)."""
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=_retry())
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[host] = session
+        return session
+
+
+def _target(url):
+    """URL efetivamente pedida (aplica HOST_OVERRIDES; o limitador continua no host original)."""
+    if not HOST_OVERRIDES:
+        return url
+    parts = urlsplit(url)
+    base = HOST_OVERRIDES.get((parts.hostname or "").lower())
+    if base is None:
+        return url
+    return base + (parts.path or "/") + ("?" + parts.query if parts.query else "")
+
+
+def get(url, timeout=DEFAULT_TIMEOUT, rate_limit=True, **kwargs):
+    """requests.get() sobre a Session do host, passando pelo limitador de taxa."""
+    if rate_limit:
+        limiter.wait(url)
+    source = metrics.source_of(url)
+    started = time.perf_counter()
+    try:
+        r = get_session(host_of(url)).get(_target(url), timeout=timeout, **kwargs)
+    except requests.exceptions.RequestException as e:
+        if isinstance(e, requests.exceptions.Timeout):
+            metrics.timeout(source)
+            metrics.observe(source, time.perf_counter() - started, "timeout")
+        else:
+            metrics.error(source, type(e).__name__)
+            metrics.observe(source, time.perf_counter() - started, "error")
+        if rate_limit:
+            limiter.update(url, None)
+        raise
+    # com stream=True o corpo ainda não foi lido: conta só o Content-Length
+    # (cdx.py soma os bytes das respostas chunked enquanto lê as linhas)
+    if kwargs.get("stream"):
+        nbytes = int(r.headers.get("Content-Length") or 0)
+    else:
+        nbytes = len(r.content)
+    # novas tentativas feitas pelo Retry do urllib3 (conexão, 502/504)
+    history = getattr(getattr(r.raw, "retries", None), "history", None) or ()
+    for attempt in history:
+        metrics.retry(source)
+        if attempt.status:
+            metrics.status(source, attempt.status)
+        elif attempt.error is not None:
+            metrics.error(source, type(attempt.error).__name__)
+    metrics.observe(source, time.perf_counter() - started, r.status_code, nbytes)
+    if rate_limit:
+        limiter.update(url, r.status_code, r.headers.get("Retry-After"))
+    return r
+
+
+def stats():
+    """{host: {"requests", "connections", "reuse"}} a partir dos pools do urllib3."""
+    result = {}
+    with _lock:
+        sessions = list(_sessions.items())
+    for host, session in sessions:
+        requests_made = connections = 0
+        adapter = session.get_adapter("https://")
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                requests_made += pool.num_requests
+                connections += pool.num_connections
+        reuse = 1 - connections / requests_made if requests_made else 0.0
+        result[host] = {"requests": requests_made, "connections": connections, "reuse": round(reuse, 3)}
+    return result
@@ -0,0 +1,126 @@
+# jobs.py
+# Jobs em segundo plano para as buscas longas da interface web.
+#
+# O POST cria um Job e devolve o id na hora; o trabalho roda num executor
+# com limite de jobs simultâneos por worker. Cada resultado parcial vira um
+# evento (publish) que o navegador recebe por Server-Sent Events (stream).
+#
+# Uso:
+#   manager = JobManager(max_active=4)
+#   job = manager.submit(lambda job: job.publish("result", {...}))
+#   for idx, name, data in job.stream(): ...
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobLimitError(Exception):
+    pass
+
+
+class Job:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.created = time.time()
+        self.finished = None
+        self.events = []
+        self._cond = threading.Condition()
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def publish(self, name, data):
+        with self._cond:
+            self.events.append((name, data))
+            self._cond.notify_all()
+
+    def finish(self, status):
+        with self._cond:
+            self.status = status
+            self.finished = time.time()
+            self._cond.notify_all()
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+    def stream(self, start=0, keepalive=15):
+        """Gera (índice, nome, dados) a partir de start até o job terminar.
+
+        Gera (None, None, None) a cada keepalive segundos sem eventos, para o
+        chamador poder mandar um comentário SSE e manter a conexão viva.
+        """
+        idx = start
+        while True:
+            with self._cond:
+                if idx >= len(self.events) and not self.done:
+                    self._cond.wait(keepalive)
+                pending = self.events[idx:]
+                done = self.done
+            for name, data in pending:
+                yield idx, name, data
+                idx += 1
+            if done and idx >= len(self.events):
+                return
+            if not pending:
+                yield None, None, None
+
+    def snapshot(self):
+        with self._cond:
+            return {"id": self.id, "status": self.status, "events": len(self.events)}
+
+
+class JobManager:
+    def __init__(self, max_active=4, keep_finished=600):
+        self.max_active = max_active
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_active)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _active(self):
+        return sum(1 for j in self._jobs.values() if not j.done)
+
+    def _cleanup(self):
+        now = time.time()
+        for job_id in [i for i, j in self._jobs.items() if j.done and now - j.finished > self.keep_finished]:
+            del self._jobs[job_id]
+
+    def submit(self, fn):
+        """Agenda fn(job); levanta JobLimitError se já há max_active jobs rodando."""
+        with self._lock:
+            self._cleanup()
+            if self._active() >= self.max_active:
+                raise JobLimitError(f"limite de {self.max_active} buscas simultâneas atingido")
+            job = Job()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job, fn):
+        job.status = "running"
+        try:
+            fn(job)
+        except Exception as e:
+            job.publish("error", {"error": str(e)})
+            job.finish("failed")
+            return
+        job.finish("cancelled" if job.cancelled else "done")
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
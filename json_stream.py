@@ -0,0 +1,127 @@
+# json_stream.py
+# Leitura incremental do relatório JSON (estilo ijson, só com a biblioteca padrão).
+#
+# O relatório tem o formato {"seção": {"chave": valor}}; para valores que são
+# listas (capturas do Wayback, certificados do crt.sh) cada elemento é
+# entregue separadamente, então a memória usada não depende do tamanho das listas.
+#
+# Uso:
+#   with open("ferrana_report.json", encoding="utf-8") as f:
+#       for secao, chave, tipo, valor in iter_report(f):
+#           # tipo: "start" (início de uma lista), "item" (elemento) ou "value"
+#
+# iter_array() faz o mesmo para um documento que é um array no topo
+# (resposta JSON do crt.sh, lida direto da rede por crtsh.py).
+
+import json
+
+CHUNK_SIZE = 1 << 16
+WHITESPACE = " \t\n\r"
+NUMBER_END = WHITESPACE + ",]}"
+
+
+class _Reader:
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # descarta o que já foi consumido para o buffer não crescer
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("fim inesperado do JSON")
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"esperado {char!r} na posição {self.pos}, encontrado {self.buf[self.pos]!r}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # um número cortado pelo bloco ("-0" + ".5e10") só termina num
+            # delimitador; antes disso pode continuar no próximo bloco
+            at_end = end == len(self.buf)
+            cut_number = (isinstance(value, (int, float)) and not isinstance(value, bool)
+                          and (at_end or self.buf[end] not in NUMBER_END))
+            if (at_end or cut_number) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def object_keys(self):
+        """Depois de '{': gera cada chave; o chamador deve consumir o valor."""
+        first = True
+        while True:
+            if self.peek() == "}":
+                self.pos += 1
+                return
+            if not first:
+                self.expect(",")
+            first = False
+            key = self.value()
+            self.expect(":")
+            yield key
+
+    def array_items(self):
+        """Depois de '[': gera cada elemento já decodificado."""
+        first = True
+        while True:
+            if self.peek() == "]":
+                self.pos += 1
+                return
+            if not first:
+                self.expect(",")
+            first = False
+            yield self.value()
+
+
+def iter_report(f, chunk_size=CHUNK_SIZE):
+    """Gera (seção, chave, tipo, valor) percorrendo o arquivo uma única vez."""
+    r = _Reader(f, chunk_size)
+    r.expect("{")
+    for section in r.object_keys():
+        if r.peek() != "{":
+            yield section, None, "value", r.value()
+            continue
+        r.expect("{")
+        for key in r.object_keys():
+            if r.peek() == "[":
+                r.expect("[")
+                yield section, key, "start", None
+                for item in r.array_items():
+                    yield section, key, "item", item
+            else:
+                yield section, key, "value", r.value()
+
+
+def iter_array(f, chunk_size=CHUNK_SIZE):
+    """Gera os elementos de um documento que é um array JSON, um a um."""
+    r = _Reader(f, chunk_size)
+    r.expect("[")
+    yield from r.array_items()
@@ -0,0 +1,255 @@
+# metrics.py
+# Instrumentação das fontes externas (Wayback, crt.sh, oocities, WHOIS).
+#
+# Registrado em um único lugar por tipo de evento:
+#   - http_client.get() / whois_engine.query(): latência (histograma), status,
+#     timeouts, erros de rede e bytes recebidos por fonte
+#   - cache.cached(): acertos (fresh / stale) e faltas por fonte
+#   - app.retry_request(): novas tentativas
+#   - funções de busca que engolem exceções: falhas por fonte (failure())
+#
+# render() gera o formato texto do Prometheus (rota /metrics dos apps Flask)
+# e summary_lines() a tabela impressa no fim das execuções de linha de comando.
+# snapshot() / merge() permitem somar as métricas dos processos do batch_scan.py.
+
+import threading
+from urllib.parse import urlsplit
+
+# limites (em segundos) dos baldes do histograma de latência
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+SOURCE_HOSTS = {
+    "web.archive.org": "wayback",
+    "archive.org": "wayback",
+    "crt.sh": "crtsh",
+    "oocities.org": "oocities",
+    "www.oocities.org": "oocities",
+    "index.commoncrawl.org": "commoncrawl",
+}
+
+# nomes usados no cache (cache.TTLS) -> fonte
+CACHE_SOURCES = {
+    "wayback_term": "wayback",
+    "whois_record": "whois",
+}
+
+
+def source_of(url):
+    """Nome da fonte a partir da URL (whois://servidor -> whois; host desconhecido -> o próprio host)."""
+    parts = urlsplit(url)
+    if parts.scheme == "whois":
+        return "whois"
+    host = (parts.hostname or "").lower()
+    return SOURCE_HOSTS.get(host, host or "desconhecido")
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Contadores e histogramas por fonte, seguros entre threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self.requests = {}    # (fonte, status) -> n
+        self.latency = {}     # fonte -> [contagem por balde..., soma, total]
+        self.timeouts = {}    # fonte -> n
+        self.errors = {}      # (fonte, tipo) -> n   (erros de rede)
+        self.failures = {}    # (fonte, tipo) -> n   (exceções engolidas pelas buscas)
+        self.retries = {}     # fonte -> n
+        self.cache = {}       # (fonte, resultado) -> n
+        self.bytes = {}       # fonte -> n
+
+    @staticmethod
+    def _inc(table, key, n=1):
+        table[key] = table.get(key, 0) + n
+
+    def observe(self, source, seconds, status, nbytes=0):
+        """Uma requisição concluída (status HTTP, "ok"/"error" no WHOIS, "timeout"...)."""
+        with self._lock:
+            self._inc(self.requests, (source, str(status)))
+            hist = self.latency.get(source)
+            if hist is None:
+                hist = self.latency[source] = [0] * (len(BUCKETS) + 2)
+            for i, limit in enumerate(BUCKETS):
+                if seconds <= limit:
+                    hist[i] += 1
+                    break
+            hist[-2] += seconds
+            hist[-1] += 1
+            if nbytes:
+                self._inc(self.bytes, source, nbytes)
+
+    def status(self, source, status):
+        """Resposta intermediária sem latência própria (tentativas do Retry do urllib3)."""
+        with self._lock:
+            self._inc(self.requests, (source, str(status)))
+
+    def add_bytes(self, source, nbytes):
+        with self._lock:
+            self._inc(self.bytes, source, nbytes)
+
+    def timeout(self, source):
+        with self._lock:
+            self._inc(self.timeouts, source)
+
+    def error(self, source, kind):
+        with self._lock:
+            self._inc(self.errors, (source, kind))
+
+    def failure(self, source, exc=None):
+        kind = type(exc).__name__ if isinstance(exc, BaseException) else str(exc or "vazio")
+        with self._lock:
+            self._inc(self.failures, (source, kind))
+
+    def retry(self, source):
+        with self._lock:
+            self._inc(self.retries, source)
+
+    def cache_lookup(self, source, result):
+        source = CACHE_SOURCES.get(source, source)
+        with self._lock:
+            self._inc(self.cache, (source, result))
+
+    # -- agregação entre processos ------------------------------------------
+
+    def snapshot(self, reset=False):
+        """Cópia serializável (pickle/JSON); reset=True zera depois de copiar."""
+        with self._lock:
+            snap = {
+                "requests": [[s, st, n] for (s, st), n in self.requests.items()],
+                "latency": {s: list(h) for s, h in self.latency.items()},
+                "timeouts": dict(self.timeouts),
+                "errors": [[s, k, n] for (s, k), n in self.errors.items()],
+                "failures": [[s, k, n] for (s, k), n in self.failures.items()],
+                "retries": dict(self.retries),
+                "cache": [[s, r, n] for (s, r), n in self.cache.items()],
+                "bytes": dict(self.bytes),
+            }
+            if reset:
+                self._clear()
+        return snap
+
+    def merge(self, snap):
+        with self._lock:
+            for s, st, n in snap["requests"]:
+                self._inc(self.requests, (s, st), n)
+            for s, h in snap["latency"].items():
+                mine = self.latency.setdefault(s, [0] * (len(BUCKETS) + 2))
+                for i, v in enumerate(h):
+                    mine[i] += v
+            for name in ("timeouts", "retries", "bytes"):
+                for s, n in snap[name].items():
+                    self._inc(getattr(self, name), s, n)
+            for name in ("errors", "failures", "cache"):
+                for s, k, n in snap[name]:
+                    self._inc(getattr(self, name), (s, k), n)
+
+    # -- saída ----------------------------------------------------------------
+
+    def quantile(self, source, q):
+        """Estimativa pelo limite superior do balde (None sem dados)."""
+        with self._lock:
+            hist = list(self.latency.get(source) or ())
+        return self._quantile(hist, q)
+
+    @staticmethod
+    def _quantile(hist, q):
+        if not hist or not hist[-1]:
+            return None
+        target = q * hist[-1]
+        seen = 0
+        for i, limit in enumerate(BUCKETS):
+            seen += hist[i]
+            if seen >= target:
+                return limit
+        return float("inf")
+
+    def render(self):
+        """Formato de exposição texto do Prometheus (version=0.0.4)."""
+        out = []
+
+        def counter(name, help_text, items, labels):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} counter")
+            for key, n in sorted(items):
+                key = key if isinstance(key, tuple) else (key,)
+                lbl = ",".join(f'{l}="{_label(v)}"' for l, v in zip(labels, key))
+                out.append(f"{name}{{{lbl}}} {n}")
+
+        with self._lock:
+            counter("search_upstream_requests_total", "Requisições às fontes externas por status.",
+                    self.requests.items(), ("source", "status"))
+            out.append("# HELP search_upstream_request_duration_seconds Latência das requisições às fontes externas.")
+            out.append("# TYPE search_upstream_request_duration_seconds histogram")
+            for source, hist in sorted(self.latency.items()):
+                src = _label(source)
+                cumulative = 0
+                for i, limit in enumerate(BUCKETS):
+                    cumulative += hist[i]
+                    out.append(f'search_upstream_request_duration_seconds_bucket{{source="{src}",le="{limit}"}} {cumulative}')
+                out.append(f'search_upstream_request_duration_seconds_bucket{{source="{src}",le="+Inf"}} {hist[-1]}')
+                out.append(f'search_upstream_request_duration_seconds_sum{{source="{src}"}} {hist[-2]:.6f}')
+                out.append(f'search_upstream_request_duration_seconds_count{{source="{src}"}} {hist[-1]}')
+            counter("search_upstream_timeouts_total", "Requisições encerradas por timeout.",
+                    self.timeouts.items(), ("source",))
+            counter("search_upstream_errors_total", "Erros de rede por tipo de exceção.",
+                    self.errors.items(), ("source", "kind"))
+            counter("search_source_failures_total", "Buscas que falharam e devolveram resultado vazio.",
+                    self.failures.items(), ("source", "kind"))
+            counter("search_upstream_retries_total", "Novas tentativas após erro ou throttling.",
+                    self.retries.items(), ("source",))
+            counter("search_cache_lookups_total", "Consultas ao cache persistente (fresh, stale, miss).",
+                    self.cache.items(), ("source", "result"))
+            counter("search_upstream_response_bytes_total", "Bytes recebidos das fontes externas.",
+                    self.bytes.items(), ("source",))
+        return "\n".join(out) + "\n"
+
+    def summary_lines(self):
+        """Tabela de resumo por fonte para o fim das execuções de linha de comando."""
+        with self._lock:
+            sources = sorted({s for s, _ in self.requests} | set(self.timeouts) | set(self.retries)
+                             | {s for s, _ in self.failures} | {s for s, _ in self.cache})
+            rows = []
+            for s in sources:
+                total = sum(n for (src, _), n in self.requests.items() if src == s)
+                bad = sum(n for (src, st), n in self.requests.items()
+                          if src == s and not (st.isdigit() and int(st) < 400) and st != "ok")
+                hits = sum(n for (src, r), n in self.cache.items() if src == s and r != "miss")
+                misses = self.cache.get((s, "miss"), 0)
+                fails = sum(n for (src, _), n in self.failures.items() if src == s)
+                hist = self.latency.get(s)
+                rows.append((s, total, bad, self.timeouts.get(s, 0), self.retries.get(s, 0),
+                             f"{hits}/{misses}", fails, self._quantile(hist, 0.5), self._quantile(hist, 0.95),
+                             self.bytes.get(s, 0)))
+        lines = [f"{'fonte':<14}{'req':>7}{'erros':>7}{'timeout':>9}{'retry':>7}{'cache h/m':>11}"
+                 f"{'falhas':>8}{'p50':>8}{'p95':>8}{'KB':>10}"]
+        for s, total, bad, timeouts, retries, cache_hm, fails, p50, p95, nbytes in rows:
+            fmt = lambda v: "-" if v is None else ("inf" if v == float("inf") else f"{v:g}s")
+            lines.append(f"{s:<14}{total:>7}{bad:>7}{timeouts:>9}{retries:>7}{cache_hm:>11}"
+                         f"{fails:>8}{fmt(p50):>8}{fmt(p95):>8}{nbytes / 1024:>10.1f}")
+        return lines
+
+
+registry = Metrics()
+
+observe = registry.observe
+status = registry.status
+add_bytes = registry.add_bytes
+timeout = registry.timeout
+error = registry.error
+failure = registry.failure
+retry = registry.retry
+cache_lookup = registry.cache_lookup
+render = registry.render
+summary_lines = registry.summary_lines
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
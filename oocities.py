@@ -0,0 +1,202 @@
+# oocities.py
+# Busca nos espelhos do Geocities (oocities.org) percorrendo todas as páginas
+# de resultado.
+#
+# - a primeira página revela a paginação; as demais páginas conhecidas são
+#   baixadas em paralelo (pool de threads sobre o pool keep-alive do http_client)
+# - quando o paginador mostra só algumas páginas à frente ("1 2 3 4 … próxima"),
+#   os números intermediários até a maior página vista também entram na fila
+# - limites: max_pages (total de páginas baixadas) e max_depth (saltos de
+#   paginação a partir da primeira página)
+# - links extraídos com lxml quando instalado; sem ele, com o html.parser da
+#   biblioteca padrão (sem montar árvore, só as tags <a>)
+# - o termo é compilado uma vez (regex sem distinção de maiúsculas) e as URLs
+#   são normalizadas e deduplicadas conforme aparecem
+#
+# Uso:
+#   for hit in oocities.search("dama"):
+#       print(hit["title"], hit["url"])
+
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from html.parser import HTMLParser
+from urllib.parse import parse_qs, quote, urljoin, urlsplit, urlunsplit
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+BASE_URL = "https://oocities.org"
+SEARCH_PATH = "/search"
+MAX_PAGES = 20
+MAX_DEPTH = 5
+WORKERS = 4
+TIMEOUT = 15
+
+
+def _default_get(url):
+    import http_client
+    return http_client.get(url, timeout=TIMEOUT)
+
+
+class _LinkParser(HTMLParser):
+    """Coleta (href, texto) de cada <a>, sem montar a árvore do documento."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+        self._href = None
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            self._close()
+            self._href = dict(attrs).get("href") or ""
+            self._text = []
+
+    def handle_endtag(self, tag):
+        if tag == "a":
+            self._close()
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._text.append(data)
+
+    def _close(self):
+        if self._href is not None:
+            self.links.append((self._href, " ".join("".join(self._text).split())))
+            self._href = None
+
+    def close(self):
+        super().close()
+        self._close()
+
+
+def extract_links(html):
+    """Lista de (href, texto) das tags <a> da página."""
+    if lxml is not None:
+        try:
+            doc = lxml.html.fromstring(html)
+        except (ValueError, lxml.etree.ParserError):
+            return []
+        return [(a.get("href") or "", " ".join(a.text_content().split())) for a in doc.iter("a")]
+    parser = _LinkParser()
+    parser.feed(html)
+    parser.close()
+    return parser.links
+
+
+def normalize_url(url):
+    """Forma canônica para deduplicar: esquema/host em minúsculas, sem fragmento, sem www."""
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return urlunsplit((parts.scheme.lower() or "https", host, parts.path or "/", parts.query, ""))
+
+
+def search_url(term, page=1):
+    url = f"{BASE_URL}{SEARCH_PATH}?q={quote(term)}"
+    return url if page == 1 else f"{url}&page={page}"
+
+
+class OocitiesCrawler:
+    """Percorre as páginas de resultado de um termo e junta os links que o citam."""
+
+    def __init__(self, term, max_pages=MAX_PAGES, max_depth=MAX_DEPTH, workers=WORKERS, get=None):
+        self.term = term.strip()
+        self.matcher = re.compile(re.escape(self.term), re.IGNORECASE)
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.workers = workers
+        self.get = get or _default_get
+        self.hits = []
+        self.pages_fetched = 0
+        self.errors = []
+        self._seen_urls = set()
+        self._seen_pages = set()
+        self._max_page_seen = 1
+        self._lock = threading.Lock()
+
+    def _page_number(self, href):
+        """Número da página se o link for da paginação desta busca (senão None)."""
+        parts = urlsplit(href)
+        if parts.path != SEARCH_PATH or parts.netloc not in ("", "oocities.org", "www.oocities.org"):
+            return None
+        params = parse_qs(parts.query)
+        if params.get("q", [""])[0].lower() != self.term.lower():
+            return None
+        try:
+            return int(params.get("page", ["1"])[0])
+        except ValueError:
+            return None
+
+    def _parse(self, html, depth):
+        """Registra os resultados da página; devolve as páginas novas a buscar."""
+        found = []
+        new_pages = []
+        for href, text in extract_links(html):
+            if not href or href.startswith(("#", "javascript:", "mailto:")):
+                continue
+            page = self._page_number(href)
+            if page is not None:
+                new_pages.append(page)
+                continue
+            if not (self.matcher.search(text) or self.matcher.search(href)):
+                continue
+            full = urljoin(BASE_URL + "/", href)
+            found.append((normalize_url(full), {"title": text, "url": full}))
+
+        with self._lock:
+            for key, hit in found:
+                if key not in self._seen_urls:
+                    self._seen_urls.add(key)
+                    self.hits.append(hit)
+            if depth >= self.max_depth:
+                return []
+            if new_pages:
+                # preenche os números que o paginador não mostrou
+                top = max(new_pages)
+                if top > self._max_page_seen:
+                    new_pages.extend(range(self._max_page_seen + 1, top))
+                    self._max_page_seen = top
+            queue = []
+            for page in sorted(set(new_pages)):
+                if page in self._seen_pages or len(self._seen_pages) >= self.max_pages:
+                    continue
+                self._seen_pages.add(page)
+                queue.append(page)
+            return queue
+
+    def _fetch(self, page):
+        r = self.get(search_url(self.term, page))
+        if r is None or r.status_code != 200:
+            raise IOError(f"oocities página {page}: status {getattr(r, 'status_code', None)}")
+        return r.text
+
+    def run(self):
+        if not self.term:
+            return []
+        self._seen_pages.add(1)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            running = {pool.submit(self._fetch, 1): (1, 0)}
+            while running:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    page, depth = running.pop(fut)
+                    try:
+                        html = fut.result()
+                    except Exception as e:
+                        self.errors.append(e)
+                        continue
+                    self.pages_fetched += 1
+                    for nxt in self._parse(html, depth):
+                        running[pool.submit(self._fetch, nxt)] = (nxt, depth + 1)
+        return self.hits
+
+
+def search(term, **kwargs):
+    """Resultados ({"title", "url"}) de todas as páginas, sem URLs repetidas."""
+    return OocitiesCrawler(term, **kwargs).run()
@@ -0,0 +1,168 @@
+# query_analysis.py
+# Classificação e normalização das consultas, compartilhada por app.py,
+# finder.py e finder_web_ui.py.
+#
+# Cada entrada vira um Query com o tipo:
+#   domain  "https://www.DamaBolsas.com.br/loja" -> damabolsas.com.br
+#   email   "contato@ferrana.com.br"             -> domínio ferrana.com.br
+#   name    "Fernanda Marsiglia"                 -> nome de pessoa (2+ palavras)
+#   term    "ferrana", "dama-acessorios"         -> marca / termo solto
+# e value_for(fonte) diz o que mandar para cada fonte, ou None quando a fonte
+# não tem como responder (WHOIS para nomes e termos, crt.sh para nomes,
+# WHOIS/crt.sh para domínios de webmail como gmail.com). Os tipos aceitos e a
+# forma do valor (form()) de cada fonte são declarados em sources.py.
+#
+# Os padrões são compilados uma vez; o domínio registrado usa a tabela de
+# sufixos públicos abaixo (www.loja.com.br -> loja.com.br, não com.br).
+#
+# Uso:
+#   q = analyze("contato@ferrana.com.br")
+#   q.kind, q.domain, q.sources()       # 'email', 'ferrana.com.br', ('wayback', 'crtsh', ...)
+#   q.value_for("whois")                # 'ferrana.com.br'
+
+import re
+import unicodedata
+
+# sufixos públicos com mais de um rótulo (lista curta, focada no .br)
+MULTI_LABEL_SUFFIXES = {
+    "com.br", "net.br", "org.br", "gov.br", "edu.br", "art.br", "blog.br", "eco.br",
+    "eti.br", "ind.br", "inf.br", "adv.br", "med.br", "nom.br", "tur.br", "tv.br",
+    "app.br", "dev.br", "emp.br", "log.br", "rec.br", "srv.br", "wiki.br", "coop.br",
+    "jus.br", "mil.br", "leg.br", "mp.br",
+    "co.uk", "org.uk", "ac.uk", "com.ar", "com.pt", "com.mx", "com.au",
+}
+
+# TLDs genéricos aceitos; qualquer TLD de 2 letras conta como código de país
+GENERIC_TLDS = {
+    "com", "net", "org", "info", "biz", "edu", "gov", "mil", "int", "name", "pro",
+    "aero", "coop", "museum", "mobi", "tel", "travel", "jobs", "asia", "cat",
+    "app", "dev", "xyz", "online", "site", "store", "shop", "tech", "blog", "club",
+    "art", "email", "page", "cloud", "digital", "world", "space", "website", "link",
+}
+
+# provedores de e-mail gratuitos: WHOIS e crt.sh do domínio não dizem nada da pessoa
+FREE_MAIL_DOMAINS = {
+    "gmail.com", "googlemail.com", "hotmail.com", "hotmail.com.br", "outlook.com",
+    "live.com", "msn.com", "yahoo.com", "yahoo.com.br", "icloud.com", "aol.com",
+    "bol.com.br", "uol.com.br", "terra.com.br", "ig.com.br", "globo.com", "zipmail.com.br",
+    "protonmail.com", "proton.me",
+}
+
+_LABEL = r"(?:xn--)?[a-z0-9à-ɏ](?:[a-z0-9à-ɏ\-]{0,61}[a-z0-9à-ɏ])?"
+DOMAIN_RE = re.compile(rf"^(?:{_LABEL}\.)+([a-z]{{2,63}}|xn--[a-z0-9\-]{{1,59}})$")
+EMAIL_RE = re.compile(r"^([a-z0-9!#$%&'*+/=?^_`{|}~.\-]+)@([^@\s]+)$")
+NAME_RE = re.compile(r"^[^\W\d_]+(?:['\-][^\W\d_]+)*(?: [^\W\d_]+(?:['\-][^\W\d_]+)*)+$")
+SCHEME_RE = re.compile(r"^[a-z][a-z0-9+.\-]*://")
+SLUG_RE = re.compile(r"[^a-z0-9\-]")
+DNS_TERM_RE = re.compile(r"[^a-z0-9.\-]")
+SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_name(name):
+    name = name.strip().lower().rstrip(".")
+    if name.startswith("*."):
+        name = name[2:]
+    return name
+
+
+def registered_domain(name):
+    """Domínio registrado (p.ex. www.loja.com.br -> loja.com.br)."""
+    labels = normalize_name(name).split(".")
+    if len(labels) < 2:
+        return ".".join(labels)
+    if len(labels) >= 3 and ".".join(labels[-2:]) in MULTI_LABEL_SUFFIXES:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def ascii_fold(text):
+    """Remove acentos (Marsíglia -> marsiglia)."""
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+
+
+def slug(text):
+    """Termo compacto para os padrões de URL do Wayback (letras, dígitos e hífen)."""
+    return SLUG_RE.sub("", ascii_fold(text.lower()))
+
+
+def _as_host(text):
+    """Tira esquema, caminho e porta de algo que pode ser uma URL."""
+    text = SCHEME_RE.sub("", text)
+    text = text.split("/", 1)[0].split("?", 1)[0].split("#", 1)[0]
+    if "@" not in text:
+        text = text.rsplit(":", 1)[0] if text.count(":") == 1 else text
+    return normalize_name(text)
+
+
+def is_domain(text):
+    m = DOMAIN_RE.match(text)
+    if not m:
+        return False
+    tld = m.group(1)
+    return tld in GENERIC_TLDS or len(tld) == 2 or tld.startswith("xn--")
+
+
+class Query:
+    """Uma consulta já classificada."""
+
+    __slots__ = ("raw", "kind", "text", "domain", "host", "local")
+
+    def __init__(self, raw, kind, text, domain=None, host=None, local=None):
+        self.raw = raw
+        self.kind = kind
+        self.text = text        # forma normalizada (minúsculas, espaços simples)
+        self.domain = domain    # domínio registrado (domain / email)
+        self.host = host        # host completo informado (domain)
+        self.local = local      # parte antes do @ (email)
+
+    @property
+    def label(self):
+        """Rótulo principal do domínio (damabolsas.com.br -> damabolsas)."""
+        return self.domain.split(".", 1)[0] if self.domain else None
+
+    @property
+    def free_mail(self):
+        return self.kind == "email" and self.domain in FREE_MAIL_DOMAINS
+
+    def form(self, name):
+        """Valor derivado da consulta: domain, dns, slug ou text."""
+        if name == "domain":
+            return self.domain
+        if name == "dns":
+            # busca em nomes DNS (crt.sh): mantém pontos e hífens do termo
+            return self.domain or DNS_TERM_RE.sub("", ascii_fold(self.text)) or None
+        if name == "slug":
+            return slug(self.local or self.label or self.text) or None
+        return self.local or self.label or self.text
+
+    def value_for(self, source):
+        """O que mandar para a fonte, ou None se ela não se aplica a esta consulta."""
+        import sources
+        backend = sources.BACKENDS.get(source)
+        return backend.value_for(self) if backend else None
+
+    def sources(self, wanted=None):
+        """Fontes que podem responder a esta consulta, das mais baratas às mais caras."""
+        import sources
+        return tuple(b.name for b in sources.select(self, wanted))
+
+    def __repr__(self):
+        return f"Query({self.kind}, {self.text!r})"
+
+
+def analyze(raw):
+    """Classifica uma entrada como domain, email, name ou term."""
+    text = SPACES_RE.sub(" ", str(raw).strip().lower())
+    if not text:
+        return Query(raw, "term", "")
+    m = EMAIL_RE.match(text)
+    if m and is_domain(normalize_name(m.group(2))):
+        domain = registered_domain(m.group(2))
+        return Query(raw, "email", text, domain=domain, local=m.group(1))
+    if " " not in text:
+        host = _as_host(text)
+        if is_domain(host):
+            return Query(raw, "domain", host, domain=registered_domain(host), host=host)
+    if NAME_RE.match(text):
+        return Query(raw, "name", text)
+    return Query(raw, "term", text)
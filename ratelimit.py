@@ -0,0 +1,172 @@
+# ratelimit.py
+# Limitador de taxa adaptativo por host (token bucket) + backoff exponencial com jitter.
+#
+# - cada host (web.archive.org, crt.sh, ...) tem seu próprio balde de tokens
+# - a taxa sobe aos poucos enquanto as respostas vêm OK e cai pela metade
+#   quando o servidor responde 429/503 (AIMD)
+# - Retry-After é respeitado: o host fica bloqueado até o tempo pedido
+# - thread-safe: o mesmo limitador é compartilhado entre workers concorrentes
+#
+# Uso:
+#   limiter.wait(url)
+#   r = requests.get(url)
+#   limiter.update(url, r.status_code, r.headers.get("Retry-After"))
+
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+THROTTLE_STATUS = (429, 503)
+
+# host -> (taxa inicial em req/s, taxa máxima em req/s)
+HOST_LIMITS = {
+    "web.archive.org": (2.0, 15.0),
+    "crt.sh": (0.5, 4.0),
+    "oocities.org": (2.0, 10.0),
+    "whois.registro.br": (0.5, 2.0),
+    "whois.verisign-grs.com": (1.0, 5.0),
+}
+DEFAULT_LIMIT = (1.0, 10.0)
+MIN_RATE = 0.1
+
+
+def host_of(url):
+    """Host de uma URL (ou a própria string, p.ex. "whois")."""
+    if "://" in url:
+        return urlsplit(url).hostname or url
+    return url
+
+
+def parse_retry_after(value):
+    """Converte o cabeçalho Retry-After (segundos ou data HTTP) em segundos."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    # formato de data HTTP (raro); email.utils só é importado quando aparece
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """Backoff exponencial com "full jitter": uniforme entre 0 e base * 2^tentativa."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    """Balde de tokens com taxa ajustável (aumento aditivo, redução multiplicativa)."""
+
+    def __init__(self, rate, max_rate, burst=None):
+        self.rate = rate
+        self.max_rate = max_rate
+        self.burst = burst or max(1.0, max_rate)
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + 0.1 * self.max_rate)
+
+    def rescale(self, factor):
+        """Multiplica a taxa atual e a máxima, mantendo o que o AIMD já aprendeu."""
+        with self._lock:
+            self.rate *= factor
+            self.max_rate *= factor
+            self.burst = max(1.0, self.burst * factor)
+
+    def on_throttle(self, retry_after=None):
+        with self._lock:
+            self.rate = max(MIN_RATE, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+
+class RateLimiter:
+    """Um TokenBucket por host, criado na primeira requisição.
+
+    limits guarda as taxas de cada host para um processo só; factor (scale())
+    é aplicado quando o balde é criado, então hosts registrados depois (fontes
+    carregadas sob demanda) também ficam divididos entre os processos.
+    """
+
+    def __init__(self, limits=None):
+        self.limits = dict(HOST_LIMITS, **(limits or {}))
+        self.default = DEFAULT_LIMIT
+        self.factor = 1.0
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def limit(self, host):
+        """(taxa inicial, taxa máxima) em req/s deste processo para o host."""
+        with self._lock:
+            return self._limit(host)
+
+    def _limit(self, host):
+        rate, max_rate = self.limits.get(host, self.default)
+        return rate * self.factor, max_rate * self.factor
+
+    def register(self, host, rate_limit):
+        """Taxas de um host novo (não substitui um limite já conhecido)."""
+        with self._lock:
+            self.limits.setdefault(host, tuple(rate_limit))
+
+    def bucket(self, url):
+        host = host_of(url)
+        with self._lock:
+            b = self._buckets.get(host)
+            if b is None:
+                b = self._buckets[host] = TokenBucket(*self._limit(host))
+            return b
+
+    def wait(self, url):
+        self.bucket(url).acquire()
+
+    def scale(self, factor):
+        """Divide as taxas por processo (p.ex. factor=1/N com N processos).
+
+        Vale para os baldes que ainda vão ser criados; os que já existem são
+        multiplicados pelo fator sem perder o recuo aprendido com 429/503.
+        """
+        with self._lock:
+            self.factor *= factor
+            buckets = list(self._buckets.values())
+        for b in buckets:
+            b.rescale(factor)
+
+    def update(self, url, status, retry_after=None):
+        """Informa o resultado da requisição; retorna o Retry-After em segundos (ou None)."""
+        b = self.bucket(url)
+        if status in THROTTLE_STATUS:
+            seconds = parse_retry_after(retry_after)
+            b.on_throttle(seconds)
+            return seconds
+        if status is not None and status < 500:
+            b.on_success()
+        return None
+
+
+limiter = RateLimiter()
@@ -0,0 +1,225 @@
+# report_store.py
+# Consulta paginada (cursor) sobre os dados já salvos do relatório.
+#
+# As capturas do Wayback (ferrana_report.capt se ele foi gravado para este
+# JSON, senão o próprio JSON) e os certificados do crt.sh são indexados uma
+# vez por timestamp. A ordenação é
+# gravada ao lado do relatório (<capt>.order) e reaproveitada enquanto os
+# arquivos não mudarem, então só o primeiro carregamento depois de uma
+# varredura paga o sort. Cada página é lida a partir do cursor, aplicando os
+# filtros só até completar o limite. O cursor leva a versão do relatório:
+# depois de uma nova varredura ele é recusado (ValueError) em vez de apontar
+# para outras linhas.
+#
+# Uso:
+#   store = ReportStore("ferrana_report.json", "ferrana_report.capt")
+#   pagina = store.page({"domain": "damabolsas.com.br", "status": "200"}, limit=50)
+#   proxima = store.page(filtros, cursor=pagina["next_cursor"])
+
+import struct
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+from captures import CaptureTable, is_current, load_captures
+from json_stream import iter_report
+
+SOURCES = ("wayback", "crtsh")
+MAX_LIMIT = 500
+ORDER_MAGIC = b"RSO1"
+# magic, mtime_ns do JSON, mtime_ns do .capt, quantidade de registros
+ORDER_HEADER = struct.Struct("<4sqqq")
+
+
+def normalize_ts(value, upper=False):
+    """'2014', '2014-05-16', '20140516194315' -> inteiro de 14 dígitos."""
+    digits = "".join(c for c in str(value) if c.isdigit())[:14]
+    if not digits:
+        return None
+    return int(digits.ljust(14, "9" if upper else "0"))
+
+
+def parse_ts(value, upper=False):
+    """normalize_ts() para filtros vindos do usuário: ValueError se não houver data."""
+    ts = normalize_ts(value, upper)
+    if ts is None:
+        raise ValueError(f"data inválida: {value!r}")
+    return ts
+
+
+def _cert_ts(cert):
+    return normalize_ts(cert.get("not_before") or cert.get("entry_timestamp") or "") or 0
+
+
+class ReportStore:
+    def __init__(self, json_path="ferrana_report.json", capt_path="ferrana_report.capt"):
+        self.json_path = Path(json_path)
+        self.capt_path = Path(capt_path)
+        self.order_path = self.capt_path.with_name(self.capt_path.name + ".order")
+        self._lock = threading.Lock()
+        self._stamp_loaded = None
+        self.version = None
+
+    def _stamp(self):
+        """(mtime_ns do JSON, mtime_ns do .capt), 0 para arquivo ausente; None se nenhum existe."""
+        stamps = tuple(p.stat().st_mtime_ns if p.exists() else 0 for p in (self.json_path, self.capt_path))
+        return stamps if any(stamps) else None
+
+    def _ensure_loaded(self):
+        with self._lock:
+            stamp = self._stamp()
+            if stamp is None:
+                raise FileNotFoundError(str(self.json_path))
+            if stamp != self._stamp_loaded:
+                self._load(stamp)
+                self._stamp_loaded = stamp
+                self.version = f"{stamp[0]:x}{stamp[1]:x}"
+
+    def _read_order(self, stamp, count):
+        """Ordenação gravada (order, sorted_ts) se for deste relatório, senão None."""
+        try:
+            with open(self.order_path, "rb") as f:
+                magic, json_ns, capt_ns, n = ORDER_HEADER.unpack(f.read(ORDER_HEADER.size))
+                if magic != ORDER_MAGIC or (json_ns, capt_ns) != stamp or n != count:
+                    return None
+                order, sorted_ts = array("q"), array("q")
+                order.fromfile(f, n)
+                sorted_ts.fromfile(f, n)
+        except (OSError, EOFError, struct.error):
+            return None
+        return order, sorted_ts
+
+    def _write_order(self, stamp, order, sorted_ts):
+        tmp = self.order_path.with_name(self.order_path.name + ".tmp")
+        try:
+            with open(tmp, "wb") as f:
+                f.write(ORDER_HEADER.pack(ORDER_MAGIC, stamp[0], stamp[1], len(order)))
+                order.tofile(f)
+                sorted_ts.tofile(f)
+            tmp.replace(self.order_path)
+        except OSError:
+            pass  # diretório só leitura: ordena de novo no próximo carregamento
+
+    def _load(self, stamp):
+        tables = {}
+        certs = []
+        cert_terms = []
+        use_capt = is_current(self.capt_path, self.json_path)
+        if use_capt:
+            tables = load_captures(self.capt_path)
+        if self.json_path.exists():
+            with open(self.json_path, "r", encoding="utf-8") as f:
+                for section, key, kind, value in iter_report(f):
+                    if section == "wayback" and not use_capt:
+                        if kind == "start":
+                            tables[key] = CaptureTable()
+                        elif kind == "item":
+                            tables[key].append(value)
+                    elif section == "crtsh" and kind == "item":
+                        certs.append({k: value.get(k) for k in ("id", "name_value", "issuer_name", "not_before", "not_after", "entry_timestamp")})
+                        cert_terms.append(key)
+
+        # colunas paralelas: timestamp, fonte, dono (domínio/termo) e posição no dono
+        owners = list(tables) + sorted(set(cert_terms))
+        owner_id = {o: i for i, o in enumerate(owners)}
+        ts, src, owner, ref = array("q"), array("B"), array("l"), array("l")
+        for domain, table in tables.items():
+            for i in range(len(table)):
+                ts.append(table.timestamps[i])
+                src.append(0)
+                owner.append(owner_id[domain])
+                ref.append(i)
+        for i, cert in enumerate(certs):
+            ts.append(_cert_ts(cert))
+            src.append(1)
+            owner.append(owner_id[cert_terms[i]])
+            ref.append(i)
+
+        saved = self._read_order(stamp, len(ts))
+        if saved is None:
+            order = array("q", sorted(range(len(ts)), key=ts.__getitem__))
+            saved = order, array("q", (ts[i] for i in order))
+            self._write_order(stamp, *saved)
+        self.tables, self.certs, self.owners = tables, certs, owners
+        self.src, self.owner, self.ref = src, owner, ref
+        self.order, self.sorted_ts = saved
+
+    def _record(self, i):
+        name = self.owners[self.owner[i]]
+        if self.src[i] == 0:
+            c = self.tables[name][self.ref[i]]
+            return {
+                "source": "wayback", "domain": name, "timestamp": c.timestamp,
+                "url": c.original, "capture_url": f"https://web.archive.org/web/{c.timestamp}/{c.original}",
+                "status": c.statuscode, "mimetype": c.mimetype, "digest": c.digest,
+                "last_timestamp": c.last_timestamp, "count": c.count,
+            }
+        cert = self.certs[self.ref[i]]
+        return {
+            "source": "crtsh", "domain": name, "timestamp": _cert_ts(cert),
+            "url": f"https://crt.sh/?id={cert.get('id')}", "name": cert.get("name_value"),
+            "issuer": cert.get("issuer_name"), "status": None, "mimetype": None,
+        }
+
+    def _matches(self, i, rec, filters):
+        if filters.get("source") and SOURCES[self.src[i]] != filters["source"]:
+            return False
+        if filters.get("domain") and self.owners[self.owner[i]] != filters["domain"]:
+            return False
+        if rec is None:
+            return True
+        if filters.get("status") and rec["status"] != filters["status"]:
+            return False
+        if filters.get("mimetype") and rec["mimetype"] != filters["mimetype"]:
+            return False
+        return True
+
+    def _cursor_pos(self, cursor):
+        version, _, pos = str(cursor).partition(".")
+        if version != self.version:
+            raise ValueError("cursor expirado: o relatório mudou, recomece da primeira página")
+        try:
+            return int(pos)
+        except ValueError:
+            raise ValueError("cursor inválido") from None
+
+    def page(self, filters=None, cursor=None, limit=50, order="asc"):
+        """Uma página de registros: {"items", "next_cursor"} (cursor opaco em texto).
+
+        ValueError para datas ou cursor inválidos (ou de uma versão anterior do relatório).
+        """
+        self._ensure_loaded()
+        filters = {k: v for k, v in (filters or {}).items() if v}
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        lo = bisect_left(self.sorted_ts, parse_ts(filters["from"])) if filters.get("from") else 0
+        hi = bisect_right(self.sorted_ts, parse_ts(filters["to"], upper=True)) if filters.get("to") else len(self.order)
+        desc = order == "desc"
+        if cursor:
+            pos = self._cursor_pos(cursor)
+        else:
+            pos = hi - 1 if desc else lo
+        step = -1 if desc else 1
+
+        items = []
+        while lo <= pos < hi and len(items) < limit:
+            i = self.order[pos]
+            pos += step
+            # filtros baratos (colunas) antes de montar o registro
+            if not self._matches(i, None, filters):
+                continue
+            rec = self._record(i)
+            if self._matches(i, rec, filters):
+                items.append(rec)
+        next_cursor = f"{self.version}.{pos}" if lo <= pos < hi else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def facets(self):
+        """Valores disponíveis para os filtros (domínios/termos, status, mimetypes)."""
+        self._ensure_loaded()
+        statuses, mimetypes = set(), set()
+        for table in self.tables.values():
+            statuses.update(table.statuses)
+            mimetypes.update(table.mimetypes)
+        return {"domains": self.owners, "sources": list(SOURCES),
+                "statuses": sorted(statuses), "mimetypes": sorted(mimetypes)}
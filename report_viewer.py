@@ -1,25 +1,20 @@
-import json
 from datetime import datetime
 from pathlib import Path
+import sys
 
-# Caminho para o relatório gerado pelo script anterior
-json_file = Path("ferrana_report.json")
+from captures import is_current, load_captures
+from cert_index import CertIndex
+from json_stream import iter_report
+from whois_engine import parse_whois
 
-if not json_file.exists():
-    print("❌ Arquivo ferrana_report.json não encontrado. Execute o script anterior primeiro.")
-    exit(1)
-
-# Carregar dados do relatório
-with open(json_file, "r", encoding="utf-8") as f:
-    data = json.load(f)
-
-wayback = data.get("wayback", {})
-crtsh = data.get("crtsh", {})
-whois_data = data.get("whois", {})
+# Relatório gerado pelo app.py e HTML de saída
+JSON_FILE = "ferrana_report.json"
+CAPT_FILE = "ferrana_report.capt"
+OUTPUT_FILE = "relatorio_ferrana.html"
 
 # Função para verificar se há capturas válidas
-def validar_wayback(entries):
-    return len(entries) > 0
+def validar_wayback(total):
+    return total > 0
 
 # Função para validar certificados SSL encontrados
 def validar_crt(entries):
@@ -27,49 +22,47 @@ def validar_crt(entries):
 
 # Função para verificar se o WHOIS retornou dados significativos
 def validar_whois(texto):
-    if not texto or "No match" in texto or "NOT FOUND" in texto:
+    if not texto or texto.startswith("❌"):
         return False
-    return True
-
-# Preparar dados para HTML
-linhas_html = []
-dominios_encontrados = 0
-
-for dominio, entradas in wayback.items():
-    tem_wayback = validar_wayback(entradas)
-    tem_whois = validar_whois(whois_data.get(dominio, ""))
-    tem_crt = False
-
-    # Verificar se o domínio ou termo aparece em crt.sh
-    for termo, certs in crtsh.items():
-        if any(dominio in c.get("name_value", "") for c in certs):
-            tem_crt = True
-            break
-
-    if tem_wayback or tem_crt or tem_whois:
-        dominios_encontrados += 1
-
-    # Links de verificação
-    wayback_link = f"https://web.archive.org/web/*/{dominio}"
-    crt_link = f"https://crt.sh/?q={dominio}"
-
-    linhas_html.append(f"""
-    <tr>
-        <td>{dominio}</td>
-        <td style="text-align:center;">{"✅" if tem_wayback else "❌"}</td>
-        <td style="text-align:center;">{"✅" if tem_crt else "❌"}</td>
-        <td style="text-align:center;">{"✅" if tem_whois else "❌"}</td>
-        <td><a href="{wayback_link}" target="_blank">Archive.org</a> | 
-            <a href="{crt_link}" target="_blank">crt.sh</a></td>
-    </tr>
-    """)
-
-# Estatísticas gerais
-total_dominios = len(wayback)
-pct_encontrados = (dominios_encontrados / total_dominios * 100) if total_dominios else 0
-
-# Montar HTML final
-html = f"""
+    return parse_whois(texto)["found"]
+
+def main(json_file=JSON_FILE, capt_file=CAPT_FILE, output_file=OUTPUT_FILE):
+    json_file = Path(json_file)
+    if not json_file.exists():
+        print(f"❌ Arquivo {json_file} não encontrado. Execute o script anterior primeiro.")
+        return 1
+
+    # Ler o relatório em streaming: de cada seção guardamos só o necessário
+    # (nº de capturas por domínio, nomes dos certificados, WHOIS válido ou não),
+    # então a memória não cresce com o número de capturas.
+    capturas = {}
+    whois_ok = {}
+    indice_crt = CertIndex()
+
+    # Se o arquivo binário de capturas foi gravado para este JSON (carimbo no
+    # cabeçalho), usa ele: carrega via mmap, sem contar as capturas do JSON.
+    capt_file = Path(capt_file)
+    usar_capt = is_current(capt_file, json_file)
+    if usar_capt:
+        capturas = {dominio: len(tabela) for dominio, tabela in load_captures(capt_file).items()}
+
+    with open(json_file, "r", encoding="utf-8") as f:
+        for secao, chave, tipo, valor in iter_report(f):
+            if secao == "wayback" and not usar_capt:
+                if tipo == "start":
+                    capturas[chave] = 0
+                elif tipo == "item":
+                    capturas[chave] += 1
+                else:
+                    capturas[chave] = len(valor or [])
+            elif secao == "crtsh" and tipo == "item":
+                indice_crt.add({"id": valor.get("id"), "name_value": valor.get("name_value") or ""})
+            elif secao == "whois" and tipo == "value":
+                whois_ok[chave] = validar_whois(valor)
+
+    # Cabeçalho do HTML; o resumo só é conhecido depois das linhas, então ele é
+    # escrito no fim e exibido no topo via CSS (order: -1).
+    cabecalho = f"""
 <!DOCTYPE html>
 <html lang="pt-BR">
 <head>
@@ -82,6 +75,10 @@ body {{
     color: #f0f0f0;
     padding: 20px;
 }}
+.conteudo {{
+    display: flex;
+    flex-direction: column;
+}}
 table {{
     border-collapse: collapse;
     width: 100%;
@@ -98,6 +95,7 @@ tr:nth-child(even) {{
     background: #222;
 }}
 .summary {{
+    order: -1;
     margin-top: 20px;
     padding: 10px;
     background: #1f2833;
@@ -109,12 +107,7 @@ tr:nth-child(even) {{
 <h1>📜 Relatório de Rastros - Ferrana Acessórios do Vestuário Ltda</h1>
 <p>Gerado em: {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}</p>
 
-<div class="summary">
-    <p><strong>Total de domínios analisados:</strong> {total_dominios}</p>
-    <p><strong>Domínios com algum vestígio (Wayback / CRT / WHOIS):</strong> {dominios_encontrados}</p>
-    <p><strong>Percentual encontrado:</strong> {pct_encontrados:.1f}%</p>
-</div>
-
+<div class="conteudo">
 <table>
 <thead>
 <tr>
@@ -126,15 +119,63 @@ tr:nth-child(even) {{
 </tr>
 </thead>
 <tbody>
-{''.join(linhas_html)}
+"""
+
+    # Escrever o HTML linha a linha, calculando as estatísticas no mesmo passo
+    output_file = Path(output_file)
+    total_dominios = 0
+    dominios_encontrados = 0
+
+    with open(output_file, "w", encoding="utf-8") as out:
+        out.write(cabecalho)
+
+        for dominio, total in capturas.items():
+            total_dominios += 1
+            tem_wayback = validar_wayback(total)
+            tem_whois = whois_ok.get(dominio, False)
+
+            # Verificar se o domínio (ou subdomínio dele) aparece em crt.sh
+            tem_crt = indice_crt.has(dominio)
+
+            if tem_wayback or tem_crt or tem_whois:
+                dominios_encontrados += 1
+
+            # Links de verificação
+            wayback_link = f"https://web.archive.org/web/*/{dominio}"
+            crt_link = f"https://crt.sh/?q={dominio}"
+
+            out.write(f"""
+    <tr>
+        <td>{dominio}</td>
+        <td style="text-align:center;">{"✅" if tem_wayback else "❌"}</td>
+        <td style="text-align:center;">{"✅" if tem_crt else "❌"}</td>
+        <td style="text-align:center;">{"✅" if tem_whois else "❌"}</td>
+        <td><a href="{wayback_link}" target="_blank">Archive.org</a> |
+            <a href="{crt_link}" target="_blank">crt.sh</a></td>
+    </tr>
+    """)
+
+        # Estatísticas gerais
+        pct_encontrados = (dominios_encontrados / total_dominios * 100) if total_dominios else 0
+
+        out.write(f"""
 </tbody>
 </table>
 
+<div class="summary">
+    <p><strong>Total de domínios analisados:</strong> {total_dominios}</p>
+    <p><strong>Domínios com algum vestígio (Wayback / CRT / WHOIS):</strong> {dominios_encontrados}</p>
+    <p><strong>Percentual encontrado:</strong> {pct_encontrados:.1f}%</p>
+</div>
+</div>
+
 </body>
 </html>
-"""
+""")
+
+    print(f"✅ Relatório gerado com sucesso: {output_file.resolve()}")
+    return 0
+
 
-# Salvar HTML
-output_file = Path("relatorio_ferrana.html")
-output_file.write_text(html, encoding="utf-8")
-print(f"✅ Relatório gerado com sucesso: {output_file.resolve()}")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+# search_index.py
+# Índice local (offline) sobre os dados já coletados: capturas do Wayback,
+# certificados do crt.sh e textos de WHOIS.
+#
+# - índice invertido (token -> documentos) para busca por palavras, e-mails e hosts
+# - índice ordenado de urlkeys (SURT) para "quais capturas debaixo deste caminho?"
+# - tudo num arquivo SQLite; nenhuma consulta vai para a rede
+#
+# Uso:
+#   python search_index.py build --report ferrana_report.json --jsonl batch_out/*.jsonl
+#   python search_index.py query "contato@loja.com.br"
+#   python search_index.py query "damab*" --source crtsh
+#   python search_index.py prefix damabolsas.com.br/produtos
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import time
+from urllib.parse import urlsplit
+
+from json_stream import iter_report
+
+INDEX_PATH = "search_index.sqlite3"
+
+EMAIL_RE = re.compile(r"[a-z0-9._%+\-]+@[a-z0-9\-]+(?:\.[a-z0-9\-]+)+")
+HOST_RE = re.compile(r"[a-z0-9\-]+(?:\.[a-z0-9\-]+)+")
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Palavras + e-mails + hosts e seus domínios pais (minúsculas, sem repetição)."""
+    text = (text or "").lower()
+    tokens = set(WORD_RE.findall(text))
+    tokens.update(EMAIL_RE.findall(text))
+    for host in HOST_RE.findall(text):
+        # host e cada domínio pai (www.loja.com.br -> loja.com.br -> com.br)
+        labels = host.split(".")
+        tokens.update(".".join(labels[i:]) for i in range(len(labels) - 1))
+    return tokens
+
+
+def to_urlkey(url):
+    """Converte uma URL/host no formato SURT do CDX (br,com,loja)/caminho)."""
+    if "," in url and ")" in url:
+        return url.lower()
+    if "://" not in url:
+        url = "http://" + url
+    parts = urlsplit(url.lower())
+    host = (parts.hostname or "").rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    return ",".join(reversed(host.split("."))) + ")" + path
+
+
+class SearchIndex:
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY, source TEXT, owner TEXT, key TEXT, data TEXT,
+                UNIQUE (source, key));
+            CREATE TABLE IF NOT EXISTS postings (
+                token TEXT, doc INTEGER, PRIMARY KEY (token, doc)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS urlkeys (
+                urlkey TEXT, doc INTEGER, PRIMARY KEY (urlkey, doc)) WITHOUT ROWID;
+            """
+        )
+
+    def clear(self):
+        self.conn.executescript("DELETE FROM docs; DELETE FROM postings; DELETE FROM urlkeys;")
+
+    def add(self, source, owner, key, data, text, urlkey=None):
+        """Indexa um documento; devolve False se (fonte, chave) já estava no índice."""
+        cur = self.conn.execute(
+            "INSERT OR IGNORE INTO docs (source, owner, key, data) VALUES (?, ?, ?, ?)",
+            (source, owner, key, json.dumps(data, ensure_ascii=False)),
+        )
+        if not cur.rowcount:
+            return False
+        doc = cur.lastrowid
+        tokens = tokenize(text) | tokenize(owner)
+        self.conn.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?)", ((t, doc) for t in tokens))
+        if urlkey:
+            self.conn.execute("INSERT OR IGNORE INTO urlkeys VALUES (?, ?)", (urlkey, doc))
+        return True
+
+    def add_capture(self, domain, row):
+        self.add("wayback", domain, f"{row[0]} {row[1]}", row, row[2], urlkey=row[0])
+
+    def add_cert(self, term, cert):
+        text = " ".join(str(cert.get(k) or "") for k in ("name_value", "common_name", "issuer_name"))
+        key = str(cert.get("id") or cert.get("serial_number") or text)
+        self.add("crtsh", term, key, cert, text)
+
+    def add_whois(self, domain, text):
+        if text:
+            self.add("whois", domain, domain, {"domain": domain, "text": text}, text)
+
+    def ingest_report(self, path):
+        """Lê o relatório JSON em streaming e indexa tudo."""
+        count = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for section, key, kind, value in iter_report(f):
+                if section == "wayback" and kind == "item":
+                    self.add_capture(key, value)
+                elif section == "crtsh" and kind == "item":
+                    self.add_cert(key, value)
+                elif section == "whois" and kind == "value":
+                    self.add_whois(key, value)
+                else:
+                    continue
+                count += 1
+        self.conn.commit()
+        return count
+
+    def ingest_jsonl(self, path):
+        """Indexa os registros gerados por batch_scan.py (um JSON por linha)."""
+        count = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                item = record.get("item")
+                for row in record.get("wayback") or []:
+                    self.add_capture(item, row)
+                    count += 1
+                for cert in record.get("crtsh") or []:
+                    self.add_cert(item, cert)
+                    count += 1
+                if record.get("whois"):
+                    self.add_whois(item, record["whois"])
+                    count += 1
+        self.conn.commit()
+        return count
+
+    def _rows(self, sql, params):
+        return [
+            {"source": source, "owner": owner, "data": json.loads(data)}
+            for source, owner, data in self.conn.execute(sql, params)
+        ]
+
+    def search(self, query, source=None, limit=50):
+        """Documentos que contêm todos os termos da consulta ("abc*" = prefixo)."""
+        clauses, params = [], []
+        for part in query.lower().split():
+            if part.endswith("*") and len(part) > 1:
+                prefix = part[:-1]
+                clauses.append("SELECT doc FROM postings WHERE token >= ? AND token < ?")
+                params += [prefix, prefix + "\uffff"]
+                continue
+            for token in tokenize(part):
+                clauses.append("SELECT doc FROM postings WHERE token = ?")
+                params.append(token)
+        if not clauses:
+            return []
+        sql = "SELECT source, owner, data FROM docs WHERE id IN (" + " INTERSECT ".join(clauses) + ")"
+        if source:
+            sql += " AND source = ?"
+            params.append(source)
+        sql += " ORDER BY id LIMIT ?"
+        params.append(limit)
+        return self._rows(sql, params)
+
+    def prefix(self, url_or_urlkey, limit=100):
+        """Capturas cuja urlkey começa com o prefixo (URL, host/caminho ou SURT)."""
+        prefix = to_urlkey(url_or_urlkey)
+        # "host/" e "host)" devem casar com a raiz do host
+        if prefix.endswith(")/"):
+            prefix = prefix[:-1]
+        return self._rows(
+            "SELECT d.source, d.owner, d.data FROM urlkeys u JOIN docs d ON d.id = u.doc "
+            "WHERE u.urlkey >= ? AND u.urlkey < ? ORDER BY u.urlkey LIMIT ?",
+            (prefix, prefix + "\uffff", limit),
+        )
+
+    def close(self):
+        self.conn.close()
+
+
+def _print(results, started):
+    for r in results:
+        data = r["data"]
+        if r["source"] == "wayback":
+            line = f"{data[1]}  {data[4]:>3}  {data[2]}"
+        elif r["source"] == "crtsh":
+            line = f"crt.sh id={data.get('id')}  {(data.get('name_value') or '').replace(chr(10), ', ')}"
+        else:
+            line = f"WHOIS {data['domain']}"
+        print(f"[{r['source']}] {r['owner']}: {line}")
+    print(f"— {len(results)} resultado(s) em {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Índice local de capturas, certificados e WHOIS")
+    parser.add_argument("--index", default=INDEX_PATH, help="arquivo do índice (SQLite)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    build = sub.add_parser("build", help="indexa o relatório e/ou shards JSONL")
+    build.add_argument("--report", help="ferrana_report.json")
+    build.add_argument("--jsonl", nargs="*", default=[], help="arquivos gerados por batch_scan.py")
+    build.add_argument("--reset", action="store_true", help="apaga o índice antes")
+
+    query = sub.add_parser("query", help="busca por palavras / e-mails / hosts")
+    query.add_argument("text")
+    query.add_argument("--source", choices=["wayback", "crtsh", "whois"])
+    query.add_argument("--limit", type=int, default=50)
+
+    prefix = sub.add_parser("prefix", help="capturas debaixo de uma URL / caminho")
+    prefix.add_argument("url")
+    prefix.add_argument("--limit", type=int, default=100)
+
+    args = parser.parse_args(argv)
+    index = SearchIndex(args.index)
+    started = time.perf_counter()
+    try:
+        if args.cmd == "build":
+            if args.reset:
+                index.clear()
+            total = index.ingest_report(args.report) if args.report else 0
+            for path in args.jsonl:
+                total += index.ingest_jsonl(path)
+            print(f"✅ {total} registros lidos em {time.perf_counter() - started:.1f}s → {args.index}")
+        elif args.cmd == "query":
+            _print(index.search(args.text, source=args.source, limit=args.limit), started)
+        else:
+            _print(index.prefix(args.url, limit=args.limit), started)
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+# source_cdx.py
+# Fonte "cdx" (plugin de sources.py): todas as capturas de um domínio no
+# Archive.org, lidas em streaming página por página (cdx.py). É a fonte
+# usada pelo scanner (app.py) para o histórico de cada domínio.
+
+import cdx
+from sources import Record
+
+
+def search(domain, limit=None, get=None, collapse=None, from_ts=None, to_ts=None, fl=None, runs=False):
+    """Records das capturas de domain/*; runs=True junta as versões repetidas (cdx.collapse_runs)."""
+    rows = cdx.iter_captures(f"{domain}/*", fl=fl, collapse=collapse, from_ts=from_ts, to_ts=to_ts, get=get)
+    if runs:
+        rows = cdx.collapse_runs(rows)
+    for row in rows:
+        if fl or len(row) < 3:
+            # campos escolhidos pelo chamador: a linha inteira é a chave
+            yield Record('cdx', 'capture', " ".join(row), data=row)
+            continue
+        yield Record('cdx', 'capture', f"{row[1]} {row[2]}", url=f"https://web.archive.org/web/{row[1]}/{row[2]}",
+                     timestamp=row[1], data=row)
+
+
+def summary(records):
+    return (len(records) > 0, len(records), f'Capturas do domínio: {len(records)}',
+            [r.url for r in records[:30] if r.url])
@@ -0,0 +1,82 @@
+# source_commoncrawl.py
+# Fonte "commoncrawl" (plugin de sources.py): capturas de um domínio nos
+# índices do Common Crawl (index.commoncrawl.org), lidas em streaming.
+#
+# collinfo.json lista os índices (um por crawl, do mais novo ao mais antigo);
+# cada índice responde a ?url=dominio/*&output=json com uma captura JSON por
+# linha, ou 404 quando o domínio não aparece naquele crawl. Por padrão só os
+# COLLECTIONS crawls mais recentes são consultados.
+
+import json
+from urllib.parse import urlencode
+
+import cache
+import http_client
+import metrics
+from sources import Record
+
+INDEX_URL = "https://index.commoncrawl.org"
+DATA_URL = "https://data.commoncrawl.org"
+COLLECTIONS = 3
+
+
+def _default_get(url):
+    return http_client.get(url, timeout=60, stream=True)
+
+
+def collections(get=None):
+    """Ids dos índices publicados, do mais novo ao mais antigo (em cache por um dia)."""
+
+    def fetch():
+        r = (get or _default_get)(f"{INDEX_URL}/collinfo.json")
+        if r is None:
+            raise IOError("collinfo.json: sem resposta")
+        try:
+            if r.status_code != 200:
+                raise IOError(f"collinfo.json: status {r.status_code}")
+            return [c["id"] for c in r.json()]
+        finally:
+            r.close()
+
+    return cache.cached("commoncrawl", "collinfo", fetch) or []
+
+
+def _captures(coll, domain, limit, get):
+    params = [("url", f"{domain}/*"), ("output", "json")]
+    if limit:
+        params.append(("limit", limit))
+    r = get(f"{INDEX_URL}/{coll}-index?{urlencode(params)}")
+    if r is None:
+        raise IOError(f"{coll}: sem resposta")
+    received = 0
+    try:
+        if r.status_code == 404:
+            return  # nenhuma captura neste crawl
+        if r.status_code != 200:
+            raise IOError(f"{coll}: status {r.status_code}")
+        for line in r.iter_lines(decode_unicode=True):
+            received += len(line) + 1
+            if line:
+                yield json.loads(line)
+    finally:
+        r.close()
+        if "Content-Length" not in r.headers:
+            metrics.add_bytes("commoncrawl", received)
+
+
+def search(domain, limit=None, get=None, collections_count=COLLECTIONS):
+    """Records das capturas de domain/* nos crawls mais recentes."""
+    get = get or _default_get
+    for coll in collections(get)[:collections_count]:
+        for cap in _captures(coll, domain, limit, get):
+            url = cap.get("url")
+            ts = cap.get("timestamp")
+            filename = cap.get("filename")
+            yield Record('commoncrawl', 'capture', f"{coll} {ts} {url}", title=coll,
+                         url=f"{DATA_URL}/{filename}" if filename else url, timestamp=ts, data=cap)
+
+
+def summary(records):
+    # the same page is usually in several crawls: one link per URL
+    links = list(dict.fromkeys(r.data.get("url") for r in records if r.data.get("url")))
+    return (len(records) > 0, len(records), f'Capturas no Common Crawl: {len(records)}', links[:30])
@@ -0,0 +1,41 @@
+# source_crtsh.py
+# Fonte "crtsh" (plugin de sources.py): certificados emitidos cujos nomes
+# DNS contêm o termo.
+
+from urllib.parse import quote
+
+import crtsh
+import http_client
+from sources import Incomplete, Record
+
+
+def _default_get(url):
+    return http_client.get(url, timeout=20, stream=True)
+
+
+def search(term, limit=None, get=None, max_depth=crtsh.MAX_DEPTH, max_queries=crtsh.MAX_QUERIES):
+    """Certificados streamed and deduplicated; terms too broad for one response are split (crtsh.py).
+
+    Sub-queries that still failed end the search with Incomplete(missing=query.missing).
+    """
+    query = crtsh.CrtShQuery(term, max_depth=max_depth, max_queries=max_queries, get=get or _default_get)
+    for cert in query:
+        cid = cert.get('id')
+        yield Record('crtsh', 'certificate', str(cid) if cid is not None else cert.get('serial_number'),
+                     title=cert.get('common_name'), url=f'https://crt.sh/?id={cid}' if cid is not None else None,
+                     timestamp=cert.get('entry_timestamp'), data=cert)
+    if query.missing:
+        # partial results are returned but never cached; with none at all the search fails
+        raise Incomplete(f"crt.sh indisponível para {', '.join(query.missing[:5])}", query.missing)
+
+
+def summary(records):
+    # reduce to unique names
+    domains = set()
+    for r in records:
+        nv = r.data.get('name_value')
+        if nv:
+            for d in nv.split('\n'):
+                domains.add(d.strip())
+    return (len(domains)>0, len(domains), f'Domínios certificados encontrados: {len(domains)}',
+            [f'https://crt.sh/?q={quote(d)}' for d in list(domains)[:20]])
@@ -0,0 +1,27 @@
+# source_oocities.py
+# Fonte "oocities" (plugin de sources.py): páginas dos espelhos do Geocities
+# que citam o termo.
+
+import http_client
+import metrics
+import oocities
+from sources import Record
+
+
+def _default_get(url):
+    return http_client.get(url, timeout=15)
+
+
+def search(term, limit=None, get=None):
+    """oocities mirror search: all result pages, fetched concurrently (oocities.py)."""
+    crawler = oocities.OocitiesCrawler(term, get=get or _default_get)
+    hits = crawler.run()
+    for e in crawler.errors:
+        metrics.failure('oocities', e)
+    for h in hits:
+        yield Record('oocities', 'page', oocities.normalize_url(h['url']), title=h.get('title'), url=h['url'])
+
+
+def summary(records):
+    return (len(records)>0, len(records), f'Páginas mirror encontradas: {len(records)}',
+            [r.url for r in records[:30]])
@@ -0,0 +1,80 @@
+# source_wayback.py
+# Fonte "wayback" (plugin de sources.py): capturas do Archive.org para os
+# endereços pessoais típicos dos anos 90 que contêm o termo.
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import http_client
+import metrics
+from sources import Record
+
+# CDX host probes share the web.archive.org keep-alive pool from http_client
+WAYBACK_HOST_WORKERS = 8
+MAX_RESULTS = 50
+_wayback_executor = ThreadPoolExecutor(max_workers=WAYBACK_HOST_WORKERS)
+
+
+def _default_get(url):
+    return http_client.get(url, timeout=20)
+
+
+def _wayback_probe(h, max_results, get):
+    # collapse=digest: the CDX server drops consecutive captures of identical content
+    url = f"http://web.archive.org/cdx/search/cdx?url={h}/*&output=json&limit={max_results}&collapse=digest"
+    r = get(url)
+    if r.status_code==200:
+        data = r.json()
+        if len(data)>1:
+            return data[1:]
+    else:
+        metrics.failure('wayback', f'status {r.status_code}')
+    return []
+
+
+def search(term, limit=None, get=None):
+    """Try to find Archive.org captures for likely URL patterns containing the term.
+    We will query CDX for common hostnames and for wildcard attempts.
+    All host patterns are probed in parallel; captures are deduplicated as they
+    arrive and we stop as soon as limit unique captures were yielded.
+    """
+    max_results = limit or MAX_RESULTS
+    get = get or _default_get
+    # common host patterns used in 90s
+    hosts = [
+        f"www.uol.com.br/~{term}",
+        f"www.geocities.com/{term}",
+        f"br.geocities.com/{term}",
+        f"oocities.org/*{term}*",
+        f"usuarios.terra.com.br/{term}",
+        f"members.aol.com/{term}",
+        f"www.tripod.com/{term}",
+        f"www.ibiblio.org/{term}",
+    ]
+    seen = set()
+    futures = [_wayback_executor.submit(_wayback_probe, h, max_results, get) for h in hosts]
+    try:
+        for fut in as_completed(futures):
+            try:
+                rows = fut.result()
+            except Exception as e:
+                # transient errors don't stop the other probes, but are counted
+                metrics.failure('wayback', e)
+                continue
+            for row in rows:
+                if len(row) < 3:
+                    continue
+                key = f"{row[1]} {row[2]}"
+                if key not in seen:
+                    seen.add(key)
+                    yield Record('wayback', 'capture', key, url=f"https://web.archive.org/web/{row[1]}/{row[2]}",
+                                 timestamp=row[1], data=row)
+                    if len(seen) >= max_results:
+                        return
+    finally:
+        for fut in futures:
+            fut.cancel()
+
+
+def summary(records):
+    return (len(records)>0, len(records), f'Capturas encontradas: {len(records)}',
+            [r.url for r in records if r.url])
@@ -0,0 +1,18 @@
+# source_whois.py
+# Fonte "whois" (plugin de sources.py): registro do domínio consultado
+# direto na porta 43 (whois_engine.py, que tem cache próprio).
+
+import whois_engine
+from sources import Record
+
+
+def search(domain, limit=None, get=None):
+    """Um Record com o registro estruturado; data["raw"] guarda a resposta do servidor."""
+    record = whois_engine.lookup(domain)
+    yield Record('whois', 'whois', domain, title=whois_engine.format_record(record), data=record)
+
+
+def summary(records):
+    # the UI shows the formatted summary
+    text = records[0].title if records and records[0].data.get('found') else None
+    return (bool(text), 1 if text else 0, str(text)[:500] if text else 'nenhum whois', [])
@@ -0,0 +1,274 @@
+# sources.py
+# Interface única das fontes de busca (backends) e registro dos plugins,
+# usada por app.py, finder.py e finder_web_ui.py.
+#
+# Cada fonte é declarada com um Backend:
+#   kinds         tipos de consulta que ela responde (query_analysis: domain, email, name, term)
+#   form          o que ela recebe da consulta: "domain", "dns" (domínio ou termo com
+#                 pontos e hífens), "slug" (termo compacto para URLs) ou "text"
+#   hosts         hosts consultados; rate_limit (req/s inicial, máxima) entra no
+#                 ratelimit.py para hosts que ele ainda não conhece
+#   concurrency   buscas simultâneas da fonte por processo
+#   cost          requisições esperadas por busca (as mais baratas saem primeiro)
+#   streaming     os registros saem enquanto a resposta chega (limit fecha a conexão cedo)
+#   cache         fonte no cache persistente (cache.py) ou None (só single-flight)
+#   default       entra nas buscas que não escolhem fontes
+# e implementada num módulo source_*.py com
+#   search(valor, limit=None, get=None, **opções) -> gera Records; se parte da
+#                 busca falhar, levanta Incomplete no fim (o que já saiu vale)
+#   summary(records) -> (encontrado, quantidade, resumo, links)   (opcional, interface web)
+# O módulo só é importado na primeira busca da fonte.
+#
+# Uso:
+#   backend = sources.get("crtsh")
+#   for rec in backend.results("damabolsas.com.br"):
+#       rec.kind, rec.key, rec.url, rec.data
+#   sources.register(sources.Backend("minhafonte", "minha fonte", "source_minhafonte", kinds=("domain",)))
+
+import importlib
+import itertools
+import threading
+
+import cache
+import metrics
+from ratelimit import limiter
+
+ALL_KINDS = ("domain", "email", "name", "term")
+# entra na chave do cache: listas de Records não se confundem com entradas antigas
+RECORD_FORMAT = "r1"
+
+
+class SourceError(Exception):
+    pass
+
+
+class Incomplete(SourceError):
+    """Levantada por search() depois dos Records que conseguiu: faltaram as partes em missing."""
+
+    def __init__(self, message, missing=()):
+        super().__init__(message)
+        self.missing = list(missing)
+
+
+class Results(list):
+    """Records de uma busca; missing lista o que a fonte não entregou (vazia = busca completa)."""
+
+    def __init__(self, records=(), missing=()):
+        super().__init__(records)
+        self.missing = list(missing)
+
+
+class Record:
+    """Um resultado de qualquer fonte (capture, certificate, page ou whois)."""
+
+    __slots__ = ("source", "kind", "key", "title", "url", "timestamp", "data")
+
+    def __init__(self, source, kind, key, title=None, url=None, timestamp=None, data=None):
+        self.source = source
+        self.kind = kind
+        self.key = key            # identificador único dentro da fonte (deduplicação)
+        self.title = title
+        self.url = url            # link para ver o resultado
+        self.timestamp = timestamp
+        self.data = data          # campos originais da fonte (linha do CDX, certificado, registro WHOIS)
+
+    def pack(self):
+        """Forma compacta (lista) gravada no cache."""
+        return [self.kind, self.key, self.title, self.url, self.timestamp, self.data]
+
+    @classmethod
+    def unpack(cls, source, item):
+        return cls(source, *item)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"Record({self.source}, {self.kind}, {self.key!r})"
+
+
+def _cache_key(value, limit, options):
+    parts = [RECORD_FORMAT, str(value)]
+    parts += [f"{k}={v}" for k, v in sorted(options.items()) if v is not None and v is not False]
+    if limit:
+        parts.append(f"limit={limit}")
+    return "|".join(parts)
+
+
+class Backend:
+    """Declaração de uma fonte; o módulo com a implementação é importado no primeiro uso."""
+
+    def __init__(self, name, label, module, description=None, kinds=ALL_KINDS, form="text",
+                 skip_free_mail=False, hosts=(), rate_limit=None, concurrency=4, cost=1,
+                 streaming=False, cache=None, default=True):
+        self.name = name
+        self.label = label
+        self.module = module
+        self.description = description or label
+        self.kinds = tuple(kinds)
+        self.form = form
+        self.skip_free_mail = skip_free_mail
+        self.hosts = tuple(hosts)
+        self.rate_limit = rate_limit
+        self.concurrency = concurrency
+        self.cost = cost
+        self.streaming = streaming
+        self.cache = cache
+        self.default = default
+        # falhas contam na mesma fonte das requisições (cdx -> wayback)
+        self.metric = metrics.source_of(f"http://{self.hosts[0]}/") if self.hosts else name
+        self._plugin = None
+        self._lock = threading.Lock()
+
+    def value_for(self, query):
+        """O que mandar para esta fonte a partir de um query_analysis.Query, ou None."""
+        if query.kind not in self.kinds:
+            return None
+        if self.skip_free_mail and query.free_mail:
+            return None
+        return query.form(self.form) or None
+
+    @property
+    def plugin(self):
+        if self._plugin is None:
+            with self._lock:
+                if self._plugin is None:
+                    self._plugin = importlib.import_module(self.module)
+        return self._plugin
+
+    @property
+    def loaded(self):
+        return self._plugin is not None
+
+    def search(self, value, limit=None, get=None, **options):
+        """Records direto da fonte, sem cache (gerador); SourceError se a fonte falhar.
+
+        É o caminho para varreduras grandes: nada é acumulado nem gravado no cache.
+        """
+        records = None
+        try:
+            records = self.plugin.search(value, limit=limit, get=get, **options)
+            yield from (itertools.islice(records, limit) if limit else records)
+        except SourceError:
+            raise
+        except Exception as e:
+            metrics.failure(self.metric, e)
+            raise SourceError(f"{self.label}: {e}") from e
+        finally:
+            close = getattr(records, "close", None)
+            if close:
+                close()  # limit atingido (ou o chamador parou): encerra a resposta em streaming
+
+    def results(self, value, limit=None, get=None, **options):
+        """Results (lista de Records) com cache ou single-flight; SourceError se a fonte falhar.
+
+        Uma busca incompleta (Incomplete com algum Record) é devolvida com
+        Results.missing preenchido e não é gravada no cache; listas grandes
+        demais para o cache (cache.MAX_VALUE_BYTES) também não.
+        """
+
+        def fetch():
+            packed = []
+            try:
+                for r in self.search(value, limit=limit, get=get, **options):
+                    packed.append(r.pack())
+            except Incomplete as e:
+                metrics.failure(self.metric, "partial" if packed else e)
+                if not packed:
+                    raise
+                return cache.Partial(packed, e.missing)
+            return packed
+
+        key = _cache_key(value, limit, options)
+        if self.cache:
+            packed = cache.cached(self.cache, key, fetch)
+        else:
+            packed = cache.coalesce(self.name, key, fetch)
+        missing = []
+        if isinstance(packed, cache.Partial):
+            packed, missing = packed.value, packed.missing
+        return Results((Record.unpack(self.name, item) for item in packed or []), missing)
+
+    def summary(self, records):
+        """(encontrado, quantidade, resumo, links) para a interface web."""
+        hook = getattr(self.plugin, "summary", None)
+        if hook is not None:
+            return hook(records)
+        return (bool(records), len(records), f"Resultados encontrados: {len(records)}",
+                [r.url for r in records[:30] if r.url])
+
+    def describe(self):
+        return {
+            "name": self.name, "label": self.label, "description": self.description,
+            "kinds": list(self.kinds), "hosts": list(self.hosts),
+            "rate_limits": {h: list(limiter.limit(h)) for h in self.hosts},
+            "concurrency": self.concurrency, "cost": self.cost, "streaming": self.streaming,
+            "cached": bool(self.cache), "default": self.default, "loaded": self.loaded,
+        }
+
+
+BACKENDS = {}
+_lock = threading.Lock()
+
+
+def register(backend):
+    """Acrescenta (ou substitui) uma fonte."""
+    with _lock:
+        if backend.rate_limit:
+            for host in backend.hosts:
+                limiter.register(host, backend.rate_limit)
+        BACKENDS[backend.name] = backend
+    return backend
+
+
+def get(name):
+    return BACKENDS[name]
+
+
+def names(default_only=False):
+    return [name for name, b in BACKENDS.items() if b.default or not default_only]
+
+
+def loaded():
+    return [name for name, b in BACKENDS.items() if b.loaded]
+
+
+def select(query, wanted=None):
+    """Backends que respondem à consulta, dos mais baratos aos mais caros."""
+    if wanted is None:
+        wanted = names(default_only=True)
+    chosen = [BACKENDS[n] for n in wanted if n in BACKENDS and BACKENDS[n].value_for(query)]
+    return sorted(chosen, key=lambda b: b.cost)
+
+
+def entry(name, value, **options):
+    """Resumo de uma busca no formato da interface web."""
+    backend = BACKENDS[name]
+    results = backend.results(value, **options)
+    found, count, summary, links = backend.summary(results)
+    if results.missing:
+        summary += f" (parcial: {len(results.missing)} consultas faltando)"
+    return {'source': backend.label, 'found': found, 'count': count, 'summary': summary, 'links': links}
+
+
+register(Backend(
+    "wayback", "wayback", "source_wayback", "Wayback (Archive.org)",
+    form="slug", hosts=("web.archive.org",), concurrency=4, cost=8, cache="wayback_term"))
+register(Backend(
+    "cdx", "wayback (domínio)", "source_cdx", "Wayback: capturas do próprio domínio",
+    kinds=("domain",), form="domain", hosts=("web.archive.org",), concurrency=4, cost=1,
+    streaming=True, cache="wayback", default=False))
+register(Backend(
+    "crtsh", "crt.sh", "source_crtsh", "crt.sh (certificados)",
+    kinds=("domain", "email", "term"), form="dns", skip_free_mail=True, hosts=("crt.sh",),
+    concurrency=2, cost=1, streaming=True, cache="crtsh"))
+register(Backend(
+    "oocities", "oocities", "source_oocities", "Oocities / Geocities mirrors",
+    form="text", hosts=("oocities.org",), concurrency=4, cost=5))
+register(Backend(
+    "whois", "whois", "source_whois", "WHOIS (domínios)",
+    kinds=("domain", "email"), form="domain", skip_free_mail=True, concurrency=4, cost=1))
+register(Backend(
+    "commoncrawl", "commoncrawl", "source_commoncrawl", "Common Crawl (índice de capturas)",
+    kinds=("domain",), form="domain", hosts=("index.commoncrawl.org",), rate_limit=(1.0, 5.0),
+    concurrency=2, cost=3, streaming=True, cache="commoncrawl", default=False))
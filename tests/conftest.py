@@ -0,0 +1,51 @@
+# conftest.py
+# Os módulos do projeto ficam na raiz do repositório (sem pacote): os testes
+# importam direto de lá, como os scripts fazem.
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+class FakeResponse:
+    """Resposta HTTP mínima (requests.Response em stream) servida de bytes em memória."""
+
+    def __init__(self, body=b"", status_code=200, chunk_size=7, headers=None):
+        self.body = body.encode("utf-8") if isinstance(body, str) else body
+        self.status_code = status_code
+        self.chunk_size = chunk_size
+        self.headers = headers or {}
+        self.closed = False
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.body), self.chunk_size):
+            yield self.body[i:i + self.chunk_size]
+
+    def iter_lines(self, decode_unicode=False):
+        for line in self.body.splitlines():
+            yield line.decode("utf-8") if decode_unicode else line
+
+    def json(self):
+        import json
+        return json.loads(self.body)
+
+    @property
+    def text(self):
+        return self.body.decode("utf-8")
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def response_cache(tmp_path, monkeypatch):
+    """Cache persistente isolado num arquivo temporário (cache.cached usa este)."""
+    import cache
+    store = cache.ResponseCache(str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(cache, "_default", store)
+    return store
@@ -0,0 +1,75 @@
+import app
+import sources
+
+ROW = ["br,com,a)/", "20140101000000", "http://a.com.br/", "text/html", "200",
+       "3I42H3S6NNFQ2MSVX7XZKYAYSCX5QBYJ", "100"]
+
+
+def _row(ts):
+    return [ROW[0], ts] + ROW[2:]
+
+
+def test_merge_wayback_streams_new_rows_into_the_table(monkeypatch):
+    calls = []
+
+    def fake_iter(domain, collapse=None, from_ts=None, to_ts=None, fl=None, runs=False):
+        calls.append(from_ts)
+        yield _row("20140101000000")   # from= é inclusivo: a última captura volta
+        yield _row("20150101000000")
+
+    monkeypatch.setattr(app, "iter_wayback", fake_iter)
+    table, added = app.merge_wayback([_row("20140101000000")], "a.com.br")
+    assert calls == [20140101000000]
+    assert added == 1
+    assert [c.timestamp for c in table] == [20140101000000, 20150101000000]
+
+
+def test_merge_wayback_keeps_previous_rows_when_cdx_fails(monkeypatch):
+    def failing(domain, **kwargs):
+        yield _row("20150101000000")
+        raise sources.SourceError("wayback (domínio): CDX indisponível")
+
+    monkeypatch.setattr(app, "iter_wayback", failing)
+    table, added = app.merge_wayback([_row("20140101000000")], "a.com.br")
+    assert added == 0
+    assert [c.timestamp for c in table] == [20140101000000]
+
+
+def test_saved_captures_are_used_by_the_viewer(tmp_path, monkeypatch):
+    import captures
+    import report_viewer
+
+    json_path, capt_path = tmp_path / "report.json", tmp_path / "report.capt"
+    report = {"wayback": {"a.com.br": captures.CaptureTable.from_rows([_row("20140101000000"), _row("20150101000000")])},
+              "crtsh": {}, "whois": {}, "meta": {"whois_checked": {}}}
+    app.save_report(report, json_path, capt_path)
+    assert captures.is_current(capt_path, json_path)
+
+    loaded = []
+
+    def spy(path, use_mmap=True):
+        loaded.append(path)
+        return captures.load_captures(path, use_mmap)
+
+    monkeypatch.setattr(report_viewer, "load_captures", spy)
+    assert report_viewer.main(json_path, capt_path, tmp_path / "out.html") in (None, 0)
+    assert "a.com.br" in (tmp_path / "out.html").read_text("utf-8")
+    assert loaded == [capt_path]
+
+    # um JSON regravado sem o .capt não casa mais com o carimbo
+    json_path.write_text(json_path.read_text("utf-8").replace("20150101000000", "20160101000000"), "utf-8")
+    assert not captures.is_current(capt_path, json_path)
+
+
+def test_retry_request_closes_responses_it_does_not_return(monkeypatch):
+    import http_client
+    from conftest import FakeResponse
+
+    responses = [FakeResponse("", 503, headers={"Retry-After": "0"}), FakeResponse("", 500), FakeResponse("ok")]
+    monkeypatch.setattr(http_client, "get", lambda url, timeout=None, stream=False: responses.pop(0))
+    monkeypatch.setattr(app.time, "sleep", lambda s: None)
+    monkeypatch.setattr(app, "log", lambda msg: None)
+    kept = list(responses)
+    r = app.retry_request("http://web.archive.org/cdx", stream=True)
+    assert r is kept[2] and not r.closed
+    assert kept[0].closed and kept[1].closed
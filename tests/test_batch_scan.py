@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import batch_scan
+import metrics
+import sources
+
+
+@pytest.fixture
+def in_process(monkeypatch):
+    # threads instead of processes, so the patched scan_item is the one that runs
+    monkeypatch.setattr(batch_scan, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(batch_scan, "_init_worker", lambda workers: None)
+
+
+def test_failed_items_stay_out_of_checkpoint(tmp_path, monkeypatch, in_process):
+    fail = {"b.com.br"}
+
+    def scan_item(kind, item, wanted):
+        if item in fail:
+            raise sources.SourceError("wayback (domínio): CDX indisponível")
+        return {"kind": kind, "item": item, "wayback": []}, metrics.Metrics().snapshot()
+
+    monkeypatch.setattr(batch_scan, "scan_item", scan_item)
+    jobs = [("domain", "a.com.br"), ("domain", "b.com.br")]
+    assert batch_scan.run(jobs, tmp_path, 2, 2, ("wayback",)) == 1
+    assert batch_scan.load_checkpoint(tmp_path / batch_scan.CHECKPOINT_FILE) == {("domain", "a.com.br")}
+
+    fail.clear()
+    assert batch_scan.run(jobs, tmp_path, 2, 2, ("wayback",)) == 0
+    assert batch_scan.load_checkpoint(tmp_path / batch_scan.CHECKPOINT_FILE) == set(jobs)
+    lines = sum(len(p.read_text("utf-8").splitlines()) for p in tmp_path.glob("shard-*.jsonl"))
+    assert lines == 2
+
+
+def test_scan_item_propagates_source_errors(monkeypatch):
+    class Failing:
+        def results(self, *args, **kwargs):
+            raise sources.SourceError("crt.sh: indisponível")
+
+    monkeypatch.setitem(sources.BACKENDS, "crtsh", Failing())
+    with pytest.raises(sources.SourceError):
+        batch_scan.scan_item("term", "dama", ("crtsh",))
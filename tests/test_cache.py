@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+import cache
+
+
+@pytest.fixture
+def store(tmp_path):
+    return cache.ResponseCache(str(tmp_path / "c.sqlite3"), ttls={"t": (10, 20)})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_fresh_stale_and_expired(store, clock):
+    store.set("t", "Dama  Bolsas", [1, 2])
+    assert store.get("t", "dama bolsas") == ([1, 2], "fresh")
+    clock[0] += 15
+    assert store.get("t", "dama bolsas") == ([1, 2], "stale")
+    clock[0] += 20
+    assert store.get("t", "dama bolsas") == (None, None)
+
+
+def test_stale_value_is_served_and_revalidated(store, clock):
+    store.set("t", "q", "velho")
+    clock[0] += 15
+    refreshed = threading.Event()
+
+    def fetch():
+        refreshed.set()
+        return "novo"
+
+    assert store.cached("t", "q", fetch) == "velho"
+    assert refreshed.wait(5)
+    deadline = time.monotonic() + 5
+    while store.get("t", "q")[0] != "novo" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.get("t", "q") == ("novo", "fresh")
+
+
+def test_none_errors_and_partial_are_not_stored(store):
+    assert store.cached("t", "a", lambda: None) is None
+    with pytest.raises(RuntimeError):
+        store.cached("t", "b", lambda: (_ for _ in ()).throw(RuntimeError("x")))
+    partial = store.cached("t", "c", lambda: cache.Partial([1], ["%c%"]))
+    assert isinstance(partial, cache.Partial) and partial.missing == ["%c%"]
+    assert [store.get("t", k) for k in "abc"] == [(None, None)] * 3
+
+
+def test_single_flight_shares_one_call_and_its_error():
+    flight = cache.SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "valor"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", slow)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(flight.do("k", slow)))
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert calls == [1]
+    assert sorted(results) == [("valor", False), ("valor", True)]
+
+    with pytest.raises(ValueError):
+        flight.do("e", lambda: (_ for _ in ()).throw(ValueError("falha")))
+
+
+def test_byte_budget_evicts_least_recently_used(tmp_path, clock):
+    store = cache.ResponseCache(str(tmp_path / "c.sqlite3"), ttls={"t": (100, 100)}, max_bytes=5000)
+
+    def put(i):
+        clock[0] += 1
+        store.set("t", f"k{i}", "x" * 998)   # 1000 bytes em JSON
+
+    for i in range(4):
+        put(i)
+    clock[0] += 1
+    assert store.get("t", "k0")[0] is not None   # k0 volta a ser a mais recente
+    for i in range(4, 7):
+        put(i)
+    kept = [i for i in range(7) if store.get("t", f"k{i}")[0] is not None]
+    assert kept == [0, 3, 4, 5, 6]
+    (total,) = store._conn.execute("SELECT SUM(size) FROM cache").fetchone()
+    assert total <= 5000
+
+
+def test_reads_are_batched(store, monkeypatch):
+    monkeypatch.setattr(cache, "TOUCH_BATCH", 3)
+    for k in "abc":
+        store.set("t", k, 1)
+    before = store._conn.total_changes
+    store.get("t", "a")
+    store.get("t", "a")
+    store.get("t", "b")
+    assert store._conn.total_changes == before   # nenhuma escrita por leitura
+    store.get("t", "c")
+    assert store._conn.total_changes == before + 3
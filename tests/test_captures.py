@@ -0,0 +1,39 @@
+import base64
+
+import pytest
+
+from captures import CaptureTable, load_captures, save_captures
+
+DIGEST = base64.b32encode(bytes(range(20))).decode("ascii")
+ROWS = [
+    ["br,com,dama)/", "20200101000000", "http://dama.com.br/", "text/html", "200", DIGEST, "1234"],
+    ["br,com,dama)/a", "20200102000000", "http://dama.com.br/ação", "text/html", "404", "SEMDIGEST", "-",
+     "20210102000000", 5],
+    ["br,com,dama)/b.png", "20200103000000", "http://dama.com.br/b.png", "image/png", "200", DIGEST, "99"],
+]
+
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_capt_round_trip(tmp_path, use_mmap):
+    path = tmp_path / "report.capt"
+    save_captures({"dama.com.br": CaptureTable.from_rows(ROWS), "vazio.com.br": CaptureTable()}, path)
+    tables = load_captures(path, use_mmap=use_mmap)
+    assert list(tables) == ["dama.com.br", "vazio.com.br"]
+    dama = tables["dama.com.br"]
+    assert list(dama.rows()) == ROWS
+    assert dama[-1].mimetype == "image/png" and dama[1].count == 5
+    assert (dama.max_timestamp(), dama.total_captures()) == (20210102000000, 7)
+    assert len(tables["vazio.com.br"]) == 0 and tables["vazio.com.br"].max_timestamp() is None
+
+
+def test_loaded_table_can_be_saved_again(tmp_path):
+    save_captures({"dama.com.br": CaptureTable.from_rows(ROWS)}, tmp_path / "a.capt")
+    save_captures(load_captures(tmp_path / "a.capt", use_mmap=False), tmp_path / "b.capt")
+    assert (tmp_path / "a.capt").read_bytes() == (tmp_path / "b.capt").read_bytes()
+
+
+def test_not_a_capture_file(tmp_path):
+    path = tmp_path / "report.capt"
+    path.write_bytes(b"{}" * 8)
+    with pytest.raises(ValueError):
+        load_captures(path)
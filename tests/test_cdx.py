@@ -0,0 +1,80 @@
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+import cdx
+from conftest import FakeResponse
+
+CAPTURES = [
+    f"br,com,loja)/p{i // 3} 2020010{i % 3 + 1}000000 http://loja.com.br/p{i // 3} text/html 200 D{i // 3} 100"
+    for i in range(7)
+]
+
+
+class FakeCDX:
+    """Servidor CDX em memória: páginas de page_size linhas, resumeKey no fim de cada uma."""
+
+    def __init__(self, rows, fail_on_page=None):
+        self.rows = rows
+        self.fail_on_page = fail_on_page
+        self.calls = []
+        self.responses = []
+
+    def __call__(self, url):
+        params = {k: v[0] for k, v in parse_qs(urlsplit(url).query).items()}
+        self.calls.append(params)
+        if len(self.calls) == self.fail_on_page:
+            return FakeResponse("", status_code=503)
+        start = int(params.get("resumeKey", "k0")[1:])
+        end = start + int(params["limit"])
+        body = "\n".join(self.rows[start:end]) + "\n"
+        if end < len(self.rows):
+            body += f"\nk{end}\n"
+        self.responses.append(FakeResponse(body))
+        return self.responses[-1]
+
+
+def test_pages_follow_the_resume_key():
+    server = FakeCDX(CAPTURES)
+    rows = list(cdx.iter_captures("loja.com.br/*", page_size=3, get=server))
+    assert [" ".join(r) for r in rows] == CAPTURES
+    assert [c.get("resumeKey") for c in server.calls] == [None, "k3", "k6"]
+    assert all(c["showResumeKey"] == "true" for c in server.calls)
+    assert all(r.closed for r in server.responses)
+
+
+def test_max_pages_and_server_filters():
+    server = FakeCDX(CAPTURES)
+    rows = list(cdx.iter_captures("loja.com.br/*", collapse="digest", from_ts="2020", page_size=3,
+                                  max_pages=2, get=server))
+    assert len(rows) == 6
+    assert server.calls[0]["collapse"] == "digest" and server.calls[0]["from"] == "2020"
+
+
+def test_failed_page_raises_after_what_was_read():
+    rows = []
+    with pytest.raises(cdx.CDXError):
+        for row in cdx.iter_captures("loja.com.br/*", page_size=3, get=FakeCDX(CAPTURES, fail_on_page=2)):
+            rows.append(row)
+    assert len(rows) == 3
+
+
+def test_collapse_runs():
+    rows = [r.split(" ") for r in CAPTURES]
+    runs = list(cdx.collapse_runs(rows))
+    assert [len(r) for r in runs] == [9, 9, 7]
+    assert runs[0][1:2] + runs[0][7:] == ["20200101000000", "20200103000000", 3]
+
+
+def test_error_page_is_closed_before_raising():
+    server = FakeCDX(CAPTURES, fail_on_page=1)
+    failed = []
+
+    def get(url):
+        r = server(url)
+        failed.append(r)
+        return r
+
+    with pytest.raises(cdx.CDXError):
+        list(cdx.iter_captures("loja.com.br/*", get=get))
+    assert failed[0].status_code == 503 and failed[0].closed
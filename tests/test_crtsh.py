@@ -0,0 +1,103 @@
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+import crtsh
+import sources
+from conftest import FakeResponse
+
+
+def _cert(i, name):
+    return {"id": i, "issuer_ca_id": 1, "serial_number": f"{i:x}", "common_name": name, "name_value": name}
+
+
+class FakeCrtSh:
+    """pattern -> certificados; padrões em `broken` respondem 503 (resposta grande demais)."""
+
+    def __init__(self, data, broken=()):
+        self.data = data
+        self.broken = set(broken)
+        self.patterns = []
+
+    def __call__(self, url):
+        pattern = parse_qs(urlsplit(url).query)["q"][0]
+        self.patterns.append(pattern)
+        if pattern in self.broken:
+            return FakeResponse(b"", status_code=503)
+        return FakeResponse(json.dumps(self.data.get(pattern, [])), chunk_size=5)
+
+
+def test_single_query_is_streamed_and_deduplicated():
+    get = FakeCrtSh({"%dama%": [_cert(1, "dama.com.br"), _cert(1, "dama.com.br"), _cert(2, "ção.dama.br")]})
+    query = crtsh.CrtShQuery("dama", get=get)
+    assert [c["id"] for c in query] == [1, 2]
+    assert query.missing == [] and get.patterns == ["%dama%"]
+
+
+def test_broad_term_is_split_into_subqueries():
+    data = {"%da": [_cert(1, "da.com")], "%daa%": [_cert(2, "daa.com"), _cert(1, "da.com")], "%da-%": [_cert(3, "da-x.com")]}
+    get = FakeCrtSh(data, broken={"%da%"})
+    query = crtsh.CrtShQuery("da", max_depth=1, get=get)
+    assert sorted(c["id"] for c in query) == [1, 2, 3]
+    assert query.missing == ["%da[outros]%"]
+    assert get.patterns[:2] == ["%da%", "%da"]
+    assert len(get.patterns) == 2 + len(crtsh.SPLIT_CHARS)
+
+
+def test_failed_subqueries_are_reported_as_missing():
+    get = FakeCrtSh({"%da": [_cert(1, "da.com")]}, broken={"%da%", "%daa%"})
+    query = crtsh.CrtShQuery("da", max_depth=1, get=get)
+    assert [c["id"] for c in query] == [1]
+    assert query.missing == ["%da[outros]%", "%daa%"]
+
+    query = crtsh.CrtShQuery("da", max_depth=0, get=FakeCrtSh({}, broken={"%da%"}))
+    assert list(query) == [] and query.missing == ["%da%"]
+
+
+def test_partial_result_reaches_caller_but_not_cache(response_cache):
+    get = FakeCrtSh({"%da": [_cert(1, "da.com")]}, broken={"%da%", "%daa%"})
+    backend = sources.get("crtsh")
+    results = backend.results("da", get=get, max_depth=1)
+    assert [r.key for r in results] == ["1"]
+    assert results.missing == ["%da[outros]%", "%daa%"]
+    assert response_cache.get("crtsh", sources._cache_key("da", None, {"max_depth": 1})) == (None, None)
+
+    # every sub-query answered, but a split never covers every identity
+    get.broken.discard("%daa%")
+    assert backend.results("da", get=get, max_depth=1).missing == ["%da[outros]%"]
+    assert response_cache.get("crtsh", sources._cache_key("da", None, {"max_depth": 1})) == (None, None)
+
+    get.data["%da%"] = [_cert(1, "da.com")]
+    get.broken.clear()
+    complete = backend.results("da", get=get, max_depth=1)
+    assert complete.missing == []
+    value, state = response_cache.get("crtsh", sources._cache_key("da", None, {"max_depth": 1}))
+    assert state == "fresh" and len(value) == 1
+
+
+def test_nothing_received_is_an_error(response_cache):
+    with pytest.raises(sources.SourceError):
+        sources.get("crtsh").results("zz", get=FakeCrtSh({}, broken={"%zz%"}), max_depth=0)
+
+
+def test_organisation_identities_after_a_split():
+    # crt.sh also matches O=/CN= identities, which have any character after the term
+    spa, inc, slash = _cert(1, "Dama Spa"), _cert(2, "Dama, Inc."), _cert(3, "Dama/Holding")
+    get = FakeCrtSh({"%dama %": [spa], "%dama,%": [inc], "%dama/%": [slash]}, broken={"%dama%"})
+    query = crtsh.CrtShQuery("Dama", max_depth=1, get=get)
+    assert sorted(c["id"] for c in query) == [1, 2]
+    # "/" is not a split character: what it would bring is reported, not silently dropped
+    assert query.missing == ["%dama[outros]%"]
+
+
+def test_error_responses_are_closed():
+    served = []
+
+    def get(url):
+        served.append(FakeResponse(b"", status_code=503))
+        return served[-1]
+
+    query = crtsh.CrtShQuery("zz", max_depth=0, get=get)
+    assert list(query) == [] and query.missing == ["%zz%"]
+    assert all(r.closed for r in served)
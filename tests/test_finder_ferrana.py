@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+import finder_ferrana
+import sources
+
+
+def _records(*rows):
+    return sources.Results([sources.Record("x", "x", str(i), data=row) for i, row in enumerate(rows)])
+
+
+def test_scripts_go_through_the_source_registry(monkeypatch):
+    used = []
+    crtsh = _records({"id": 1})
+    crtsh.missing = ["%dama[outros]%"]
+    backends = {
+        "cdx": SimpleNamespace(search=lambda value: used.append(("cdx", value)) or iter(_records(["k", "1"]))),
+        "crtsh": SimpleNamespace(results=lambda value: used.append(("crtsh", value)) or crtsh),
+    }
+    monkeypatch.setattr(sources, "get", backends.__getitem__)
+    assert finder_ferrana.wayback_checks("a.com.br") == [["k", "1"]]
+    assert finder_ferrana.crt_sh_search("dama") == [{"id": 1}]
+    assert used == [("cdx", "a.com.br"), ("crtsh", "dama")]
+
+
+def test_source_errors_become_empty_results(monkeypatch):
+    def fail(value):
+        raise sources.SourceError("fora do ar")
+
+    monkeypatch.setattr(sources, "get", lambda name: SimpleNamespace(search=fail, results=fail))
+    assert finder_ferrana.wayback_checks("a.com.br") == []
+    assert finder_ferrana.crt_sh_search("dama") == []
+
+
+def test_whois_uses_the_in_process_engine(monkeypatch):
+    import whois_engine
+
+    monkeypatch.setattr(whois_engine, "lookup", lambda domain: {"found": True, "raw": f"domain: {domain}"})
+    assert finder_ferrana.whois_lookup("a.com.br") == "domain: a.com.br"
+
+    def down(domain):
+        raise whois_engine.WhoisError("whois.registro.br: timed out")
+
+    monkeypatch.setattr(whois_engine, "lookup", down)
+    assert finder_ferrana.whois_lookup("b.com.br") == "whois failed: whois.registro.br: timed out"
@@ -0,0 +1,57 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("flask")
+
+import finder_web_ui  # noqa: E402
+import sources  # noqa: E402
+
+
+def test_slow_source_does_not_block_the_others(monkeypatch):
+    release = threading.Event()
+
+    def entry(name, value, **options):
+        if name == "crtsh":
+            release.wait(5)
+        return {'source': name, 'found': True, 'count': 1, 'summary': value, 'links': []}
+
+    monkeypatch.setattr(sources, "entry", entry)
+    pools = finder_web_ui.SourcePools()
+    try:
+        slow = [pools.submit("crtsh", finder_web_ui._run_source, "crtsh", f"t{i}") for i in range(20)]
+        started = time.monotonic()
+        fast = pools.submit("whois", finder_web_ui._run_source, "whois", "a.com.br")
+        assert fast.result(timeout=2)['summary'] == "a.com.br"
+        assert time.monotonic() - started < 1
+        # queued crt.sh tasks beyond its concurrency can still be cancelled
+        assert sum(f.cancel() for f in slow) == 20 - sources.get("crtsh").concurrency
+    finally:
+        release.set()
+        pools.shutdown(wait=True)
+
+
+def test_queries_with_the_same_value_share_one_search(monkeypatch):
+    calls = []
+
+    def entry(name, value, **options):
+        calls.append((name, value))
+        return {'source': name, 'found': False, 'count': 0, 'summary': '', 'links': []}
+
+    monkeypatch.setattr(sources, "entry", entry)
+    client = finder_web_ui.create_app().test_client()
+    r = client.post('/api/search', json={'queries': ['damabolsas.com.br', 'www.damabolsas.com.br'],
+                                         'sources': ['whois']})
+    assert [len(h['sources']) for h in r.json['hits']] == [1, 1]
+    assert calls == [("whois", "damabolsas.com.br")]
+
+
+def test_apps_do_not_share_state(tmp_path):
+    (tmp_path / "report.json").write_text("{}")
+    first = finder_web_ui.create_app()
+    second = finder_web_ui.create_app(tmp_path / "report.json", tmp_path / "report.capt")
+    for name in ('pools', 'jobs', 'reports'):
+        assert first.extensions['finder'][name] is not second.extensions['finder'][name]
+    r = second.test_client().get('/api/download')
+    assert r.status_code == 200 and r.data == b"{}"
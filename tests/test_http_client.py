@@ -0,0 +1,57 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+import http_client  # noqa: E402
+from ratelimit import limiter  # noqa: E402
+
+
+class _Handler(BaseHTTPRequestHandler):
+    hits = []
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        status = int(self.path.strip("/"))
+        self.send_response(status)
+        if status in (429, 503):
+            self.send_header("Retry-After", "1")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    _Handler.hits.clear()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_retry_leaves_throttling_to_the_limiter():
+    retry = http_client._retry()
+    assert not retry.is_retry("GET", 503, has_retry_after=True)
+    assert not retry.is_retry("GET", 429, has_retry_after=True)
+    assert retry.is_retry("GET", 502)
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_throttle_responses_come_back_at_once(server, status):
+    r = http_client.get(f"{server}/{status}", rate_limit=False)
+    assert r.status_code == status
+    assert _Handler.hits == [f"/{status}"]
+
+
+def test_throttle_reaches_the_limiter(server, monkeypatch):
+    seen = []
+    monkeypatch.setattr(limiter, "wait", lambda url: None)
+    monkeypatch.setattr(limiter, "update", lambda url, status, retry_after=None: seen.append((status, retry_after)))
+    http_client.get(f"{server}/503")
+    assert seen == [(503, "1")]
@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from jobs import JobLimitError, JobManager
+
+
+def test_stream_replays_from_start_and_ends_when_done():
+    manager = JobManager(max_active=1)
+    release = threading.Event()
+
+    def work(job):
+        job.publish("result", 1)
+        release.wait(5)
+        job.publish("result", 2)
+
+    job = manager.submit(work)
+    release.set()
+    events = [(idx, data) for idx, name, data in job.stream(keepalive=0.05) if idx is not None]
+    assert events == [(0, 1), (1, 2)]
+    assert [data for _, _, data in job.stream(start=1)] == [2]
+    assert job.snapshot()["status"] == "done"
+
+
+def test_limit_and_cancel():
+    manager = JobManager(max_active=1)
+    started = threading.Event()
+
+    def work(job):
+        started.set()
+        while not job.cancelled:
+            job._cancel.wait(0.01)
+
+    job = manager.submit(work)
+    started.wait(5)
+    with pytest.raises(JobLimitError):
+        manager.submit(work)
+    assert manager.cancel(job.id) is job
+    list(job.stream(keepalive=0.05))
+    assert job.status == "cancelled"
+
+
+def test_failed_job_publishes_error():
+    manager = JobManager()
+
+    def work(job):
+        raise RuntimeError("falhou")
+
+    job = manager.submit(work)
+    events = [(name, data) for idx, name, data in job.stream(keepalive=0.05) if idx is not None]
+    assert events == [("error", {"error": "falhou"})]
+    assert job.status == "failed"
+
+
+@pytest.fixture
+def client():
+    pytest.importorskip("flask")
+    import finder_web_ui
+    return finder_web_ui.create_app().test_client()
+
+
+@pytest.mark.parametrize("header", ["abc", "-5", "", "1.5"])
+def test_sse_ignores_malformed_last_event_id(client, header):
+    job_id = client.post("/api/jobs", json={"queries": [], "sources": []}).json["job_id"]
+    r = client.get(f"/api/jobs/{job_id}/events", headers={"Last-Event-ID": header})
+    assert r.status_code == 200
+    assert "event: done" in r.get_data(as_text=True)
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/api/jobs/nada/events").status_code == 404
@@ -0,0 +1,50 @@
+import io
+import json
+
+import pytest
+
+from json_stream import iter_array, iter_report
+
+REPORT = {
+    "wayback": {"dama.com.br": [["20200101", "http://dama.com.br/", 200], ["20210101", "http://dama.com.br/a", 404]],
+                "vazio.com.br": []},
+    "crtsh": {"dama": [{"id": 123456789, "name_value": "dama.com.br\nwww.dama.com.br"}]},
+    "whois": {"dama.com.br": "owner: Dama \"Bolsas\" Ltda ☂"},
+    "total": 1234567890,
+}
+
+
+def _expected():
+    out = []
+    for section, keys in REPORT.items():
+        if not isinstance(keys, dict):
+            out.append((section, None, "value", keys))
+            continue
+        for key, value in keys.items():
+            if isinstance(value, list):
+                out.append((section, key, "start", None))
+                out.extend((section, key, "item", item) for item in value)
+            else:
+                out.append((section, key, "value", value))
+    return out
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 64, 1 << 16])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_report_at_every_chunk_boundary(chunk_size, indent):
+    text = json.dumps(REPORT, ensure_ascii=False, indent=indent)
+    assert list(iter_report(io.StringIO(text), chunk_size)) == _expected()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4, 1 << 16])
+def test_numbers_split_across_chunks(chunk_size):
+    # 12345 must not come out as 1 or 12 when a chunk ends inside it
+    text = "[12345, -0.5e10, 7, true, null]"
+    assert list(iter_array(io.StringIO(text), chunk_size)) == [12345, -0.5e10, 7, True, None]
+
+
+@pytest.mark.parametrize("text", ["", "[1, 2", '{"a": {"b": [1,'])
+def test_truncated_documents_raise(text):
+    reader = iter_array if text.startswith("[") or not text else iter_report
+    with pytest.raises(ValueError):
+        list(reader(io.StringIO(text), 2))
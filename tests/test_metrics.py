@@ -0,0 +1,46 @@
+import threading
+
+from metrics import Metrics
+
+
+def test_snapshot_reset_loses_nothing_under_concurrency():
+    m = Metrics()
+    per_thread, threads = 5000, 4
+    totals = []
+    done = threading.Event()
+
+    def work():
+        for _ in range(per_thread):
+            m.observe("wayback", 0.01, 200)
+
+    def drain():
+        while not done.is_set():
+            totals.append(m.snapshot(reset=True))
+
+    drainer = threading.Thread(target=drain)
+    drainer.start()
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    done.set()
+    drainer.join()
+    totals.append(m.snapshot(reset=True))
+
+    merged = Metrics()
+    for snap in totals:
+        merged.merge(snap)
+    assert merged.requests == {("wayback", "200"): per_thread * threads}
+    assert merged.latency["wayback"][-1] == per_thread * threads
+
+
+def test_quantile_and_summary():
+    m = Metrics()
+    assert m.quantile("crtsh", 0.5) is None
+    for seconds in (0.01, 0.01, 0.01, 30):
+        m.observe("crtsh", seconds, 200)
+    assert m.quantile("crtsh", 0.5) <= 0.05
+    assert m.quantile("crtsh", 0.95) >= 30
+    header, row = m.summary_lines()
+    assert row.split()[:2] == ["crtsh", "4"]
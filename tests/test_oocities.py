@@ -0,0 +1,68 @@
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+import oocities
+from conftest import FakeResponse
+
+
+def _page(n, pager):
+    links = "".join(f'<a href="/search?q=Dama&amp;page={p}">{p}</a>' for p in pager)
+    return (f'<html><body><a href="http://www.oocities.org/dama/p{n}.html#top">Dama página {n}</a>'
+            f'<a href="https://oocities.org/dama/comum.html">Loja Dama</a>'
+            f'<a href="/outra/coisa.html">nada a ver</a>{links}</body></html>')
+
+
+class FakeSite:
+    """Busca com 6 páginas; o paginador só mostra até 3 números à frente."""
+
+    def __init__(self, pages=6, broken=()):
+        self.pages = pages
+        self.broken = set(broken)
+        self.fetched = []
+
+    def __call__(self, url):
+        page = int(parse_qs(urlsplit(url).query).get("page", ["1"])[0])
+        self.fetched.append(page)
+        if page in self.broken or page > self.pages:
+            return FakeResponse("", status_code=500)
+        pager = [p for p in range(1, self.pages + 1) if p <= page + 3 or p == self.pages]
+        return FakeResponse(_page(page, pager))
+
+
+@pytest.fixture(params=["lxml", "html.parser"])
+def parser(request, monkeypatch):
+    if request.param == "html.parser":
+        monkeypatch.setattr(oocities, "lxml", None)
+    elif oocities.lxml is None:
+        pytest.skip("lxml não instalado")
+
+
+def test_every_page_is_fetched_once_and_hits_are_deduplicated(parser):
+    site = FakeSite()
+    crawler = oocities.OocitiesCrawler("Dama", get=site)
+    hits = crawler.run()
+    # 1 shows 2, 3, 4 and 6: page 5 is a gap filled from the largest number seen
+    assert sorted(site.fetched) == [1, 2, 3, 4, 5, 6]
+    assert crawler.pages_fetched == 6
+    urls = [h["url"] for h in hits]
+    assert len(urls) == len(set(oocities.normalize_url(u) for u in urls)) == 7
+    assert "https://oocities.org/dama/comum.html" in urls
+    assert not any("outra" in u for u in urls)
+
+
+def test_limits_and_errors(parser):
+    site = FakeSite(pages=6, broken={3})
+    crawler = oocities.OocitiesCrawler("dama", max_pages=4, get=site)
+    crawler.run()
+    assert sorted(site.fetched) == [1, 2, 3, 4]
+    assert len(crawler.errors) == 1 and crawler.pages_fetched == 3
+
+    shallow = FakeSite()
+    oocities.OocitiesCrawler("dama", max_depth=0, get=shallow).run()
+    assert shallow.fetched == [1]
+
+
+def test_normalize_url():
+    assert oocities.normalize_url("HTTP://WWW.OoCities.org/a?b=1#x") == "http://oocities.org/a?b=1"
+    assert oocities.normalize_url("https://oocities.org") == "https://oocities.org/"
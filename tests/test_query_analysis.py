@@ -0,0 +1,62 @@
+import pytest
+
+from cert_index import CertIndex
+from query_analysis import analyze, registered_domain
+
+
+@pytest.mark.parametrize("raw, kind, domain", [
+    ("https://www.DamaBolsas.com.br/loja", "domain", "damabolsas.com.br"),
+    ("loja.co.uk:8080", "domain", "loja.co.uk"),
+    ("contato@ferrana.com.br", "email", "ferrana.com.br"),
+    ("Fernanda  Marsiglia", "name", None),
+    ("ferrana", "term", None),
+    ("dama-acessorios", "term", None),
+    ("a@b", "term", None),
+    ("", "term", None),
+])
+def test_kinds(raw, kind, domain):
+    q = analyze(raw)
+    assert (q.kind, q.domain) == (kind, domain)
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("www.loja.com.br", "loja.com.br"),
+    ("*.a.b.example.com.", "example.com"),
+    ("com.br", "com.br"),
+    ("localhost", "localhost"),
+])
+def test_registered_domain(name, expected):
+    assert registered_domain(name) == expected
+
+
+def test_value_for_each_source():
+    q = analyze("https://www.DamaBolsas.com.br/loja")
+    assert q.value_for("whois") == q.value_for("crtsh") == "damabolsas.com.br"
+    assert q.value_for("wayback") == "damabolsas"
+    assert q.value_for("nao-existe") is None
+
+    name = analyze("Fernanda Marsíglia")
+    assert name.value_for("wayback") == "fernandamarsiglia"
+    assert name.value_for("whois") is name.value_for("crtsh") is None
+    assert "whois" not in name.sources()
+
+
+def test_free_mail_skips_domain_sources():
+    q = analyze("fulano@gmail.com")
+    assert q.free_mail
+    assert q.value_for("whois") is None and q.value_for("crtsh") is None
+    assert q.value_for("wayback") == "fulano"
+    assert not analyze("contato@ferrana.com.br").free_mail
+
+
+def test_sources_cheapest_first():
+    assert analyze("ferrana").sources() == ("crtsh", "oocities", "wayback")
+    assert analyze("").sources() == ()
+
+
+def test_cert_index_matches_subdomains_only():
+    index = CertIndex()
+    index.add({"id": 1, "name_value": "*.damabolsas.com.br\nwww.damabolsas.com.br"})
+    index.add({"id": 2, "name_value": "damasco.com.br"})
+    assert [c["id"] for c in index.matches("DamaBolsas.com.br.")] == [1]
+    assert index.matches("dama.com.br") == []
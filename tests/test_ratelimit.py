@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+import ratelimit
+from ratelimit import RateLimiter, TokenBucket, backoff_delay, parse_retry_after
+
+
+def test_scale_keeps_learned_backoff():
+    limiter = RateLimiter({"crt.sh": (2.0, 4.0)})
+    limiter.update("https://crt.sh/?q=x", 429)
+    bucket = limiter.bucket("https://crt.sh/")
+    assert bucket.rate == 1.0
+    limiter.scale(1 / 4)
+    assert (bucket.rate, bucket.max_rate) == (0.25, 1.0)
+
+
+def test_scale_applies_to_hosts_registered_later():
+    limiter = RateLimiter()
+    limiter.scale(1 / 4)
+    limiter.register("index.commoncrawl.org", (1.0, 8.0))
+    assert limiter.limit("index.commoncrawl.org") == (0.25, 2.0)
+    bucket = limiter.bucket("https://index.commoncrawl.org/collinfo.json")
+    assert (bucket.rate, bucket.max_rate) == (0.25, 2.0)
+    # a host with no declared limit uses the scaled default
+    assert limiter.bucket("http://desconhecido.example/").max_rate == pytest.approx(limiter.default[1] / 4)
+
+
+def test_register_does_not_override_a_known_host():
+    limiter = RateLimiter({"crt.sh": (0.5, 4.0)})
+    limiter.register("crt.sh", (9.0, 9.0))
+    assert limiter.limit("crt.sh") == (0.5, 4.0)
+
+
+class Clock:
+    """time.monotonic/time.sleep falsos: sleep só avança o relógio."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", c.monotonic)
+    monkeypatch.setattr(ratelimit.time, "sleep", c.sleep)
+    return c
+
+
+def test_bucket_refills_at_its_rate(clock):
+    bucket = TokenBucket(2.0, 2.0, burst=2)
+    bucket.acquire()                 # the first token is there already
+    assert clock.slept == []
+    bucket.acquire()
+    assert clock.slept == [pytest.approx(0.5)]
+    clock.now += 10                  # idle time never stores more than burst tokens
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.slept[1:] == [pytest.approx(0.5)]
+
+
+def test_throttle_halves_the_rate_and_success_recovers_it(clock):
+    limiter = RateLimiter({"crt.sh": (2.0, 4.0)})
+    url = "https://crt.sh/?q=%25dama%25"
+    limiter.update(url, 503)
+    limiter.update(url, 429)
+    bucket = limiter.bucket(url)
+    assert bucket.rate == 0.5
+    for _ in range(100):
+        limiter.update(url, 200)
+    assert bucket.rate == 4.0        # additive increase, capped at max_rate
+    limiter.update(url, 500)         # server errors neither raise nor lower the rate
+    assert bucket.rate == 4.0
+    for _ in range(20):
+        limiter.update(url, 429)
+    assert bucket.rate == pytest.approx(0.1)   # MIN_RATE floor
+
+
+def test_retry_after_blocks_the_host(clock):
+    limiter = RateLimiter({"web.archive.org": (100.0, 100.0)})
+    url = "http://web.archive.org/cdx/search/cdx"
+    assert limiter.update(url, 429, "7") == 7.0
+    limiter.wait(url)
+    assert sum(clock.slept) >= 7.0
+    # other hosts are not affected
+    before = list(clock.slept)
+    limiter.wait("https://crt.sh/")
+    assert clock.slept == before
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("3", 3.0), ("-2", 0.0), ("", None), (None, None), ("amanhã", None),
+])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=120), usegmt=True)
+    assert 100 < parse_retry_after(later) <= 120
+
+
+def test_backoff_delay_is_capped_full_jitter():
+    assert all(0 <= backoff_delay(3, base=1.0) <= 8 for _ in range(200))
+    assert all(backoff_delay(30, base=1.0, cap=60) <= 60 for _ in range(200))
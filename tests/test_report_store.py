@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+import app
+import report_store
+from captures import CaptureTable, is_current, load_captures
+from report_store import ReportStore
+
+
+def _row(ts, path="/", status="200"):
+    return ["br,com,exemplo)" + path, ts, "http://exemplo.com.br" + path, "text/html", status,
+            "3I42H3S6NNFQ2MSVX7XZKYAYSCX5QBYJ", "100"]
+
+
+@pytest.fixture
+def report(tmp_path):
+    # gravado como o app.py grava: JSON primeiro, .capt com o carimbo dele depois
+    rows = [_row(f"2014{m:02d}01000000", f"/p{m}") for m in range(1, 13)]
+    data = {
+        "wayback": {"exemplo.com.br": CaptureTable.from_rows(rows)},
+        "crtsh": {"exemplo": [{"id": 7, "name_value": "exemplo.com.br", "not_before": "2014-06-15T00:00:00"}]},
+    }
+    app.save_report(data, tmp_path / "report.json", tmp_path / "report.capt")
+    return ReportStore(tmp_path / "report.json", tmp_path / "report.capt")
+
+
+def test_pages_follow_cursor_in_timestamp_order(report):
+    assert is_current(report.capt_path, report.json_path)
+    first = report.page(limit=5)
+    second = report.page(cursor=first["next_cursor"], limit=5)
+    third = report.page(cursor=second["next_cursor"], limit=5)
+    stamps = [r["timestamp"] for page in (first, second, third) for r in page["items"]]
+    assert len(stamps) == 13
+    assert stamps == sorted(stamps)
+    assert third["next_cursor"] is None
+
+
+def test_filters_and_date_range(report):
+    page = report.page({"source": "wayback", "from": "2014-03", "to": "2014-05"})
+    assert [r["url"] for r in page["items"]] == [f"http://exemplo.com.br/p{m}" for m in (3, 4, 5)]
+    certs = report.page({"source": "crtsh"})["items"]
+    assert [c["url"] for c in certs] == ["https://crt.sh/?id=7"]
+
+
+def test_invalid_date_is_value_error(report):
+    with pytest.raises(ValueError):
+        report.page({"from": "abc"})
+    with pytest.raises(ValueError):
+        report.page({"to": "--"})
+
+
+def test_cursor_from_older_report_is_rejected(report):
+    cursor = report.page(limit=2)["next_cursor"]
+    st = report.json_path.stat()
+    os.utime(report.json_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    with pytest.raises(ValueError):
+        report.page(cursor=cursor)
+    with pytest.raises(ValueError):
+        report.page(cursor="nada")
+
+
+def test_sorted_order_is_persisted(report):
+    report.page()
+    assert report.order_path.exists()
+    reloaded = ReportStore(report.json_path, report.capt_path)
+    assert reloaded._read_order(reloaded._stamp(), 13) is not None
+    assert reloaded.page(limit=13)["items"] == report.page(limit=13)["items"]
+
+
+def test_capt_written_after_the_json_is_used(report, monkeypatch):
+    loaded = []
+    monkeypatch.setattr(report_store, "load_captures", lambda path: loaded.append(path) or load_captures(path))
+    assert len(report.page(limit=20)["items"]) == 13
+    assert loaded == [report.capt_path]
+
+    # JSON regravado depois (sem .capt novo): as capturas voltam a vir dele
+    text = report.json_path.read_text("utf-8").replace("20141201000000", "20151201000000")
+    report.json_path.write_text(text, "utf-8")
+    fresh = ReportStore(report.json_path, report.capt_path)
+    assert fresh.page({"source": "wayback"}, limit=20)["items"][-1]["timestamp"] == 20151201000000
+    assert loaded == [report.capt_path]
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from search_index import SearchIndex, main, to_urlkey, tokenize
+
+
+def _row(path, ts="20140101000000"):
+    return ["br,com,damabolsas)" + path, ts, "http://www.damabolsas.com.br" + path, "text/html", "200",
+            "3I42H3S6NNFQ2MSVX7XZKYAYSCX5QBYJ", "100"]
+
+
+@pytest.fixture
+def report(tmp_path):
+    data = {
+        "wayback": {"damabolsas.com.br": [_row("/"), _row("/produtos/bolsa-1"), _row("/produtos/bolsa-2"),
+                                          _row("/produtosx")]},
+        "crtsh": {"dama": [{"id": 7, "name_value": "damabolsas.com.br\nwww.damabolsas.com.br",
+                            "common_name": "damabolsas.com.br", "issuer_name": "C=US, O=Let's Encrypt"}]},
+        "whois": {"damabolsas.com.br": "domain: damabolsas.com.br\ne-mail: contato@damabolsas.com.br\n"},
+    }
+    path = tmp_path / "report.json"
+    path.write_text(json.dumps(data), "utf-8")
+    return path
+
+
+@pytest.fixture
+def index(tmp_path, report):
+    idx = SearchIndex(str(tmp_path / "index.sqlite3"))
+    assert idx.ingest_report(report) == 6
+    yield idx
+    idx.close()
+
+
+def test_tokenize_adds_parent_domains_and_emails():
+    tokens = tokenize("Contato: vendas@loja.com.br em www.loja.com.br")
+    assert {"vendas@loja.com.br", "www.loja.com.br", "loja.com.br", "com.br", "contato"} <= tokens
+    assert "br" in tokens and "" not in tokens
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://www.DamaBolsas.com.br/produtos?p=1", "br,com,damabolsas)/produtos?p=1"),
+    ("damabolsas.com.br", "br,com,damabolsas)/"),
+    ("br,com,damabolsas)/a", "br,com,damabolsas)/a"),
+])
+def test_to_urlkey(url, expected):
+    assert to_urlkey(url) == expected
+
+
+def test_query_by_email_host_and_prefix(index):
+    assert [r["source"] for r in index.search("contato@damabolsas.com.br")] == ["whois"]
+    assert {r["source"] for r in index.search("damabolsas.com.br")} == {"wayback", "crtsh", "whois"}
+    assert [r["data"]["id"] for r in index.search("encrypt damab*", source="crtsh")] == [7]
+    assert index.search("nada-aqui") == []
+
+
+def test_urlkey_prefix(index):
+    paths = [r["data"][2] for r in index.prefix("damabolsas.com.br/produtos/")]
+    assert paths == ["http://www.damabolsas.com.br/produtos/bolsa-1", "http://www.damabolsas.com.br/produtos/bolsa-2"]
+    assert len(index.prefix("www.damabolsas.com.br")) == 4
+
+
+def test_rebuild_does_not_duplicate(index, report, tmp_path):
+    index.ingest_report(report)
+    assert index.conn.execute("SELECT count(*) FROM docs").fetchone() == (6,)
+
+    shard = tmp_path / "shard.jsonl"
+    shard.write_text(json.dumps({"item": "damabolsas.com.br", "wayback": [_row("/novo", "20200101000000")]}) + "\n")
+    assert index.ingest_jsonl(shard) == 1
+    assert len(index.prefix("damabolsas.com.br/novo")) == 1
+
+
+def test_cli_build_and_query(tmp_path, report, capsys):
+    db = str(tmp_path / "cli.sqlite3")
+    assert main(["--index", db, "build", "--report", str(report)]) == 0
+    assert main(["--index", db, "query", "contato@damabolsas.com.br"]) == 0
+    assert "[whois] damabolsas.com.br" in capsys.readouterr().out
@@ -0,0 +1,74 @@
+import types
+
+import pytest
+
+import cache
+import sources
+
+
+def _backend(search, name="teste", **kwargs):
+    backend = sources.Backend(name, name, "modulo_inexistente", cache=kwargs.pop("cache", None), **kwargs)
+    backend._plugin = types.SimpleNamespace(search=search)
+    return backend
+
+
+def _captures(n, closed):
+    def search(value, limit=None, get=None):
+        try:
+            for i in range(n):
+                yield sources.Record("teste", "capture", str(i), data=[value, str(i)])
+        finally:
+            closed.append(True)
+    return search
+
+
+def test_limit_stops_and_closes_the_stream(response_cache):
+    closed = []
+    results = _backend(_captures(10_000, closed), cache="wayback").results("a.com.br", limit=5)
+    assert [r.key for r in results] == ["0", "1", "2", "3", "4"]
+    assert closed == [True]
+    assert results.missing == []
+
+
+def test_search_is_not_cached_and_wraps_errors(response_cache):
+    def broken(value, limit=None, get=None):
+        yield sources.Record("teste", "capture", "0")
+        raise OSError("conexão encerrada")
+
+    backend = _backend(broken, cache="wayback")
+    with pytest.raises(sources.SourceError) as info:
+        list(backend.search("a.com.br"))
+    assert isinstance(info.value.__cause__, OSError)
+    with pytest.raises(sources.SourceError):
+        backend.results("a.com.br")
+    assert response_cache.get("wayback", sources._cache_key("a.com.br", None, {})) == (None, None)
+
+
+def test_large_results_are_returned_but_not_cached(tmp_path, monkeypatch):
+    store = cache.ResponseCache(str(tmp_path / "c.sqlite3"), max_value_bytes=2000)
+    monkeypatch.setattr(cache, "_default", store)
+    backend = _backend(_captures(500, []), cache="wayback")
+    assert len(backend.results("big.com.br")) == 500
+    assert store.get("wayback", sources._cache_key("big.com.br", None, {})) == (None, None)
+    assert len(backend.results("small.com.br", limit=3)) == 3
+    assert store.get("wayback", sources._cache_key("small.com.br", 3, {}))[1] == "fresh"
+
+
+def test_web_requests_cap_streaming_backends(monkeypatch):
+    pytest.importorskip("flask")
+    import finder_web_ui
+    calls = {}
+    monkeypatch.setattr(sources, "entry", lambda name, value, **options: calls.setdefault(name, options))
+    for name in ("cdx", "commoncrawl", "crtsh", "wayback"):
+        finder_web_ui._run_source(name, "a.com.br")
+    assert calls["cdx"]["limit"] == calls["commoncrawl"]["limit"] == finder_web_ui.WEB_MAX_RESULTS
+    assert calls["crtsh"]["limit"] == finder_web_ui.WEB_MAX_RESULTS
+    assert "limit" not in calls["wayback"]
+
+
+def test_select_orders_by_cost_and_skips_inapplicable():
+    import query_analysis
+    chosen = [b.name for b in sources.select(query_analysis.analyze("damabolsas.com.br"))]
+    assert chosen == sorted(chosen, key=lambda n: sources.get(n).cost)
+    assert "whois" in chosen and "cdx" not in chosen
+    assert [b.name for b in sources.select(query_analysis.analyze("fulano@gmail.com"))] == ["oocities", "wayback"]
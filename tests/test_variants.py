@@ -0,0 +1,48 @@
+import pytest
+
+import variants
+
+
+def test_known_brand_without_typos():
+    assert variants.generate("Dama", words=["Bolsas"], with_typos=False) == [
+        "dama.com.br", "dama.com", "dama.net.br",
+        "damabolsas.com.br", "damabolsas.com", "damabolsas.net.br",
+        "dama-bolsas.com.br", "dama-bolsas.com", "dama-bolsas.net.br",
+        "damas.com.br", "damas.com", "damas.net.br",
+        "damabolsa.com.br", "damabolsa.com", "damabolsa.net.br",
+        "dama-bolsa.com.br", "dama-bolsa.com", "dama-bolsa.net.br",
+    ]
+
+
+def test_typos_come_last_and_are_unique():
+    domains = variants.generate("dama acessórios", tlds=("com.br",))
+    assert domains[:3] == ["damaacessorios.com.br", "dama-acessorios.com.br", "damaacessorio.com.br"]
+    assert len(domains) == len(set(domains))
+    for typo in ("damaacesorios", "damaacesssorios", "dmaaacessorios", "damaacessprios"):
+        assert f"{typo}.com.br" in domains
+    assert variants.generate("%%") == []
+
+
+@pytest.mark.parametrize("word, forms", [
+    ("acessorios", ["acessorio"]), ("cartao", ["cartoes"]), ("cartoes", ["cartao"]),
+    ("bolsa", ["bolsas"]), ("anel", ["aneis"]), ("mes", []),
+])
+def test_number_forms(word, forms):
+    assert variants.number_forms(word) == forms
+
+
+def test_prefilter_uses_dns_then_wayback_and_does_not_cache_unknown(response_cache, monkeypatch):
+    dns = {"a.com.br": True, "b.com.br": False, "c.com.br": False, "d.com.br": None}
+    wayback = {"b.com.br": True, "c.com.br": False, "d.com.br": None}
+    calls = []
+    monkeypatch.setattr(variants, "dns_exists", lambda d: calls.append(("dns", d)) or dns[d])
+    monkeypatch.setattr(variants, "wayback_exists", lambda d: calls.append(("wayback", d)) or wayback[d])
+
+    found, unknown = variants.prefilter(["a.com.br", "b.com.br", "c.com.br", "d.com.br", "a.com.br"], workers=2)
+    assert found == {"a.com.br": "dns", "b.com.br": "wayback"}
+    assert unknown == ["d.com.br"]
+    assert ("wayback", "a.com.br") not in calls
+
+    calls.clear()
+    variants.prefilter(["a.com.br", "c.com.br", "d.com.br"])
+    assert {d for _, d in calls} == {"d.com.br"}     # only the unknown one is checked again
@@ -0,0 +1,86 @@
+import pytest
+
+from whois_engine import parse_date, parse_whois
+
+REGISTRO_BR = """\
+% Copyright (c) Nic.br
+%  The use of the data below is only permitted as described in
+%  full by the terms of use at https://registro.br/termo/en.html ,
+%  being prohibited its distribution, commercialization or
+%  reproduction, in particular, to use it for advertising or
+%  any similar purpose.
+%  2024-05-01T10:00:00-03:00 - IP: 203.0.113.1
+
+domain:      damabolsas.com.br
+owner:       Dama Bolsas Ltda
+nserver:     a.sec.dns.br
+nserver:     b.sec.dns.br
+created:     20140515 #12345678
+changed:     20230102
+expires:     20250515
+status:      published
+
+nic-hdl-br:  ABC123
+created:     20100101
+"""
+
+VERISIGN = """\
+   Domain Name: EXAMPLE.COM
+   Registrar: Example Registrar, Inc.
+   Updated Date: 2023-08-14T07:01:38Z
+   Creation Date: 1995-08-14T04:00:00Z
+   Registry Expiry Date: 2024-08-13T04:00:00Z
+   Name Server: A.IANA-SERVERS.NET
+   Domain Status: clientDeleteProhibited https://icann.org/epp#clientDeleteProhibited
+
+NOTICE: The expiration date displayed in this record is the date the
+registrar's sponsorship of the domain name registration in the registry is
+currently set to expire.
+TERMS OF USE: You are not authorized to access or query our Whois
+database through the use of electronic processes. If a domain is
+not found in this database, Verisign makes no guarantee.
+"""
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("20140515 #12345678", "2014-05-15"),
+    ("2023-08-14T07:01:38Z", "2023-08-14"),
+    ("2014.05.15", "2014-05-15"),
+    ("15/05/2014 00:00:00", "2014-05-15"),
+    ("15-May-2014", "2014-05-15"),
+    ("15 september 2014", "2014-09-15"),
+    ("2014-13-40", None),
+    ("before 1995", None),
+    ("", None),
+])
+def test_parse_date(value, expected):
+    assert parse_date(value) == expected
+
+
+def test_registro_br_record():
+    record = parse_whois(REGISTRO_BR, "damabolsas.com.br", "whois.registro.br")
+    assert record["found"]
+    assert (record["created"], record["updated"], record["expires"]) == ("2014-05-15", "2023-01-02", "2025-05-15")
+    assert record["owner"] == "Dama Bolsas Ltda"
+    assert record["nameservers"] == ["a.sec.dns.br", "b.sec.dns.br"]
+
+
+def test_disclaimer_does_not_mark_record_as_missing():
+    record = parse_whois(VERISIGN, "example.com")
+    assert record["found"]
+    assert record["created"] == "1995-08-14"
+    assert record["status"] == ["clientDeleteProhibited"]
+
+
+@pytest.mark.parametrize("text", [
+    'No match for "NADA-AQUI.COM".\r\n>>> Last update of whois database: 2024-05-01 <<<\r\n',
+    REGISTRO_BR.split("\ndomain:")[0] + '\n% No match for domain "nada-aqui.com.br"\n',
+    "Domain not found.\n\nTerms of Use: ...\n",
+    "domain: nada-aqui.pt\nstatus: free\n",
+])
+def test_missing_domain(text):
+    assert not parse_whois(text)["found"]
+
+
+def test_empty_response():
+    assert not parse_whois("")["found"]
@@ -0,0 +1,201 @@
+# variants.py
+# Variações de domínio para um termo de marca e pré-filtro de existência.
+#
+# generate("ferrana", words=["acessorios"]) monta os candidatos:
+#   - junções com e sem hífen     ferranaacessorios, ferrana-acessorios
+#   - plural / singular (pt-BR)   ferranaacessorio, ...
+#   - erros de digitação comuns   feranaacessorios (omissão), ferrranaacessorios
+#                                 (repetição), frerana... (troca), ferrsna... (tecla vizinha)
+#   - troca de TLD                .com.br, .com, .net.br
+# na ordem do mais provável para o menos provável, sem repetidos.
+#
+# prefilter() descarta, antes das buscas caras (CDX completo, crt.sh, WHOIS),
+# os candidatos que não deixaram rastro:
+#   1. DNS (getaddrinfo do domínio e do www.) - sem custo nas fontes públicas
+#   2. CDX com limit=1 (uma captura basta) para os que não resolvem, já que
+#      domínios antigos costumam ter expirado
+# As verificações rodam em paralelo e o resultado fica no cache persistente
+# (cache.py, fonte "exists"); falha de rede não é gravada e o candidato volta
+# como desconhecido.
+#
+# Uso:
+#   candidatos = variants.generate("dama", words=["bolsas", "acessorios"])
+#   existentes, desconhecidos = variants.prefilter(candidatos)
+#   existentes   # {"damabolsas.com.br": "dns", "damaacessorio.com.br": "wayback", ...}
+
+import itertools
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cache
+import cdx
+import metrics
+import query_analysis
+
+TLDS = ("com.br", "com", "net.br")
+CHECKS = ("dns", "wayback")
+WORKERS = 32
+CDX_TIMEOUT = 20
+MAX_WORDS = 4
+MIN_TYPO_LENGTH = 4
+
+# vizinhos na mesma linha do teclado (QWERTY / ABNT2)
+KEYBOARD_ROWS = ("qwertyuiop", "asdfghjkl", "zxcvbnm")
+
+
+def _neighbors(rows):
+    table = {}
+    for row in rows:
+        for i, c in enumerate(row):
+            table[c] = row[max(i - 1, 0):i] + row[i + 1:i + 2]
+    return table
+
+
+NEIGHBORS = _neighbors(KEYBOARD_ROWS)
+
+# (sufixo do singular, sufixo do plural), do mais específico para o mais geral
+PLURAL_RULES = (
+    ("ao", "oes"), ("al", "ais"), ("el", "eis"), ("ol", "ois"), ("ul", "uis"),
+    ("m", "ns"), ("r", "res"), ("z", "zes"),
+)
+
+
+def words_of(term):
+    """Palavras do termo, sem acentos (Dama Acessórios -> ["dama", "acessorios"])."""
+    text = query_analysis.ascii_fold(term.lower())
+    return [w for w in query_analysis.SLUG_RE.sub(" ", text.replace("-", " ")).split() if w]
+
+
+def joins(words):
+    """Todas as junções das palavras com "" ou "-" entre elas."""
+    words = words[:MAX_WORDS]
+    if len(words) == 1:
+        return [words[0]]
+    out = []
+    for seps in itertools.product(("", "-"), repeat=len(words) - 1):
+        out.append(words[0] + "".join(s + w for s, w in zip(seps, words[1:])))
+    return out
+
+
+def number_forms(word):
+    """A outra forma da palavra: singular se ela termina em s, senão o plural (pt-BR, sem acentos)."""
+    if word.endswith("s"):
+        for singular, plural in PLURAL_RULES:
+            if word.endswith(plural) and len(word) > len(plural) + 1:
+                return [word[: -len(plural)] + singular]
+        return [word[:-1]] if len(word) > 3 else []
+    for singular, plural in PLURAL_RULES:
+        if word.endswith(singular):
+            return [word[: -len(singular)] + plural]
+    return [word + "s"]
+
+
+def typos(label):
+    """Erros de digitação: omissão, repetição, troca de vizinhas e tecla ao lado."""
+    if len(label) < MIN_TYPO_LENGTH:
+        return []
+    out = []
+    for i, c in enumerate(label):
+        out.append(label[:i] + label[i + 1:])
+        out.append(label[:i] + c + label[i:])
+        if i + 1 < len(label) and label[i + 1] != c:
+            out.append(label[:i] + label[i + 1] + c + label[i + 2:])
+        for n in NEIGHBORS.get(c, ""):
+            out.append(label[:i] + n + label[i + 1:])
+    return [t for t in out if t != label]
+
+
+def generate(term, words=(), tlds=TLDS, with_typos=True):
+    """Domínios candidatos para o termo, do mais provável ao menos provável."""
+    base = words_of(term)
+    if not base:
+        return []
+    combos = [base] + [base + words_of(w) for w in words if words_of(w)]
+
+    exact, plurals, misspelled = [], [], []
+    for combo in combos:
+        exact.extend(joins(combo))
+        for form in number_forms(combo[-1]):
+            plurals.extend(joins(combo[:-1] + [form]))
+        if with_typos:
+            misspelled.extend(typos("".join(combo)))
+
+    seen = {}
+    for label in itertools.chain(exact, plurals, misspelled):
+        if not 0 < len(label) <= 63:
+            continue
+        for tld in tlds:
+            domain = f"{label}.{tld}"
+            if domain not in seen and query_analysis.is_domain(domain):
+                seen[domain] = None
+    return list(seen)
+
+
+# ---------------------------------------------------------------------------
+# pré-filtro de existência
+
+def dns_exists(domain):
+    """True se o domínio (ou www.) resolve, False se não existe, None se o DNS falhou."""
+    unknown = False
+    for name in (domain, "www." + domain):
+        started = time.perf_counter()
+        try:
+            socket.getaddrinfo(name, None)
+            metrics.observe("dns", time.perf_counter() - started, "ok")
+            return True
+        except socket.gaierror as e:
+            metrics.observe("dns", time.perf_counter() - started, "nxdomain")
+            if e.errno == getattr(socket, "EAI_NODATA", None):
+                return True  # o nome existe, só não tem endereço
+            if e.errno == getattr(socket, "EAI_AGAIN", None):
+                unknown = True
+        except (UnicodeError, OSError) as e:
+            metrics.error("dns", type(e).__name__)
+            unknown = True
+    return None if unknown else False
+
+
+def _cdx_get(url):
+    import http_client
+    return http_client.get(url, timeout=CDX_TIMEOUT, stream=True)
+
+
+def wayback_exists(domain, get=None):
+    """True se o CDX tem ao menos uma captura do domínio, None se o CDX falhou."""
+    try:
+        rows = cdx.iter_captures(f"{domain}/*", fl="timestamp", page_size=1, max_pages=1, get=get or _cdx_get)
+        return next(rows, None) is not None
+    except (cdx.CDXError, OSError) as e:  # requests.RequestException é subclasse de IOError
+        metrics.failure("wayback", e)
+        return None
+
+
+def check(domain, checks=CHECKS):
+    """Primeira verificação que encontrou o domínio ("dns" / "wayback"), False ou None."""
+    unknown = False
+    for name in checks:
+        found = dns_exists(domain) if name == "dns" else wayback_exists(domain)
+        if found:
+            return name
+        if found is None:
+            unknown = True
+    return None if unknown else False
+
+
+def exists(domain, checks=CHECKS):
+    """check() com cache persistente (respostas None não são gravadas)."""
+    return cache.cached("exists", f"{domain} {'+'.join(checks)}", lambda: check(domain, checks))
+
+
+def prefilter(candidates, checks=CHECKS, workers=WORKERS):
+    """Separa os candidatos em ({domínio: verificação que achou}, [desconhecidos])."""
+    candidates = list(dict.fromkeys(candidates))
+    found, unknown = {}, []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for domain, result in zip(candidates, pool.map(lambda d: exists(d, checks), candidates)):
+            if result:
+                found[domain] = result
+            elif result is None:
+                unknown.append(domain)
+    return found, unknown
@@ -0,0 +1,279 @@
+# whois_engine.py
+# Motor de WHOIS único para todo o projeto (app.py, finder.py, finder_web_ui.py,
+# report_viewer.py), sem processos externos e sem python-whois.
+#
+# - consulta direto a porta 43 do servidor do registro, escolhido pelo TLD
+#   (.br -> whois.registro.br, .com/.net -> Verisign, ...); TLDs desconhecidos
+#   são descobertos uma vez via whois.iana.org ("refer:")
+# - segue a indicação "Registrar WHOIS Server" dos registros thin (.com/.net)
+# - transforma a resposta em campos: registrar, created, expires, updated
+#   (datas ISO "AAAA-MM-DD"), nameservers, status
+# - resultados ficam no cache persistente (cache.py) e lookup_many() consulta
+#   milhares de domínios com um pool de sockets concorrentes
+#
+# Uso:
+#   rec = whois_engine.lookup("damabolsas.com.br")
+#   rec["found"], rec["registrar"], rec["expires"], rec["nameservers"]
+#   registros = whois_engine.lookup_many(dominios, workers=16)
+
+import re
+import socket
+import threading
+import time
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+
+import cache
+import metrics
+from ratelimit import limiter
+
+WHOIS_PORT = 43
+TIMEOUT = 15
+IANA_SERVER = "whois.iana.org"
+
+TLD_SERVERS = {
+    "br": "whois.registro.br",
+    "com": "whois.verisign-grs.com",
+    "net": "whois.verisign-grs.com",
+    "org": "whois.pir.org",
+    "info": "whois.nic.info",
+    "io": "whois.nic.io",
+    "pt": "whois.dns.pt",
+    "ar": "whois.nic.ar",
+    "uk": "whois.nic.uk",
+}
+
+# formato da consulta por servidor ("=" evita resultados parciais na Verisign)
+QUERY_FORMAT = {
+    "whois.verisign-grs.com": "={}\r\n",
+}
+
+# só valem no início das linhas antes do primeiro campo ou no status: os
+# avisos legais de vários registros também falam em "not found"
+NOT_FOUND_MARKERS = (
+    "no match", "not found", "no entries found", "no data found",
+    "domain not found", "status: free",
+)
+NOT_FOUND_STATUS = ("free", "available", "not found")
+FIRST_LINES = 20
+
+# chave do WHOIS (minúsculas) -> campo do registro
+FIELD_KEYS = {
+    "registrar": "registrar",
+    "sponsoring registrar": "registrar",
+    "registrar name": "registrar",
+    "owner": "owner",
+    "registrant": "owner",
+    "registrant organization": "owner",
+    "creation date": "created",
+    "created": "created",
+    "created on": "created",
+    "registered on": "created",
+    "registration time": "created",
+    "registry expiry date": "expires",
+    "registrar registration expiration date": "expires",
+    "expiration date": "expires",
+    "expires": "expires",
+    "expires on": "expires",
+    "expiry date": "expires",
+    "paid-till": "expires",
+    "updated date": "updated",
+    "changed": "updated",
+    "last-modified": "updated",
+    "last updated": "updated",
+    "name server": "nameservers",
+    "nserver": "nameservers",
+    "nameserver": "nameservers",
+    "domain status": "status",
+    "status": "status",
+    "registrar whois server": "referral",
+}
+LIST_FIELDS = ("nameservers", "status")
+DATE_FIELDS = ("created", "expires", "updated")
+
+MONTHS = {m: i for i, m in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1)}
+# 2014-05-15T12:00:00Z, 2014.05.15, 20140515 #12345678 (registro.br)
+_YMD = re.compile(r"(\d{4})[-./]?(\d{2})[-./]?(\d{2})(?!\d)")
+# 15/05/2014 (.pt), 15-05-2014
+_DMY = re.compile(r"(\d{1,2})[-./](\d{1,2})[-./](\d{4})")
+# 15-May-2014 (.uk), 15 May 2014
+_DMONY = re.compile(r"(\d{1,2})[- ]([a-z]{3})[a-z]*[- ](\d{4})", re.I)
+
+
+class WhoisError(Exception):
+    pass
+
+
+_server_lock = threading.Lock()
+
+
+def query(server, text, timeout=TIMEOUT):
+    """Envia a consulta para server:43 e devolve a resposta inteira em texto."""
+    limiter.wait(f"whois://{server}")
+    started = time.perf_counter()
+    try:
+        with socket.create_connection((server, WHOIS_PORT), timeout=timeout) as sock:
+            sock.sendall(QUERY_FORMAT.get(server, "{}\r\n").format(text).encode("utf-8"))
+            chunks = []
+            while True:
+                data = sock.recv(4096)
+                if not data:
+                    break
+                chunks.append(data)
+    except OSError as e:
+        if isinstance(e, socket.timeout):
+            metrics.timeout("whois")
+            metrics.observe("whois", time.perf_counter() - started, "timeout")
+        else:
+            metrics.error("whois", type(e).__name__)
+            metrics.observe("whois", time.perf_counter() - started, "error")
+        limiter.update(f"whois://{server}", None)
+        raise WhoisError(f"{server}: {e}") from e
+    raw = b"".join(chunks)
+    metrics.observe("whois", time.perf_counter() - started, "ok", len(raw))
+    limiter.update(f"whois://{server}", 200)
+    return raw.decode("utf-8", errors="replace")
+
+
+def server_for(domain):
+    """Servidor WHOIS do TLD (tabela fixa ou descoberto via IANA)."""
+    tld = domain.rsplit(".", 1)[-1].lower()
+    with _server_lock:
+        server = TLD_SERVERS.get(tld)
+    if server:
+        return server
+    for key, value in _pairs(query(IANA_SERVER, tld)):
+        if key in ("refer", "whois") and value:
+            with _server_lock:
+                TLD_SERVERS[tld] = value
+            return value
+    raise WhoisError(f"nenhum servidor WHOIS conhecido para .{tld}")
+
+
+def _pairs(text):
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line[0] in "%#>" or ":" not in line:
+            continue
+        key, _, value = line.partition(":")
+        yield key.strip().lower(), value.strip()
+
+
+def parse_date(value):
+    """Data de um campo WHOIS como "AAAA-MM-DD", ou None se o formato não for conhecido."""
+    value = (value or "").strip()
+    for pattern, order in ((_YMD, "ymd"), (_DMY, "dmy"), (_DMONY, "dmy")):
+        m = pattern.match(value)
+        if not m:
+            continue
+        parts = dict(zip(order, m.groups()))
+        month = parts["m"]
+        month = MONTHS.get(month[:3].lower()) if not month.isdigit() else int(month)
+        try:
+            return date(int(parts["y"]), month or 0, int(parts["d"])).isoformat()
+        except ValueError:
+            return None
+    return None
+
+
+def _not_found(text, status):
+    """Resposta de "domínio não existe": marcador antes do primeiro campo ou no status."""
+    if any(s.lower().startswith(NOT_FOUND_STATUS) for s in status):
+        return True
+    # o aviso vem antes do primeiro campo "chave: valor"; o que vem depois é
+    # registro ou termo de uso
+    for line in text.splitlines()[:FIRST_LINES]:
+        line = line.strip()
+        if line and line[0] not in "%#>" and ":" in line:
+            break
+        if line.lstrip("%#> ").lower().startswith(NOT_FOUND_MARKERS):
+            return True
+    return False
+
+
+def parse_whois(text, domain=None, server=None):
+    """Extrai os campos principais de uma resposta WHOIS em texto."""
+    record = {
+        "domain": domain, "server": server, "found": False,
+        "registrar": None, "owner": None, "created": None, "expires": None, "updated": None,
+        "nameservers": [], "status": [], "referral": None, "raw": text or "",
+    }
+    if not text:
+        return record
+    for key, value in _pairs(text):
+        field = FIELD_KEYS.get(key)
+        if not field or not value:
+            continue
+        if field in LIST_FIELDS:
+            value = value.split()[0].lower() if field == "nameservers" else value.split()[0]
+            if value not in record[field]:
+                record[field].append(value)
+        elif field in DATE_FIELDS:
+            if record[field] is None:
+                record[field] = parse_date(value)
+        elif record[field] is None:
+            record[field] = value
+    record["found"] = not _not_found(text, record["status"])
+    return record
+
+
+def _lookup(domain):
+    server = server_for(domain)
+    record = parse_whois(query(server, domain), domain, server)
+    referral = record.pop("referral")
+    if record["found"] and referral and referral.lower() != server:
+        try:
+            detail = parse_whois(query(referral, domain), domain, referral)
+        except WhoisError:
+            return record
+        for field, value in detail.items():
+            if field in ("domain", "server", "found", "raw", "referral"):
+                continue
+            if value:
+                record[field] = value
+        record["raw"] += "\n\n" + detail["raw"]
+    return record
+
+
+def lookup(domain):
+    """Registro WHOIS estruturado do domínio (com cache persistente)."""
+    domain = domain.strip().lower().rstrip(".")
+    try:
+        domain = domain.encode("idna").decode("ascii")
+    except UnicodeError:
+        raise WhoisError(f"domínio inválido: {domain!r}")
+    return cache.cached("whois_record", domain, lambda: _lookup(domain))
+
+
+def lookup_many(domains, workers=16):
+    """WHOIS em lote: {domínio: registro ou WhoisError} usando um pool de sockets."""
+    domains = list(dict.fromkeys(d.strip().lower() for d in domains if d.strip()))
+    results = {}
+
+    def one(domain):
+        try:
+            return domain, lookup(domain)
+        except WhoisError as e:
+            return domain, e
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for domain, result in pool.map(one, domains):
+            results[domain] = result
+    return results
+
+
+def format_record(record):
+    """Resumo legível de um registro (usado nas páginas web)."""
+    if not record or not record.get("found"):
+        return ""
+    lines = []
+    for label, field in (("Domínio", "domain"), ("Registrar", "registrar"), ("Titular", "owner"),
+                         ("Criado", "created"), ("Expira", "expires"), ("Atualizado", "updated")):
+        if record.get(field):
+            lines.append(f"{label}: {record[field]}")
+    if record.get("nameservers"):
+        lines.append("Nameservers: " + ", ".join(record["nameservers"]))
+    if record.get("status"):
+        lines.append("Status: " + ", ".join(record["status"]))
+    return "\n".join(lines)